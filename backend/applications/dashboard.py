@@ -0,0 +1,141 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from jobs.models import Job, application_status_codes
+from .models import Application
+
+DEFAULT_WINDOW_DAYS = 30
+MAX_WINDOW_DAYS = 365
+
+
+def _generation_key(employer_id):
+    return f'dashboard:{employer_id}:generation'
+
+
+def dashboard_cache_key(employer_id, days):
+    """
+    Cache key for one employer's dashboard over a window.
+    Keys embed a per-employer generation so one bump invalidates every window.
+    """
+    generation = cache.get_or_set(_generation_key(employer_id), 1, timeout=None)
+    return _dashboard_key(employer_id, generation, days)
+
+
+def _dashboard_key(employer_id, generation, days):
+    return f'dashboard:{employer_id}:{generation}:{days}'
+
+
+def invalidate_dashboard(employer_id):
+    """Drop every cached dashboard for this employer"""
+    try:
+        cache.incr(_generation_key(employer_id))
+    except ValueError:
+        # No generation stored yet, so nothing is cached either
+        pass
+
+
+def _dashboard_queries(employer_id, days, now):
+    """The two dashboard queries: per-job status counts and the daily histogram"""
+    codes = application_status_codes()
+    count_fields = [f'applications_{code.lower()}' for code in codes]
+    per_job_rows = (
+        Job.objects.filter(employer_id=employer_id)
+        .order_by('-created_at')
+        .with_application_counts()
+        .values('id', 'title', 'application_deadline', 'application_count', *count_fields)
+    )
+    since = _window_start(days, now)
+    daily_counts = (
+        Application.objects.filter(job__employer_id=employer_id, applied_at__gte=since)
+        .annotate(day=TruncDate('applied_at'))
+        .order_by()
+        .values_list('day')
+        .annotate(count=Count('id'))
+    )
+    return per_job_rows, daily_counts
+
+
+def _window_start(days, now):
+    return (now - timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _assemble_dashboard(per_job_rows, daily_counts, days, now):
+    codes = application_status_codes()
+    count_fields = [f'applications_{code.lower()}' for code in codes]
+    status_totals = dict.fromkeys(codes, 0)
+    per_job = []
+    for row in per_job_rows:
+        job_counts = {code: row[field] for code, field in zip(codes, count_fields)}
+        for code, count in job_counts.items():
+            status_totals[code] += count
+        per_job.append({
+            'id': row['id'],
+            'title': row['title'],
+            'status': 'Open' if row['application_deadline'] >= now else 'Closed',
+            'applications': row['application_count'],
+            'status_counts': job_counts,
+        })
+
+    daily_counts = dict(daily_counts)
+    since = _window_start(days, now)
+    daily = [
+        {'date': day.isoformat(), 'applications': daily_counts.get(day, 0)}
+        for day in (since.date() + timedelta(days=offset) for offset in range(days))
+    ]
+
+    return {
+        'jobs': len(per_job),
+        'applications': sum(status_totals.values()),
+        'accepted': status_totals['ACCEPTED'],
+        'rejected': status_totals['REJECTED'],
+        'status_counts': status_totals,
+        'per_job': per_job,
+        'daily': daily,
+        'window_days': days,
+    }
+
+
+def build_dashboard(employer_id, days=DEFAULT_WINDOW_DAYS):
+    """
+    Compute dashboard stats in two queries: one aggregated pass over the
+    employer's jobs (per-job status counts, summed for the totals) and one
+    daily application histogram over the last ``days`` days.
+    """
+    now = timezone.now()
+    per_job_rows, daily_counts = _dashboard_queries(employer_id, days, now)
+    return _assemble_dashboard(per_job_rows, daily_counts, days, now)
+
+
+async def abuild_dashboard(employer_id, days=DEFAULT_WINDOW_DAYS):
+    """build_dashboard with the async ORM"""
+    now = timezone.now()
+    per_job_rows, daily_counts = _dashboard_queries(employer_id, days, now)
+    per_job_rows = [row async for row in per_job_rows]
+    daily_counts = [row async for row in daily_counts]
+    return _assemble_dashboard(per_job_rows, daily_counts, days, now)
+
+
+def get_dashboard(employer_id, days=DEFAULT_WINDOW_DAYS):
+    """Cached build_dashboard; entries live until invalidated or the timeout passes"""
+    key = dashboard_cache_key(employer_id, days)
+    stats = cache.get(key)
+    if stats is None:
+        stats = build_dashboard(employer_id, days)
+        cache.set(key, stats, timeout=settings.DASHBOARD_CACHE_TIMEOUT)
+    return stats
+
+
+async def aget_dashboard(employer_id, days=DEFAULT_WINDOW_DAYS):
+    """Async get_dashboard, sharing its cache entries"""
+    generation = await cache.aget_or_set(_generation_key(employer_id), 1, timeout=None)
+    key = _dashboard_key(employer_id, generation, days)
+    stats = await cache.aget(key)
+    if stats is None:
+        stats = await abuild_dashboard(employer_id, days)
+        await cache.aset(key, stats, timeout=settings.DASHBOARD_CACHE_TIMEOUT)
+    return stats
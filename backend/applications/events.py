@@ -0,0 +1,187 @@
+"""
+Push events for application changes, streamed to clients as Server-Sent Events.
+
+Seekers receive ``application.status`` events on channel ``seeker:<id>``
+when an employer changes one of their applications. Employers receive
+``application.created`` events on ``employer:<id>`` when someone applies to
+one of their jobs.
+
+The broker is pluggable (EVENTS_BROKER). InProcessBroker only reaches
+streams served by the same process. RedisBroker relays through Redis
+pub/sub so any worker can publish to any other. Each stream is an asyncio
+queue waiting in the event loop, so idle connections cost no thread.
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+from rest_framework.utils.encoders import JSONEncoder
+
+REDIS_PREFIX = 'events:'
+
+
+class Subscription:
+    """One stream's bounded queue, fed from any thread and read in its event loop"""
+
+    def __init__(self, channels, maxsize):
+        self.channels = channels
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        # Set when events were dropped because the client is not keeping up
+        self.overflowed = False
+
+    def deliver(self, event):
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class InProcessBroker:
+    """Fans events out to the subscriptions of this process"""
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, event):
+        self.deliver(channel, event)
+
+    def deliver(self, channel, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.deliver(event)
+
+    def subscribe(self, channels):
+        """Must be called from the event loop that will read the subscription"""
+        subscription = Subscription(channels, settings.EVENTS_QUEUE_SIZE)
+        with self._lock:
+            for channel in channels:
+                self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[channel]
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Publishes through Redis (EVENTS_REDIS_URL); each process runs one listener
+    thread that hands every event to its own subscriptions. Requires redis-py.
+    """
+
+    def __init__(self):
+        import redis
+
+        super().__init__()
+        self._client = redis.Redis.from_url(settings.EVENTS_REDIS_URL)
+        self._listener = None
+
+    def publish(self, channel, event):
+        self._client.publish(REDIS_PREFIX + channel, json.dumps(event, cls=JSONEncoder))
+
+    def subscribe(self, channels):
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                    pubsub.psubscribe(**{REDIS_PREFIX + '*': self._relay})
+                    self._listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+        return super().subscribe(channels)
+
+    def _relay(self, message):
+        channel = message['channel'].decode()[len(REDIS_PREFIX):]
+        self.deliver(channel, json.loads(message['data']))
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.EVENTS_BROKER)()
+
+
+def seeker_channel(seeker_id):
+    return f'seeker:{seeker_id}'
+
+
+def employer_channel(employer_id):
+    return f'employer:{employer_id}'
+
+
+def user_channels(user):
+    if user.is_seeker():
+        return [seeker_channel(user.pk)]
+    if user.is_employer():
+        return [employer_channel(user.pk)]
+    return []
+
+
+def publish_on_commit(channel, event):
+    """Publish once the current transaction commits (immediately outside one)"""
+    transaction.on_commit(lambda: get_broker().publish(channel, event))
+
+
+def publish_status_changes(applications, status):
+    """``applications`` are (id, job_id, seeker_id) tuples that moved to ``status``"""
+    for pk, job_id, seeker_id in applications:
+        publish_on_commit(seeker_channel(seeker_id), {
+            'type': 'application.status',
+            'id': pk,
+            'job': job_id,
+            'status': status,
+        })
+
+
+def publish_new_application(employer_id, application):
+    """``application`` is the serialized new application"""
+    publish_on_commit(employer_channel(employer_id), {'type': 'application.created', **application})
+
+
+def _message(event_type, data):
+    return f'event: {event_type}\ndata: {json.dumps(data, cls=JSONEncoder)}\n\n'
+
+
+async def stream(channels):
+    """
+    SSE body for ``channels``. Sends a comment every EVENTS_HEARTBEAT seconds to
+    keep proxies from closing idle streams. A ``resync`` event means events were
+    dropped and the client should refetch. The stream ends after EVENTS_MAX_AGE
+    seconds and EventSource reconnects, so streams of vanished clients are reaped.
+    """
+    broker = get_broker()
+    subscription = broker.subscribe(channels)
+    deadline = time.monotonic() + settings.EVENTS_MAX_AGE
+    try:
+        yield f'retry: {settings.EVENTS_RETRY_MS}\n\n'
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), min(settings.EVENTS_HEARTBEAT, remaining)
+                )
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            if subscription.overflowed:
+                subscription.overflowed = False
+                yield _message('resync', {})
+            yield _message(event['type'], event)
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,127 @@
+"""
+Deadline-expiry sweep.
+
+A job closes by itself when its deadline passes (Job.is_open() is derived),
+but nothing else notices. sweep() walks the jobs whose deadline has passed,
+in (application_deadline, id) order over jobs_deadline_idx, a batch of jobs
+at a time. For each batch it:
+
+* resolves the applications still NEW (``keep``, ``reject`` or ``archive``,
+  see JOB_EXPIRY_APPLICATIONS). Rejections go through the status log,
+  funnel rollups and events like any other status change,
+* invalidates the dashboards of the batch's employers and the public job
+  caches, which may still list the jobs as open.
+
+Applications are updated ``chunk_size`` rows per transaction, so only those
+rows are ever locked. The watermark (a SweepWatermark keyset cursor) moves
+past a batch once it is done. A sweep that stops half-way repeats at most
+that batch, and the NEW filter makes the repeat a no-op for the
+applications already resolved.
+"""
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.cache import invalidate_public_jobs
+from jobs.models import Job
+from . import events, funnel
+from .dashboard import invalidate_dashboard
+from .models import Application, SweepWatermark
+
+ACTIONS = ('keep', 'reject', 'archive')
+WATERMARK = 'job_expiry'
+# Where a first sweep starts unless told otherwise: every job that ever expired
+BEGINNING = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def get_watermark(since=None):
+    """The sweep's watermark, created on first use; ``since`` moves it to that deadline"""
+    watermark, created = SweepWatermark.objects.get_or_create(
+        name=WATERMARK, defaults={'position': since or BEGINNING}
+    )
+    if since is not None and not created:
+        watermark.position, watermark.last_id = since, 0
+        watermark.save()
+    return watermark
+
+
+def expired_jobs(watermark, cutoff, batch_size):
+    """Next ``batch_size`` (id, employer_id, deadline) past the watermark with deadline before cutoff"""
+    return list(
+        Job.objects.filter(application_deadline__gte=watermark.position, application_deadline__lt=cutoff)
+        .exclude(application_deadline=watermark.position, id__lte=watermark.last_id)
+        .order_by('application_deadline', 'id')
+        .values_list('id', 'employer_id', 'application_deadline')[:batch_size]
+    )
+
+
+def reject_pending(jobs, chunk_size, now):
+    """Reject the NEW applications of ``jobs`` ({id: employer_id}), ``chunk_size`` per transaction"""
+    rejected = 0
+    while True:
+        with transaction.atomic():
+            targets = list(
+                Application.objects.select_for_update(of=('self',))
+                .filter(job_id__in=jobs, status='NEW')
+                .annotate(decided_before=funnel.decided_before())
+                .order_by('id')
+                .values_list('id', 'job_id', 'seeker_id', 'status', 'applied_at', 'decided_before')[:chunk_size]
+            )
+            if not targets:
+                return rejected
+            Application.objects.filter(pk__in=[target[0] for target in targets]).update(status='REJECTED')
+            by_employer = defaultdict(list)
+            for target in targets:
+                by_employer[jobs[target[1]]].append(target)
+            for employer_id, applications in by_employer.items():
+                funnel.record_status_changes(employer_id, applications, 'REJECTED', changed_at=now)
+            events.publish_status_changes([target[:3] for target in targets], 'REJECTED')
+        rejected += len(targets)
+        if len(targets) < chunk_size:
+            return rejected
+
+
+def archive_pending(jobs, chunk_size, now):
+    """Stamp archived_at on the NEW applications of ``jobs``, ``chunk_size`` per statement"""
+    archived = 0
+    pending = Application.objects.filter(job_id__in=jobs, status='NEW', archived_at__isnull=True)
+    while True:
+        ids = list(pending.order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return archived
+        # Rows changed since they were read drop out of the NEW filter
+        archived += pending.filter(pk__in=ids).update(archived_at=now)
+        if len(ids) < chunk_size:
+            return archived
+
+
+def sweep(action='keep', grace=timedelta(0), batch_size=500, chunk_size=1000, since=None, now=None, progress=None):
+    """
+    Process every job whose deadline passed before ``now - grace`` and is past
+    the watermark. Calls ``progress(stats)`` after each batch. Returns a
+    Counter of jobs, applications resolved and batches.
+    """
+    resolve = {'reject': reject_pending, 'archive': archive_pending}.get(action)
+    now = now or timezone.now()
+    cutoff = now - grace
+    watermark = get_watermark(since)
+    stats = Counter()
+    while True:
+        batch = expired_jobs(watermark, cutoff, batch_size)
+        if not batch:
+            return stats
+        jobs = {job_id: employer_id for job_id, employer_id, _ in batch}
+        if resolve is not None:
+            stats['applications'] += resolve(jobs, chunk_size, now)
+        for employer_id in set(jobs.values()):
+            invalidate_dashboard(employer_id)
+        invalidate_public_jobs()
+
+        watermark.last_id, _, watermark.position = batch[-1]
+        watermark.save(update_fields=['position', 'last_id', 'updated_at'])
+        stats['jobs'] += len(batch)
+        stats['batches'] += 1
+        if progress is not None:
+            progress(stats)
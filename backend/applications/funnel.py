@@ -0,0 +1,297 @@
+"""
+Hiring-funnel analytics.
+
+Every status change is appended to ApplicationStatusChange, and the daily
+rollups per job (JobDailyStats) and per employer (EmployerDailyStats) are
+incremented in the same transaction as the write they count: applications
+received, moves into each status, and a histogram of time-to-decision
+(applying to the first ACCEPTED/REJECTED). Funnel reads touch only the
+rollups; rebuild() recomputes an employer's rollups from the applications
+and the log, a job or a range of dates per transaction.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import connections, router, transaction
+from django.db.models import Exists, Max, Min, OuterRef, Sum
+from django.utils import timezone
+
+from jobs.models import Job
+from users.models import User
+from .models import Application, ApplicationStatusChange, EmployerDailyStats, JobDailyStats
+
+DECIDED = ('ACCEPTED', 'REJECTED')
+# Rollup column counting moves into each status
+STATUS_COLUMNS = {'NEW': 'reopened', 'REVIEWING': 'reviewing', 'ACCEPTED': 'accepted', 'REJECTED': 'rejected'}
+# Decision-time histogram: (upper bound in seconds, column); the last bucket is open-ended
+DECISION_BUCKETS = [
+    (60 * 60, 'decided_1h'),
+    (4 * 60 * 60, 'decided_4h'),
+    (24 * 60 * 60, 'decided_1d'),
+    (3 * 24 * 60 * 60, 'decided_3d'),
+    (7 * 24 * 60 * 60, 'decided_7d'),
+    (14 * 24 * 60 * 60, 'decided_14d'),
+    (30 * 24 * 60 * 60, 'decided_30d'),
+    (None, 'decided_later'),
+]
+COUNT_COLUMNS = ['received', *STATUS_COLUMNS.values(), *(column for _, column in DECISION_BUCKETS)]
+
+
+def _decision_column(seconds):
+    for bound, column in DECISION_BUCKETS:
+        if bound is None or seconds <= bound:
+            return column
+
+
+def _upsert(model, key_fields, conflict_fields, rows):
+    """
+    Add ``rows`` ({key values: Counter of COUNT_COLUMNS}) to ``model``'s rows,
+    creating missing ones: a multi-row INSERT ... ON CONFLICT DO UPDATE per batch.
+    """
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    keys = [model._meta.get_field(name) for name in key_fields]
+    columns = [quote(field.column) for field in keys] + [quote(column) for column in COUNT_COLUMNS]
+    conflict = ', '.join(quote(model._meta.get_field(name).column) for name in conflict_fields)
+    updates = ', '.join(
+        f'{quote(column)} = {table}.{quote(column)} + excluded.{quote(column)}' for column in COUNT_COLUMNS
+    )
+    row_sql = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    # SQLite caps parameters per statement; PostgreSQL's protocol caps them at 65535
+    batch_size = (connection.features.max_query_params or 65535) // len(columns)
+
+    items = list(rows.items())
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            params = []
+            for key, counts in batch:
+                params += [field.get_db_prep_value(value, connection) for field, value in zip(keys, key)]
+                params += [counts[column] for column in COUNT_COLUMNS]
+            cursor.execute(
+                f'INSERT INTO {table} ({", ".join(columns)}) VALUES {", ".join([row_sql] * len(batch))} '
+                f'ON CONFLICT ({conflict}) DO UPDATE SET {updates}',
+                params,
+            )
+
+
+class Tally:
+    """Rollup increments, keyed by (job_id, employer_id, date), written by save()"""
+
+    def __init__(self):
+        self.counts = defaultdict(Counter)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def received(self, job_id, employer_id, applied_at):
+        self.counts[job_id, employer_id, timezone.localdate(applied_at)]['received'] += 1
+
+    def transition(self, job_id, employer_id, from_status, to_status, applied_at, changed_at, decided_before=False):
+        """``decided_before``: the application was ACCEPTED/REJECTED earlier, so this is no first decision"""
+        counts = self.counts[job_id, employer_id, timezone.localdate(changed_at)]
+        counts[STATUS_COLUMNS[to_status]] += 1
+        if to_status in DECIDED and from_status not in DECIDED and not decided_before:
+            counts[_decision_column((changed_at - applied_at).total_seconds())] += 1
+
+    def save(self):
+        """Two statements (per job, per employer) however many rows changed"""
+        if not self.counts:
+            return
+        per_employer = defaultdict(Counter)
+        for (_, employer_id, date), counts in self.counts.items():
+            per_employer[employer_id, date].update(counts)
+        _upsert(JobDailyStats, ['job', 'employer', 'date'], ['job', 'date'], self.counts)
+        _upsert(EmployerDailyStats, ['employer', 'date'], ['employer', 'date'], per_employer)
+        self.counts.clear()
+
+
+def record_application(job_id, employer_id, applied_at):
+    """Count a new application; call inside the transaction that inserted it"""
+    tally = Tally()
+    tally.received(job_id, employer_id, applied_at)
+    tally.save()
+
+
+def decided_before():
+    """
+    Annotation for whether an Application was ACCEPTED/REJECTED before; read it
+    in the query that locks the applications passed to record_status_changes()
+    """
+    return Exists(ApplicationStatusChange.objects.filter(application_id=OuterRef('pk'), to_status__in=DECIDED))
+
+
+def record_status_changes(employer_id, applications, status, changed_at=None):
+    """
+    Log and count ``applications`` of ``employer_id``'s jobs moving to ``status``;
+    call inside the transaction that updated them. ``applications`` are
+    (id, job_id, seeker_id, previous_status, applied_at, decided_before) tuples,
+    see decided_before(); those already in ``status`` are skipped.
+    """
+    changed_at = changed_at or timezone.now()
+    changes, tally = [], Tally()
+    for pk, job_id, _, previous, applied_at, decided in applications:
+        if previous == status:
+            continue
+        changes.append(ApplicationStatusChange(
+            application_id=pk, from_status=previous, to_status=status, changed_at=changed_at
+        ))
+        tally.transition(job_id, employer_id, previous, status, applied_at, changed_at, decided)
+    if changes:
+        ApplicationStatusChange.objects.bulk_create(changes)
+        tally.save()
+
+
+def rebuild(employer_id, chunk_size=2000, days=31):
+    """
+    Recompute one employer's rollups from its applications and the status
+    log, reading ``chunk_size`` rows at a time: each job's rollups in a short
+    transaction of their own, then the employer's ``days`` dates at a time.
+    Returns (applications, status changes) counted.
+    """
+    received = transitions = 0
+    job_ids = list(Job.objects.filter(employer_id=employer_id).order_by('id').values_list('id', flat=True))
+    for job_id in job_ids:
+        counted = rebuild_job(job_id, employer_id, chunk_size)
+        received += counted[0]
+        transitions += counted[1]
+
+    bounds = [
+        model.objects.filter(employer_id=employer_id).aggregate(first=Min('date'), last=Max('date'))
+        for model in (JobDailyStats, EmployerDailyStats)
+    ]
+    dates = [bound[key] for bound in bounds for key in ('first', 'last') if bound[key] is not None]
+    if dates:
+        since, until = min(dates), max(dates)
+        while since <= until:
+            rebuild_employer_days(employer_id, since, min(since + timedelta(days=days - 1), until))
+            since += timedelta(days=days)
+    return received, transitions
+
+
+def rebuild_job(job_id, employer_id, chunk_size=2000):
+    """
+    Recompute one job's JobDailyStats. The job row is locked, which holds
+    back new applications and new rollup rows for it (their foreign keys
+    need a key-share lock on it); writes to its existing rollup rows wait on
+    the delete. Whatever commits after the recount is added on top by the
+    writer's own upsert. Returns (applications, status changes) counted.
+    """
+    with transaction.atomic():
+        if not Job.objects.select_for_update().filter(pk=job_id).exists():
+            return 0, 0
+        JobDailyStats.objects.filter(job_id=job_id).delete()
+
+        tally, received, transitions = Tally(), 0, 0
+        applications = Application.objects.filter(job_id=job_id).order_by().values_list('applied_at', flat=True)
+        for applied_at in applications.iterator(chunk_size):
+            tally.received(job_id, employer_id, applied_at)
+            received += 1
+        # In log order per application, so only its first decision is timed
+        changes = (
+            ApplicationStatusChange.objects.filter(application__job_id=job_id)
+            .order_by('application_id', 'changed_at', 'id')
+            .values_list('application_id', 'from_status', 'to_status', 'application__applied_at', 'changed_at')
+        )
+        decided = set()
+        for application_id, from_status, to_status, applied_at, changed_at in changes.iterator(chunk_size):
+            tally.transition(
+                job_id, employer_id, from_status, to_status, applied_at, changed_at, application_id in decided
+            )
+            if to_status in DECIDED:
+                decided.add(application_id)
+            transitions += 1
+        # At most one row per date, so one upsert however many applications
+        _upsert(JobDailyStats, ['job', 'employer', 'date'], ['job', 'date'], tally.counts)
+    return received, transitions
+
+
+def rebuild_employer_days(employer_id, since, until):
+    """
+    Recompute EmployerDailyStats for ``since``..``until`` by summing the job
+    rollups. The employer's user row is locked, which holds back new rollup
+    rows for it; as in rebuild_job(), later increments land on top.
+    """
+    with transaction.atomic():
+        User.objects.select_for_update().filter(pk=employer_id).exists()
+        dated = {'employer_id': employer_id, 'date__gte': since, 'date__lte': until}
+        EmployerDailyStats.objects.filter(**dated).delete()
+        sums = (
+            JobDailyStats.objects.filter(**dated)
+            .values('date')
+            .annotate(**{f'total_{column}': Sum(column) for column in COUNT_COLUMNS})
+            .order_by()
+        )
+        rows = {
+            (employer_id, row['date']): Counter({column: row[f'total_{column}'] for column in COUNT_COLUMNS})
+            for row in sums
+        }
+        if rows:
+            _upsert(EmployerDailyStats, ['employer', 'date'], ['employer', 'date'], rows)
+
+
+def median_decision_hours(counts):
+    """Median time-to-decision in hours, interpolated within its histogram bucket"""
+    total = sum(counts[column] for _, column in DECISION_BUCKETS)
+    if not total:
+        return None
+    seen, lower = 0, 0
+    for bound, column in DECISION_BUCKETS:
+        count = counts[column]
+        if count and seen + count >= total / 2:
+            if bound is None:
+                return round(lower / 3600, 1)
+            return round((lower + (bound - lower) * (total / 2 - seen) / count) / 3600, 1)
+        seen, lower = seen + count, bound
+
+
+def _summary(counts):
+    return {
+        'received': counts['received'],
+        'reviewing': counts['reviewing'],
+        'accepted': counts['accepted'],
+        'rejected': counts['rejected'],
+        'reopened': counts['reopened'],
+        'decisions': sum(counts[column] for _, column in DECISION_BUCKETS),
+        'median_hours_to_decision': median_decision_hours(counts),
+    }
+
+
+def get_funnel(employer_id, days):
+    """
+    Funnel over the last ``days`` days from the rollups alone: totals, one
+    entry per day and one per job with activity. Two queries.
+    """
+    today = timezone.localdate()
+    since = today - timedelta(days=days - 1)
+    daily_rows = (
+        EmployerDailyStats.objects.filter(employer_id=employer_id, date__gte=since)
+        .values('date', *COUNT_COLUMNS)
+    )
+    per_job_rows = (
+        JobDailyStats.objects.filter(employer_id=employer_id, date__gte=since)
+        .values('job_id')
+        .annotate(**{f'total_{column}': Sum(column) for column in COUNT_COLUMNS})
+        .order_by('job_id')
+    )
+
+    totals = Counter()
+    by_date = {}
+    for row in daily_rows:
+        by_date[row.pop('date')] = row
+        totals.update(row)
+    daily = [
+        {'date': day.isoformat(), **_summary(Counter(by_date.get(day, {})))}
+        for day in (since + timedelta(days=offset) for offset in range(days))
+    ]
+    per_job = [
+        {'job': row['job_id'], **_summary(Counter({column: row[f'total_{column}'] for column in COUNT_COLUMNS}))}
+        for row in per_job_rows
+    ]
+    return {
+        'window_days': days,
+        'totals': _summary(totals),
+        'daily': daily,
+        'per_job': per_job,
+    }
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from applications import events
+from users.models import User
+from users.tokens import stream_token
+
+
+def summarize(latencies):
+    latencies.sort()
+    return {
+        'delivered': len(latencies),
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+        'p95_ms': latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else 0.0,
+        'max_ms': latencies[-1] * 1000 if latencies else 0.0,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure event fan-out with many idle subscribers. By default the streams run in '
+        'this process against the configured broker, reporting memory per idle stream and '
+        'publish-to-delivery latency. With --url, opens SSE connections to a running ASGI '
+        'server instead:\n'
+        '  ASYNC_READ_VIEWS=True EVENTS_BROKER=applications.events.RedisBroker '
+        'uvicorn config.asgi:application --port 8001\n'
+        '  EVENTS_BROKER=applications.events.RedisBroker manage.py benchmark_events '
+        '--url http://127.0.0.1:8001 --connections 5000\n'
+        'Events are published from this process, so --url needs a broker shared with the '
+        'server, and tokens are minted here, so it must share its database and SECRET_KEY.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=1000,
+                            help='Idle streams to hold open (default 1000)')
+        parser.add_argument('--channels', type=int, default=0,
+                            help='Distinct channels the streams spread over (default: one per stream)')
+        parser.add_argument('--events', type=int, default=100, help='Events to publish (default 100)')
+        parser.add_argument('--interval', type=float, default=0.01,
+                            help='Seconds between published events (default 0.01)')
+        parser.add_argument('--url', help='Base URL of a running ASGI server to connect to')
+
+    def handle(self, *args, **options):
+        connections = options['connections']
+        channels = options['channels'] or connections
+        if connections < 1 or channels < 1:
+            raise CommandError('--connections and --channels must be positive')
+        if options['url']:
+            result = asyncio.run(self.run_http(options['url'], connections, channels, options))
+        else:
+            result = asyncio.run(self.run_local(connections, channels, options))
+        self.stdout.write(json.dumps(result, indent=2))
+
+    async def publish(self, channels, options):
+        """Publish timestamped events round-robin over the channels from a worker thread"""
+        broker = events.get_broker()
+
+        def publish_all():
+            for i in range(options['events']):
+                broker.publish(channels[i % len(channels)], {'type': 'benchmark', 'sent': time.time()})
+                time.sleep(options['interval'])
+
+        await asyncio.to_thread(publish_all)
+
+    async def run_local(self, connections, channels, options):
+        broker = events.get_broker()
+        names = [f'benchmark:{i}' for i in range(channels)]
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        subscriptions = [broker.subscribe([names[i % channels]]) for i in range(connections)]
+        per_stream = (tracemalloc.get_traced_memory()[0] - before) / connections
+        tracemalloc.stop()
+
+        latencies = []
+
+        async def drain(subscription):
+            while True:
+                event = await subscription.queue.get()
+                latencies.append(time.time() - event['sent'])
+
+        readers = [asyncio.create_task(drain(subscription)) for subscription in subscriptions]
+        try:
+            await self.publish(names, options)
+            await asyncio.sleep(0.5)
+        finally:
+            for reader in readers:
+                reader.cancel()
+            for subscription in subscriptions:
+                broker.unsubscribe(subscription)
+        return {
+            'mode': 'in-process',
+            'broker': type(broker).__name__,
+            'connections': connections,
+            'bytes_per_idle_stream': round(per_stream),
+            'expected': options['events'] * connections // channels,
+            **summarize(latencies),
+        }
+
+    async def run_http(self, url, connections, channels, options):
+        parts = urlsplit(url)
+        host, port = parts.hostname, parts.port or 80
+        path = parts.path.rstrip('/') + '/api/applications/events/'
+        users = await asyncio.to_thread(lambda: list(User.objects.filter(role='SEEKER').order_by('id')[:channels]))
+        if not users:
+            raise CommandError('No seekers; run seed_data first')
+        seekers = [user.pk for user in users]
+        tokens = await asyncio.to_thread(lambda: {user.pk: stream_token(user) for user in users})
+
+        latencies, failed = [], [0]
+        ready = asyncio.Semaphore(0)
+
+        async def listen(seeker_id):
+            connected = False
+            try:
+                reader, writer = await asyncio.open_connection(host, port)
+            except OSError:
+                failed[0] += 1
+                ready.release()
+                return
+            writer.write(
+                f'GET {path}?token={tokens[seeker_id]} HTTP/1.1\r\nHost: {host}\r\n'
+                'Accept: text/event-stream\r\n\r\n'.encode()
+            )
+            try:
+                status = int((await reader.readline()).split()[1])
+                while await reader.readline() not in (b'\r\n', b''):
+                    pass
+                if status != 200:
+                    raise ValueError(status)
+                connected = True
+                ready.release()
+                async for line in reader:
+                    if line.startswith(b'data: '):
+                        latencies.append(time.time() - json.loads(line[6:])['sent'])
+            except (OSError, ValueError, IndexError):
+                failed[0] += 1
+                if not connected:
+                    ready.release()
+            finally:
+                writer.close()
+
+        listeners = [asyncio.create_task(listen(seekers[i % len(seekers)])) for i in range(connections)]
+        opened = time.perf_counter()
+        for _ in range(connections):
+            await ready.acquire()
+        open_seconds = time.perf_counter() - opened
+        try:
+            await self.publish([events.seeker_channel(pk) for pk in seekers], options)
+            await asyncio.sleep(1)
+        finally:
+            for listener in listeners:
+                listener.cancel()
+        return {
+            'mode': 'http',
+            'connections': connections,
+            'failed': failed[0],
+            'open_seconds': round(open_seconds, 2),
+            'expected': options['events'] * connections // len(seekers),
+            **summarize(latencies),
+        }
@@ -0,0 +1,75 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from applications import expiry
+
+
+class Command(BaseCommand):
+    help = (
+        'Sweep jobs whose deadline has passed since the last run: resolve their applications '
+        'still NEW (keep, reject or archive) and refresh the dashboards and public job caches. '
+        'Progress is kept in a watermark, so an interrupted sweep resumes where it stopped. '
+        'Run it from cron, or keep it running with --every.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--applications', choices=expiry.ACTIONS, default=settings.JOB_EXPIRY_APPLICATIONS,
+                            help='What to do with NEW applications (default JOB_EXPIRY_APPLICATIONS)')
+        parser.add_argument('--grace-days', type=int, default=settings.JOB_EXPIRY_GRACE_DAYS,
+                            help='Only sweep jobs whose deadline is this many days past (default JOB_EXPIRY_GRACE_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Jobs per batch; the watermark advances after each (default 500)')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Applications updated per transaction (default 1000)')
+        parser.add_argument('--since',
+                            help='Move the watermark to this deadline (ISO 8601) first; '
+                                 'the first sweep otherwise covers every job that ever expired')
+        parser.add_argument('--every', type=int,
+                            help='Keep running, sweeping again every this many seconds')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--batch-size and --chunk-size must be positive')
+        if options['grace_days'] < 0:
+            raise CommandError('--grace-days must not be negative')
+        if options['every'] is not None and options['every'] < 1:
+            raise CommandError('--every must be positive')
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None or since.tzinfo is None:
+                raise CommandError('--since must be an ISO 8601 datetime with a UTC offset')
+
+        while True:
+            self.run(options, since)
+            # --since only applies to the first sweep
+            since = None
+            if options['every'] is None:
+                return
+            time.sleep(options['every'])
+
+    def run(self, options, since):
+        start = time.perf_counter()
+
+        def progress(stats):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  batch {stats["batches"]}: {stats["jobs"]} jobs so far')
+
+        stats = expiry.sweep(
+            action=options['applications'],
+            grace=timedelta(days=options['grace_days']),
+            batch_size=options['batch_size'],
+            chunk_size=options['chunk_size'],
+            since=since,
+            progress=progress,
+        )
+        resolved = {'reject': 'rejected', 'archive': 'archived'}.get(options['applications'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Swept {stats["jobs"]} expired jobs in {stats["batches"]} batches'
+            + (f', {resolved} {stats["applications"]} NEW applications' if resolved else '')
+            + f' in {time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("applications", "0003_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="application",
+            index=models.Index(
+                fields=["job", "-applied_at"], name="applications_job_applied_idx"
+            ),
+        ),
+    ]
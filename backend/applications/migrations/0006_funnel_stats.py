@@ -0,0 +1,178 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0005_job_deadline_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("applications", "0005_application_seeker_applied_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmployerDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("received", models.PositiveIntegerField(default=0)),
+                ("reviewing", models.PositiveIntegerField(default=0)),
+                ("accepted", models.PositiveIntegerField(default=0)),
+                ("rejected", models.PositiveIntegerField(default=0)),
+                ("reopened", models.PositiveIntegerField(default=0)),
+                ("decided_1h", models.PositiveIntegerField(default=0)),
+                ("decided_4h", models.PositiveIntegerField(default=0)),
+                ("decided_1d", models.PositiveIntegerField(default=0)),
+                ("decided_3d", models.PositiveIntegerField(default=0)),
+                ("decided_7d", models.PositiveIntegerField(default=0)),
+                ("decided_14d", models.PositiveIntegerField(default=0)),
+                ("decided_30d", models.PositiveIntegerField(default=0)),
+                ("decided_later", models.PositiveIntegerField(default=0)),
+                (
+                    "employer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "employer_daily_stats",
+            },
+        ),
+        migrations.CreateModel(
+            name="ApplicationStatusChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "from_status",
+                    models.CharField(
+                        choices=[
+                            ("NEW", "New"),
+                            ("REVIEWING", "Reviewing"),
+                            ("ACCEPTED", "Accepted"),
+                            ("REJECTED", "Rejected"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "to_status",
+                    models.CharField(
+                        choices=[
+                            ("NEW", "New"),
+                            ("REVIEWING", "Reviewing"),
+                            ("ACCEPTED", "Accepted"),
+                            ("REJECTED", "Rejected"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("changed_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "application",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="status_changes",
+                        to="applications.application",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "application_status_changes",
+                "ordering": ["changed_at", "id"],
+            },
+        ),
+        migrations.CreateModel(
+            name="JobDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("received", models.PositiveIntegerField(default=0)),
+                ("reviewing", models.PositiveIntegerField(default=0)),
+                ("accepted", models.PositiveIntegerField(default=0)),
+                ("rejected", models.PositiveIntegerField(default=0)),
+                ("reopened", models.PositiveIntegerField(default=0)),
+                ("decided_1h", models.PositiveIntegerField(default=0)),
+                ("decided_4h", models.PositiveIntegerField(default=0)),
+                ("decided_1d", models.PositiveIntegerField(default=0)),
+                ("decided_3d", models.PositiveIntegerField(default=0)),
+                ("decided_7d", models.PositiveIntegerField(default=0)),
+                ("decided_14d", models.PositiveIntegerField(default=0)),
+                ("decided_30d", models.PositiveIntegerField(default=0)),
+                ("decided_later", models.PositiveIntegerField(default=0)),
+                (
+                    "employer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="jobs.job",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "job_daily_stats",
+                "indexes": [
+                    models.Index(
+                        fields=["employer", "date"], name="job_daily_stats_employer_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="jobdailystats",
+            constraint=models.UniqueConstraint(
+                fields=("job", "date"), name="job_daily_stats_unique"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="employerdailystats",
+            constraint=models.UniqueConstraint(
+                fields=("employer", "date"), name="employer_daily_stats_unique"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="applicationstatuschange",
+            index=models.Index(
+                fields=["application", "changed_at"], name="status_changes_app_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0006_funnel_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SweepWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("position", models.DateTimeField()),
+                ("last_id", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "sweep_watermarks",
+            },
+        ),
+        migrations.AddField(
+            model_name="application",
+            name="archived_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
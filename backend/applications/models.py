@@ -1,8 +1,57 @@
-from django.db import models
+from django.db import connections, models, router
+from django.utils import timezone
 from users.models import User
 from jobs.models import Job
 
 
+class ApplicationQuerySet(models.QuerySet):
+    def apply(self, job_id, seeker_id, resume_url, now=None):
+        """
+        Insert an application in a single statement, only if the job exists
+        and is still open. Duplicates hit ON CONFLICT DO NOTHING instead of a
+        failed insert. Returns the new row (ApplicationRowSerializer lookups)
+        or None if nothing was inserted.
+        """
+        now = now or timezone.now()
+        connection = connections[router.db_for_write(self.model)]
+        quote = connection.ops.quote_name
+        applications, jobs, users = (
+            quote(model._meta.db_table) for model in (self.model, Job, User)
+        )
+        status = self.model._meta.get_field('status').get_default()
+        timestamp = connection.ops.adapt_datetimefield_value(now)
+        sql = (
+            f'INSERT INTO {applications} (job_id, seeker_id, resume_url, status, applied_at) '
+            f'SELECT id, %s, %s, %s, %s FROM {jobs} WHERE id = %s AND application_deadline >= %s '
+            f'ON CONFLICT (job_id, seeker_id) DO NOTHING '
+            f'RETURNING id, '
+            f'(SELECT title FROM {jobs} WHERE {jobs}.id = {applications}.job_id), '
+            f'(SELECT employer_id FROM {jobs} WHERE {jobs}.id = {applications}.job_id), '
+            f'(SELECT full_name FROM {users} WHERE {users}.id = {applications}.seeker_id), '
+            f'(SELECT email FROM {users} WHERE {users}.id = {applications}.seeker_id)'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [seeker_id, resume_url, status, timestamp, job_id, timestamp])
+            inserted = cursor.fetchone()
+        if inserted is None:
+            return None
+
+        pk, title, employer_id, full_name, email = inserted
+        return {
+            'id': pk,
+            'job_id': job_id,
+            'job__title': title,
+            'job__employer_id': employer_id,
+            'seeker_id': seeker_id,
+            'seeker__full_name': full_name,
+            'seeker__email': email,
+            'resume_url': resume_url,
+            'status': status,
+            'applied_at': now,
+            'archived_at': None,
+        }
+
+
 class Application(models.Model):
     STATUS_CHOICES = [
         ('NEW', 'New'),
@@ -16,12 +65,108 @@ class Application(models.Model):
     resume_url = models.CharField(max_length=500)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='NEW')
     applied_at = models.DateTimeField(auto_now_add=True)
+    # Set by the deadline-expiry sweep on applications left NEW (see applications.expiry)
+    archived_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ApplicationQuerySet.as_manager()
 
     class Meta:
         db_table = 'applications'
         ordering = ['-applied_at']
         # Constraint: A seeker can apply only once per job
         unique_together = ['job', 'seeker']
+        indexes = [
+            # Paginated applicant lists and exports per job
+            models.Index(fields=['job', '-applied_at'], name='applications_job_applied_idx'),
+            # A seeker's own application history
+            models.Index(fields=['seeker', '-applied_at'], name='applications_seeker_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.seeker.email} - {self.job.title}"
+
+class ApplicationStatusChange(models.Model):
+    """Append-only log of application status changes; written with the change itself"""
+    application = models.ForeignKey(Application, on_delete=models.CASCADE, related_name='status_changes')
+    from_status = models.CharField(max_length=20, choices=Application.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Application.STATUS_CHOICES)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'application_status_changes'
+        ordering = ['changed_at', 'id']
+        indexes = [
+            # An application's history
+            models.Index(fields=['application', 'changed_at'], name='status_changes_app_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.application_id}: {self.from_status} -> {self.to_status}"
+
+
+class DailyStats(models.Model):
+    """
+    One day of hiring-funnel counts (see applications.funnel). Status
+    columns count moves into that status on the day; decided_* columns are
+    a histogram of time from applying to the first accept/reject.
+    """
+    date = models.DateField()
+    received = models.PositiveIntegerField(default=0)
+    reviewing = models.PositiveIntegerField(default=0)
+    accepted = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    # Moved back to NEW
+    reopened = models.PositiveIntegerField(default=0)
+    decided_1h = models.PositiveIntegerField(default=0)
+    decided_4h = models.PositiveIntegerField(default=0)
+    decided_1d = models.PositiveIntegerField(default=0)
+    decided_3d = models.PositiveIntegerField(default=0)
+    decided_7d = models.PositiveIntegerField(default=0)
+    decided_14d = models.PositiveIntegerField(default=0)
+    decided_30d = models.PositiveIntegerField(default=0)
+    decided_later = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class JobDailyStats(DailyStats):
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='daily_stats')
+    # Copied from the job so an employer's per-job funnel reads only this table
+    employer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        db_table = 'job_daily_stats'
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'date'], name='job_daily_stats_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['employer', 'date'], name='job_daily_stats_employer_idx'),
+        ]
+
+
+class EmployerDailyStats(DailyStats):
+    employer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_stats')
+
+    class Meta:
+        db_table = 'employer_daily_stats'
+        constraints = [
+            models.UniqueConstraint(fields=['employer', 'date'], name='employer_daily_stats_unique'),
+        ]
+
+
+class SweepWatermark(models.Model):
+    """
+    How far a restartable sweep has got, as a (position, last_id) keyset
+    cursor; see applications.expiry.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    position = models.DateTimeField()
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'sweep_watermarks'
 
     def __str__(self):
-        return f"{self.seeker.email} - {self.job.title}"
\ No newline at end of file
+        return f"{self.name}: {self.position} #{self.last_id}"
@@ -0,0 +1,11 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+from jobs.pagination import AsyncCursorPaginationMixin
+
+
+class ApplicationCursorPagination(AsyncCursorPaginationMixin, CursorPagination):
+    """Keyset pagination for application lists, most recent first"""
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    ordering = ('-applied_at', 'id')
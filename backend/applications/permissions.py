@@ -22,4 +22,4 @@ class IsJobEmployer(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         # For Application objects, check if user owns the job
-        return obj.job.employer == request.user
\ No newline at end of file
+        return obj.job.employer_id == request.user.pk
\ No newline at end of file
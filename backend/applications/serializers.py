@@ -1,8 +1,10 @@
+from django.conf import settings
 from rest_framework import serializers
+from jobs.serializers import RowSerializer, SparseFieldsMixin
 from .models import Application
 
 
-class ApplicationSerializer(serializers.ModelSerializer):
+class ApplicationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # Expose flat fields instead of nested objects
     seeker_name = serializers.CharField(source='seeker.full_name', read_only=True)
     seeker_email = serializers.CharField(source='seeker.email', read_only=True)
@@ -20,8 +22,27 @@ class ApplicationSerializer(serializers.ModelSerializer):
             'resume_url',
             'status',
             'applied_at',
+            'archived_at',
         ]
-        read_only_fields = ['id', 'seeker', 'applied_at', 'status']
+        read_only_fields = ['id', 'seeker', 'applied_at', 'status', 'archived_at']
+
+
+class MyApplicationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Seeker's own application history: just what the list shows"""
+    job_title = serializers.CharField(source='job.title', read_only=True)
+
+    class Meta:
+        model = Application
+        fields = [
+            'id',
+            'job',
+            'job_title',
+            'resume_url',
+            'status',
+            'applied_at',
+            'archived_at',
+        ]
+        read_only_fields = fields
 
 
 class ApplicationStatusSerializer(serializers.ModelSerializer):
@@ -35,4 +56,65 @@ class ApplicationStatusSerializer(serializers.ModelSerializer):
     def validate_status(self, value):
         if value not in ['NEW', 'REVIEWING', 'ACCEPTED', 'REJECTED']:
             raise serializers.ValidationError("Invalid status")
-        return value
\ No newline at end of file
+        return value
+
+
+class BulkApplicationStatusSerializer(serializers.Serializer):
+    """
+    Bulk status change: target either explicit application ids, or every
+    application of one job currently in a given status.
+    """
+    status = serializers.ChoiceField(choices=Application.STATUS_CHOICES)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=settings.BULK_STATUS_MAX_IDS,
+    )
+    job = serializers.IntegerField(required=False, min_value=1)
+    current_status = serializers.ChoiceField(choices=Application.STATUS_CHOICES, required=False)
+
+    def validate(self, attrs):
+        has_ids = 'ids' in attrs
+        has_filter = 'job' in attrs
+        if has_ids == has_filter:
+            raise serializers.ValidationError("Provide either ids or job (with optional current_status)")
+        if 'current_status' in attrs and not has_filter:
+            raise serializers.ValidationError("current_status is only valid together with job")
+        return attrs
+
+
+
+class ApplicationRowSerializer(RowSerializer):
+    """Row counterpart of ApplicationSerializer"""
+    fields = {
+        'id': 'id',
+        'job': 'job_id',
+        'job_title': 'job__title',
+        'seeker': 'seeker_id',
+        'seeker_name': 'seeker__full_name',
+        'seeker_email': 'seeker__email',
+        'resume_url': 'resume_url',
+        'status': 'status',
+        'applied_at': 'applied_at',
+        'archived_at': 'archived_at',
+    }
+
+    def convert_applied_at(self, value):
+        return self.datetime(value)
+
+    def convert_archived_at(self, value):
+        return self.datetime(value)
+
+
+class MyApplicationRowSerializer(ApplicationRowSerializer):
+    """Row counterpart of MyApplicationSerializer"""
+    fields = {
+        'id': 'id',
+        'job': 'job_id',
+        'job_title': 'job__title',
+        'resume_url': 'resume_url',
+        'status': 'status',
+        'applied_at': 'applied_at',
+        'archived_at': 'archived_at',
+    }
@@ -1,3 +1,389 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError
+from django.test import AsyncRequestFactory, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from config.testing import QueryBudgetTestCase, access_token
+from users.tokens import StreamToken
+from . import events, expiry, funnel, views
+from .models import Application, ApplicationStatusChange, EmployerDailyStats
+
+
+class ApplicationQueryBudgetTests(QueryBudgetTestCase):
+    """Query budgets for applications.urls; list endpoints must not grow with the data"""
+
+    def setUp(self):
+        super().setUp()
+        self.jobs = self.create_jobs(self.employer, 3)
+        self.applications = self.create_applications(self.jobs[:2], self.seekers)
+
+    def grow(self):
+        jobs = self.create_jobs(self.employer, 10)
+        seekers = [self.create_user('SEEKER') for _ in range(5)]
+        self.create_applications(jobs + self.jobs[2:], self.seekers + seekers)
+
+    def test_apply_for_job(self):
+        self.login(self.seekers[0])
+        data = {'job': self.jobs[2].pk, 'resume_url': 'https://example.com/cv.pdf'}
+        # The insert and the two funnel rollups, in one transaction (a savepoint here)
+        response = self.assertQueryBudget(5, 'post', '/api/applications/apply/', data=data)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['job_title'], self.jobs[2].title)
+        self.assertEqual(response.data['seeker_email'], self.seekers[0].email)
+
+        # A duplicate is not a failed insert, plus one query to explain the refusal
+        response = self.assertQueryBudget(4, 'post', '/api/applications/apply/', data=data)
+        self.assertEqual(response.data, {'error': 'You have already applied for this job'})
+
+    def test_apply_for_closed_or_missing_job(self):
+        self.login(self.seekers[0])
+        closed = self.create_jobs(self.employer, 1, open=False)[0]
+        response = self.client.post('/api/applications/apply/', {'job': closed.pk, 'resume_url': 'cv'})
+        self.assertEqual(response.data, {'error': 'This job is no longer accepting applications'})
+        response = self.client.post('/api/applications/apply/', {'job': closed.pk + 1000, 'resume_url': 'cv'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_apply_idempotency_key(self):
+        self.login(self.seekers[0])
+        data = {'job': self.jobs[2].pk, 'resume_url': 'https://example.com/cv.pdf'}
+        first = self.client.post('/api/applications/apply/', data, HTTP_IDEMPOTENCY_KEY='retry-1')
+        with self.assertNumQueries(0):
+            retry = self.client.post('/api/applications/apply/', data, HTTP_IDEMPOTENCY_KEY='retry-1')
+        self.assertEqual((retry.status_code, retry.data), (first.status_code, first.data))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+
+        data['resume_url'] = 'https://example.com/other.pdf'
+        response = self.client.post('/api/applications/apply/', data, HTTP_IDEMPOTENCY_KEY='retry-1')
+        self.assertEqual(response.status_code, 422)
+
+    def test_my_applications(self):
+        self.login(self.seekers[0])
+        self.assertQueryBudget(1, 'get', '/api/applications/my-applications/')
+        self.assertConstantQueries('get', '/api/applications/my-applications/', self.grow)
+
+    def test_job_applications(self):
+        self.login(self.employer)
+        url = f'/api/applications/job/{self.jobs[2].pk}/'
+        self.assertQueryBudget(2, 'get', url)
+        self.assertConstantQueries('get', url, self.grow)
+
+    def test_export_job_applications(self):
+        self.login(self.employer)
+        response = self.client.get(f'/api/applications/job/{self.jobs[0].pk}/export/')
+        with self.assertNumQueries(1):
+            body = b''.join(response.streaming_content)
+        self.assertEqual(len(body.splitlines()), 4)
+
+    def test_update_application_status(self):
+        self.login(self.employer)
+        # Locked read and update, then the status log and the two funnel rollups
+        self.assertQueryBudget(
+            7, 'patch', f'/api/applications/{self.applications[0].pk}/status/', data={'status': 'REVIEWING'}
+        )
+
+    def test_bulk_update_application_status(self):
+        self.login(self.employer)
+        ids = [application.pk for application in self.applications]
+        response = self.assertQueryBudget(
+            7, 'patch', '/api/applications/status/bulk/', data={'status': 'REJECTED', 'ids': ids}, format='json'
+        )
+        self.assertEqual(response.data['updated'], len(ids))
+
+    def test_bulk_update_application_status_results(self):
+        other_job = self.create_jobs(self.create_user('EMPLOYER'), 1)
+        other = self.create_applications(other_job, self.seekers[:1])[0]
+        own = self.applications[0]
+        self.login(self.employer)
+        response = self.client.patch('/api/applications/status/bulk/', {
+            'status': 'REVIEWING', 'ids': [own.pk, other.pk, 999999, own.pk],
+        }, format='json')
+
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(response.data['results'], [
+            {'id': own.pk, 'result': 'updated'},
+            {'id': other.pk, 'result': 'forbidden'},
+            {'id': 999999, 'result': 'not_found'},
+        ])
+        statuses = dict(Application.objects.filter(pk__in=[own.pk, other.pk]).values_list('id', 'status'))
+        self.assertEqual(statuses, {own.pk: 'REVIEWING', other.pk: 'NEW'})
+
+    def test_bulk_update_application_status_by_job(self):
+        job = self.jobs[0]
+        reviewing = Application.objects.filter(job=job).order_by('id').first()
+        Application.objects.filter(pk=reviewing.pk).update(status='REVIEWING')
+        self.login(self.employer)
+        response = self.client.patch('/api/applications/status/bulk/', {
+            'status': 'REJECTED', 'job': job.pk, 'current_status': 'NEW',
+        }, format='json')
+
+        self.assertEqual(response.data['updated'], len(self.seekers) - 1)
+        self.assertNotIn(reviewing.pk, [row['id'] for row in response.data['results']])
+        self.assertEqual(
+            sorted(Application.objects.filter(job=job).values_list('status', flat=True)),
+            ['REJECTED'] * (len(self.seekers) - 1) + ['REVIEWING'],
+        )
+        # Other jobs are untouched, and other employers' jobs are not found
+        self.assertFalse(Application.objects.filter(job=self.jobs[1]).exclude(status='NEW').exists())
+        other_job = self.create_jobs(self.create_user('EMPLOYER'), 1)[0]
+        response = self.client.patch(
+            '/api/applications/status/bulk/', {'status': 'REJECTED', 'job': other_job.pk}, format='json'
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_bulk_update_application_status_is_atomic(self):
+        self.login(self.employer)
+        ids = [application.pk for application in self.applications]
+        # The status log write fails after the UPDATE has run
+        with mock.patch.object(funnel, 'record_status_changes', side_effect=DatabaseError('log unavailable')):
+            with self.assertRaises(DatabaseError):
+                self.client.patch('/api/applications/status/bulk/', {'status': 'REJECTED', 'ids': ids}, format='json')
+        self.assertFalse(Application.objects.filter(pk__in=ids).exclude(status='NEW').exists())
+        self.assertFalse(ApplicationStatusChange.objects.exists())
+
+    def test_employer_dashboard(self):
+        self.login(self.employer)
+        self.assertQueryBudget(2, 'get', '/api/applications/employer/dashboard/')
+        self.assertConstantQueries('get', '/api/applications/employer/dashboard/', self.grow)
+
+    def test_employer_dashboard_contents(self):
+        now = timezone.now()
+        closed = self.create_jobs(self.employer, 1, open=False)[0]
+        self.create_applications([closed], self.seekers[:1], status='ACCEPTED')
+        Application.objects.filter(pk=self.applications[0].pk).update(status='REJECTED', applied_at=now - timedelta(days=3))
+        # Outside a 7-day window, but still in the totals
+        Application.objects.filter(pk=self.applications[1].pk).update(applied_at=now - timedelta(days=10))
+        # Another employer's applications are not counted
+        self.create_applications(self.create_jobs(self.create_user('EMPLOYER'), 1), self.seekers)
+
+        self.login(self.employer)
+        data = self.client.get('/api/applications/employer/dashboard/?days=7').data
+        self.assertEqual((data['jobs'], data['applications'], data['accepted'], data['rejected']), (4, 7, 1, 1))
+        self.assertEqual(data['status_counts'], {'NEW': 5, 'REVIEWING': 0, 'ACCEPTED': 1, 'REJECTED': 1})
+        self.assertEqual({row['id']: (row['status'], row['applications']) for row in data['per_job']}, {
+            self.jobs[0].pk: ('Open', 3),
+            self.jobs[1].pk: ('Open', 3),
+            self.jobs[2].pk: ('Open', 0),
+            closed.pk: ('Closed', 1),
+        })
+        by_id = {row['id']: row['status_counts'] for row in data['per_job']}
+        self.assertEqual(by_id[closed.pk], {'NEW': 0, 'REVIEWING': 0, 'ACCEPTED': 1, 'REJECTED': 0})
+        self.assertEqual(by_id[self.jobs[0].pk], {'NEW': 2, 'REVIEWING': 0, 'ACCEPTED': 0, 'REJECTED': 1})
+
+        self.assertEqual(data['window_days'], 7)
+        today = timezone.localdate(now)
+        self.assertEqual([row['date'] for row in data['daily']], [
+            (today - timedelta(days=offset)).isoformat() for offset in range(6, -1, -1)
+        ])
+        self.assertEqual([row['applications'] for row in data['daily']], [0, 0, 0, 1, 0, 0, 5])
+
+        self.assertEqual(len(self.client.get('/api/applications/employer/dashboard/').data['daily']), 30)
+        for days in ('0', '366', 'week'):
+            with self.subTest(days=days):
+                response = self.client.get(f'/api/applications/employer/dashboard/?days={days}')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data, {'error': 'days must be between 1 and 365'})
+
+    def test_employer_dashboard_invalidated_by_writes(self):
+        url = '/api/applications/employer/dashboard/'
+        self.login(self.employer)
+        self.assertEqual(self.client.get(url).data['applications'], 6)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        self.login(self.create_user('SEEKER'))
+        self.client.post('/api/applications/apply/', {'job': self.jobs[2].pk, 'resume_url': 'https://example.com/cv.pdf'})
+        self.login(self.employer)
+        data = self.client.get(url).data
+        self.assertEqual((data['applications'], data['daily'][-1]['applications']), (7, 7))
+
+        self.client.patch(f'/api/applications/{self.applications[0].pk}/status/', {'status': 'ACCEPTED'})
+        self.assertEqual(self.client.get(url).data['status_counts']['ACCEPTED'], 1)
+
+    def test_employer_funnel(self):
+        self.login(self.create_user('SEEKER'))
+        self.client.post('/api/applications/apply/', {'job': self.jobs[2].pk, 'resume_url': 'cv'})
+        self.login(self.employer)
+        ids = [application.pk for application in self.applications[:3]]
+        self.client.patch('/api/applications/status/bulk/', {'status': 'REVIEWING', 'ids': ids}, format='json')
+        self.client.patch(f'/api/applications/{ids[0]}/status/', {'status': 'ACCEPTED'})
+        # Unchanged statuses are not logged
+        self.client.patch(f'/api/applications/{ids[0]}/status/', {'status': 'ACCEPTED'})
+        # Reopened and decided again: counted as moves, but only the first decision is timed
+        for pk, statuses in ((ids[0], ['NEW', 'ACCEPTED']), (ids[1], ['REJECTED', 'REVIEWING', 'REJECTED'])):
+            for new_status in statuses:
+                self.client.patch(f'/api/applications/{pk}/status/', {'status': new_status})
+
+        response = self.assertQueryBudget(2, 'get', '/api/applications/employer/funnel/?days=7')
+        totals = response.data['totals']
+        self.assertEqual(
+            [totals[key] for key in ('received', 'reviewing', 'accepted', 'rejected', 'reopened')], [1, 4, 2, 2, 1]
+        )
+        self.assertEqual(totals['decisions'], 2)
+        self.assertEqual(response.data['daily'][-1]['reviewing'], 4)
+        self.assertEqual({row['job']: row['received'] for row in response.data['per_job']}, {
+            self.jobs[0].pk: 0, self.jobs[2].pk: 1
+        })
+
+        # A rebuild from the applications and the log also counts the fixture rows,
+        # and drops employer totals no job rollup backs
+        stale = EmployerDailyStats.objects.create(
+            employer=self.employer, date=timezone.localdate() - timedelta(days=40), received=5
+        )
+        funnel.rebuild(self.employer.pk, days=7)
+        self.assertFalse(EmployerDailyStats.objects.filter(pk=stale.pk).exists())
+        rebuilt = self.client.get('/api/applications/employer/funnel/?days=7')
+        self.assertEqual(rebuilt.data['totals']['received'], len(self.applications) + 1)
+        self.assertEqual({**rebuilt.data['totals'], 'received': 1}, totals)
+
+        self.assertConstantQueries('get', '/api/applications/employer/funnel/', self.grow)
+
+    def test_expiry_sweep(self):
+        closed = self.create_jobs(self.employer, 3, open=False)
+        applications = self.create_applications(closed, self.seekers)
+        Application.objects.filter(pk=applications[0].pk).update(status='REVIEWING')
+
+        stats = expiry.sweep('reject', batch_size=2, chunk_size=2)
+        self.assertEqual((stats['jobs'], stats['batches'], stats['applications']), (3, 2, 8))
+        statuses = Application.objects.filter(job__in=closed).values_list('status', flat=True)
+        self.assertEqual(sorted(statuses), ['REJECTED'] * 8 + ['REVIEWING'])
+        self.assertEqual(ApplicationStatusChange.objects.filter(to_status='REJECTED').count(), 8)
+        # Open jobs' applications are untouched
+        self.assertFalse(Application.objects.filter(job__in=self.jobs).exclude(status='NEW').exists())
+
+        # The watermark is past every expired job: the next sweep reads it and one empty batch
+        with self.assertNumQueries(2):
+            self.assertEqual(expiry.sweep('reject')['jobs'], 0)
+
+
+@override_settings(EVENTS_BROKER='applications.events.InProcessBroker', EVENTS_HEARTBEAT=0.05, EVENTS_MAX_AGE=5)
+class ApplicationEventsTests(QueryBudgetTestCase):
+    """The events stream, called directly since it is only routed with ASYNC_READ_VIEWS"""
+
+    def setUp(self):
+        super().setUp()
+        events.get_broker.cache_clear()
+        self.addCleanup(events.get_broker.cache_clear)
+        self.job = self.create_jobs(self.employer, 1)[0]
+
+    def stream_token(self, user):
+        request = APIRequestFactory().post('/', HTTP_AUTHORIZATION=f'Bearer {access_token(user)}')
+        response = views.application_events_token(request)
+        self.assertEqual(response.status_code, 200)
+        return response.data['token']
+
+    async def open_stream(self, token):
+        response = await views.application_events(AsyncRequestFactory().get('/', {'token': token}))
+        if response.status_code == 200:
+            response.chunks = aiter(response.streaming_content)
+            self.assertTrue((await anext(response.chunks)).startswith(b'retry: '))
+        return response
+
+    def apply(self, seeker):
+        self.login(seeker)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/applications/apply/', {'job': self.job.pk, 'resume_url': 'https://example.com/cv.pdf'}
+            )
+        self.assertEqual(response.status_code, 201)
+
+    async def test_stream_token_only_opens_streams(self):
+        token = await sync_to_async(self.stream_token)(self.employer)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = await sync_to_async(self.client.get)('/api/applications/employer/dashboard/')
+        self.assertEqual(response.status_code, 401)
+        # Long-lived access tokens, expired and malformed stream tokens are refused in the URL
+        with self.settings(EVENTS_TOKEN_LIFETIME=-1):
+            expired = str(StreamToken.for_user(self.employer))
+        for name, token in (('access', access_token(self.employer)), ('expired', expired), ('malformed', 'garbage')):
+            with self.subTest(name):
+                self.assertEqual((await self.open_stream(token)).status_code, 401)
+
+    async def test_events_reach_only_their_employer(self):
+        other_employer = await sync_to_async(self.create_user)('EMPLOYER')
+        own = await self.open_stream(await sync_to_async(self.stream_token)(self.employer))
+        other = await self.open_stream(await sync_to_async(self.stream_token)(other_employer))
+        await sync_to_async(self.apply)(self.seekers[0])
+
+        event = await anext(own.chunks)
+        self.assertTrue(event.startswith(b'event: application.created\n'))
+        self.assertEqual(json.loads(event.split(b'data: ', 1)[1])['seeker'], self.seekers[0].pk)
+        self.assertEqual(await anext(other.chunks), b': ping\n\n')
+
+    async def test_stream_heartbeat_and_max_age(self):
+        with self.settings(EVENTS_MAX_AGE=0.3):
+            response = await self.open_stream(await sync_to_async(self.stream_token)(self.seekers[0]))
+            chunks = [chunk async for chunk in response.chunks]
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(set(chunks), {b': ping\n\n'})
+        # Ending the stream drops its subscription
+        self.assertFalse(events.get_broker()._subscriptions)
+
+
+class AsyncReadViewTests(QueryBudgetTestCase):
+    """The async read views must answer like the sync ones, cursors and permissions included"""
+
+    def setUp(self):
+        super().setUp()
+        self.jobs = self.create_jobs(self.employer, 5)
+        self.seekers += [self.create_user('SEEKER') for _ in range(2)]
+        self.create_applications(self.jobs, self.seekers[:1])
+        self.create_applications(self.jobs[:1], self.seekers[1:])
+        Application.objects.filter(job=self.jobs[1]).update(status='REVIEWING')
+
+    def test_my_applications(self):
+        seeker = self.seekers[0]
+        forwards, backwards = self.walk_pages(
+            views.my_applications, views.my_applications_async, '/api/applications/my-applications/',
+            seeker, {'page_size': 2},
+        )
+        self.assertEqual([len(page) for page in forwards], [2, 2, 1])
+        self.assertEqual(backwards, forwards[::-1])
+
+        body = self.assertSameAsSync(
+            views.my_applications, views.my_applications_async, '/api/applications/my-applications/',
+            seeker, {'status': 'REVIEWING'},
+        )
+        self.assertEqual([row['job'] for row in body['results']], [self.jobs[1].pk])
+        for user in (None, self.employer):
+            with self.subTest(user=user):
+                self.assertSameAsSync(
+                    views.my_applications, views.my_applications_async, '/api/applications/my-applications/', user
+                )
+
+    def test_job_applications(self):
+        job_id = self.jobs[0].pk
+        forwards, backwards = self.walk_pages(
+            views.job_applications, views.job_applications_async, f'/api/applications/job/{job_id}/',
+            self.employer, {'page_size': 2}, job_id=job_id,
+        )
+        self.assertEqual([len(page) for page in forwards], [2, 2, 1])
+        self.assertEqual(backwards, forwards[::-1])
+
+        # Unauthenticated, a seeker, another employer's job and a missing job
+        for user, job_id in [
+            (None, job_id), (self.seekers[0], job_id), (self.create_user('EMPLOYER'), job_id), (self.employer, 0),
+        ]:
+            with self.subTest(user=user, job_id=job_id):
+                self.assertSameAsSync(
+                    views.job_applications, views.job_applications_async, f'/api/applications/job/{job_id}/',
+                    user, job_id=job_id,
+                )
+
+    def test_employer_dashboard(self):
+        for query in ({}, {'days': 7}, {'days': 0}, {'days': 'week'}):
+            with self.subTest(query=query):
+                self.assertSameAsSync(
+                    views.employer_dashboard, views.employer_dashboard_async, '/api/applications/employer/dashboard/',
+                    self.employer, query,
+                )
+        for user in (None, self.seekers[0]):
+            with self.subTest(user=user):
+                self.assertSameAsSync(
+                    views.employer_dashboard, views.employer_dashboard_async,
+                    '/api/applications/employer/dashboard/', user,
+                )
@@ -1,11 +1,31 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Async read views (see ASYNC_READ_VIEWS) share permissions and serializers with the sync ones
+if settings.ASYNC_READ_VIEWS:
+    job_applications = views.job_applications_async
+    employer_dashboard = views.employer_dashboard_async
+    my_applications = views.my_applications_async
+else:
+    job_applications = views.job_applications
+    employer_dashboard = views.employer_dashboard
+    my_applications = views.my_applications
+
 urlpatterns = [
     path('apply/', views.apply_for_job, name='apply-for-job'),
-    path('job/<int:job_id>/', views.job_applications, name='job-applications'),
+    path('job/<int:job_id>/', job_applications, name='job-applications'),
+    path('job/<int:job_id>/export/', views.export_job_applications, name='export-job-applications'),
     path('<int:pk>/status/', views.update_application_status, name='update-application-status'),
-    path('employer/dashboard/', views.employer_dashboard, name='employer-dashboard'),
-    path('my-applications/', views.my_applications, name='my-applications'),
+    path('status/bulk/', views.bulk_update_application_status, name='bulk-update-application-status'),
+    path('employer/dashboard/', employer_dashboard, name='employer-dashboard'),
+    path('employer/funnel/', views.employer_funnel, name='employer-funnel'),
+    path('my-applications/', my_applications, name='my-applications'),
+]
 
-]
\ No newline at end of file
+if settings.ASYNC_READ_VIEWS:
+    # Long-lived stream; only served under ASGI
+    urlpatterns += [
+        path('events/', views.application_events, name='application-events'),
+        path('events/token/', views.application_events_token, name='application-events-token'),
+    ]
\ No newline at end of file
@@ -1,17 +1,45 @@
+from django.conf import settings
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db import IntegrityError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from config.idempotency import idempotent
+from config.renderers import EventStreamRenderer, FastJSONRenderer
+from config.async_views import async_api_view
+from jobs.filters import parse_fields, InvalidFilter
 from jobs.models import Job
+from jobs.streaming import FORMATS, streaming_export
+from users.authentication import QueryTokenAuthentication
+from users.tokens import stream_token
 from .models import Application
-from .serializers import ApplicationSerializer, ApplicationStatusSerializer
+from .serializers import (
+    ApplicationSerializer,
+    ApplicationStatusSerializer,
+    BulkApplicationStatusSerializer,
+    MyApplicationSerializer,
+    ApplicationRowSerializer,
+    MyApplicationRowSerializer,
+)
 from .permissions import IsSeeker, IsJobEmployer
+from .pagination import ApplicationCursorPagination
+from . import events, funnel
+from .dashboard import DEFAULT_WINDOW_DAYS, MAX_WINDOW_DAYS, aget_dashboard, get_dashboard, invalidate_dashboard
 
 
 @api_view(['POST'])
 @permission_classes([IsSeeker])
+@idempotent
 def apply_for_job(request):
-    """Seeker applies for a job"""
+    """
+    Seeker applies for a job. The deadline check and the insert are one
+    statement, followed by the funnel rollups; a failed apply costs one more
+    query to explain why.
+    Retries carrying the same Idempotency-Key replay the first response.
+    """
     
     job_id = request.data.get('job')
     resume_url = request.data.get('resume_url')
@@ -21,70 +49,231 @@ def apply_for_job(request):
             {'error': 'job and resume_url are required'},
             status=status.HTTP_400_BAD_REQUEST
         )
-    
     try:
-        job = Job.objects.get(pk=job_id)
-    except Job.DoesNotExist:
-        return Response(
-            {'error': 'Job not found'},
-            status=status.HTTP_404_NOT_FOUND
-        )
-    
-    # Check if job is still open
-    if not job.is_open():
+        job_id = int(job_id)
+    except (TypeError, ValueError):
         return Response(
-            {'error': 'This job is no longer accepting applications'},
+            {'error': 'job must be a job id'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    try:
-        # Create application
-        application = Application.objects.create(
-            job=job,
-            seeker=request.user,
-            resume_url=resume_url
+    now = timezone.now()
+    with transaction.atomic():
+        row = Application.objects.apply(job_id, request.user.pk, resume_url, now=now)
+        if row is not None:
+            funnel.record_application(job_id, row['job__employer_id'], now)
+    if row is not None:
+        invalidate_dashboard(row['job__employer_id'])
+        data = ApplicationRowSerializer([row]).data[0]
+        events.publish_new_application(row['job__employer_id'], data)
+        return Response(data, status=status.HTTP_201_CREATED)
+    
+    job = (
+        Job.objects.filter(pk=job_id)
+        .with_status(now)
+        .annotate(applied=Exists(Application.objects.filter(job_id=OuterRef('pk'), seeker_id=request.user.pk)))
+        .values('is_open_now', 'applied')
+        .first()
+    )
+    if job is None:
+        return Response(
+            {'error': 'Job not found'},
+            status=status.HTTP_404_NOT_FOUND
         )
-        serializer = ApplicationSerializer(application)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
     
-    except IntegrityError:
-        # Duplicate application (unique constraint violation)
+    # Check if job is still open (evaluated by the database)
+    if not job['is_open_now']:
         return Response(
-            {'error': 'You have already applied for this job'},
+            {'error': 'This job is no longer accepting applications'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    # Duplicate application (unique constraint, resolved by ON CONFLICT DO NOTHING)
+    return Response(
+        {'error': 'You have already applied for this job'},
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+def _my_applications_rows(request):
+    """The seeker's applications as values() rows plus the requested fields; raises InvalidFilter"""
+    fields = parse_fields(request.query_params, MyApplicationSerializer.Meta.fields)
+    applications = Application.objects.filter(seeker_id=request.user.pk).values(
+        *MyApplicationRowSerializer.lookups(fields, always=('id', 'applied_at'))
+    )
+
+    status_filter = request.query_params.get('status')
+    if status_filter:
+        if status_filter not in dict(Application.STATUS_CHOICES):
+            raise InvalidFilter(f'Invalid status: {status_filter}')
+        applications = applications.filter(status=status_filter)
+    return applications, fields
+
+
 @api_view(['GET'])
 @permission_classes([IsSeeker])
 def my_applications(request):
-    """Get all applications for the current seeker"""
-    applications = Application.objects.filter(seeker=request.user).select_related('job')
-    serializer = ApplicationSerializer(applications, many=True)
-    return Response(serializer.data)
-
-@api_view(['GET'])
-@permission_classes([IsJobEmployer])
-def job_applications(request, job_id):
-    """Get all applications for a specific job (employer only)"""
+    """
+    Applications of the current seeker, cursor-paginated, optionally ?status= filtered
+    and narrowed with ?fields=/?exclude=. One query per page, reading only the
+    columns that are returned.
+    """
+    try:
+        applications, fields = _my_applications_rows(request)
+    except InvalidFilter as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
     
+    paginator = ApplicationCursorPagination()
+    page = paginator.paginate_queryset(applications, request)
+    serializer = MyApplicationRowSerializer(page, fields)
+    return paginator.get_paginated_response(serializer.data)
+
+
+@async_api_view([IsSeeker])
+async def my_applications_async(request):
+    """my_applications for ASGI deployments, using the async ORM"""
     try:
-        job = Job.objects.get(pk=job_id)
-    except Job.DoesNotExist:
-        return Response(
+        applications, fields = _my_applications_rows(request)
+    except InvalidFilter as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    paginator = ApplicationCursorPagination()
+    page = await paginator.apaginate_queryset(applications, request)
+    serializer = MyApplicationRowSerializer(page, fields)
+    return paginator.get_paginated_response(serializer.data)
+
+
+EXPORT_FIELDS = [
+    'id',
+    'job_id',
+    'job__title',
+    'seeker_id',
+    'seeker__full_name',
+    'seeker__email',
+    'resume_url',
+    'status',
+    'applied_at',
+]
+# Column names matching the ApplicationSerializer output
+EXPORT_HEADER = [
+    'id',
+    'job',
+    'job_title',
+    'seeker',
+    'seeker_name',
+    'seeker_email',
+    'resume_url',
+    'status',
+    'applied_at',
+]
+
+
+def _check_job_owner(request, job):
+    """Return (job, None) if the employer owns job, else (None, error response)"""
+    if job is None:
+        return None, Response(
             {'error': 'Job not found'},
             status=status.HTTP_404_NOT_FOUND
         )
     
     # Verify employer owns this job
-    if job.employer != request.user:
-        return Response(
+    if job.employer_id != request.user.pk:
+        return None, Response(
             {'error': 'You do not have permission to view these applications'},
             status=status.HTTP_403_FORBIDDEN
         )
+    return job, None
+
+
+def _get_owned_job(request, job_id):
+    """Return (job, None) if the employer owns job_id, else (None, error response)"""
+    try:
+        job = Job.objects.get(pk=job_id)
+    except Job.DoesNotExist:
+        job = None
+    return _check_job_owner(request, job)
+
+
+async def _aget_owned_job(request, job_id):
+    """Async _get_owned_job"""
+    try:
+        job = await Job.objects.aget(pk=job_id)
+    except Job.DoesNotExist:
+        job = None
+    return _check_job_owner(request, job)
+
+
+def _job_application_rows(job, fields):
+    # The cursor needs id and applied_at even when they are not displayed
+    return Application.objects.filter(job=job).values(
+        *ApplicationRowSerializer.lookups(fields, always=('id', 'applied_at'))
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsJobEmployer])
+def job_applications(request, job_id):
+    """
+    Get applications for a specific job (employer only), cursor-paginated,
+    with optional ?fields=/?exclude=
+    """
     
-    applications = Application.objects.filter(job=job).select_related('seeker', 'job')
-    serializer = ApplicationSerializer(applications, many=True)
-    return Response(serializer.data)
+    try:
+        fields = parse_fields(request.query_params, ApplicationSerializer.Meta.fields)
+    except InvalidFilter as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    job, error = _get_owned_job(request, job_id)
+    if error:
+        return error
+    
+    paginator = ApplicationCursorPagination()
+    page = paginator.paginate_queryset(_job_application_rows(job, fields), request)
+    serializer = ApplicationRowSerializer(page, fields)
+    return paginator.get_paginated_response(serializer.data)
+
+
+@async_api_view([IsJobEmployer])
+async def job_applications_async(request, job_id):
+    """job_applications for ASGI deployments, using the async ORM"""
+    try:
+        fields = parse_fields(request.query_params, ApplicationSerializer.Meta.fields)
+    except InvalidFilter as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    job, error = await _aget_owned_job(request, job_id)
+    if error:
+        return error
+
+    paginator = ApplicationCursorPagination()
+    page = await paginator.apaginate_queryset(_job_application_rows(job, fields), request)
+    serializer = ApplicationRowSerializer(page, fields)
+    return paginator.get_paginated_response(serializer.data)
+
+
+@api_view(['GET'])
+@permission_classes([IsJobEmployer])
+def export_job_applications(request, job_id):
+    """Stream every application for a job as ?file_format=csv (default) or ndjson"""
+    
+    job, error = _get_owned_job(request, job_id)
+    if error:
+        return error
+    
+    file_format = request.query_params.get('file_format', 'csv')
+    if file_format not in FORMATS:
+        return Response(
+            {'error': f'file_format must be one of: {", ".join(FORMATS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    rows = (
+        Application.objects.filter(job=job)
+        .order_by('-applied_at', 'id')
+        .values_list(*EXPORT_FIELDS)
+        .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    )
+    return streaming_export(EXPORT_HEADER, rows, file_format, f'job-{job.pk}-applications')
 
 
 @api_view(['PATCH'])
@@ -92,43 +281,198 @@ def job_applications(request, job_id):
 def update_application_status(request, pk):
     """Update application status (Accept/Reject)"""
     
+    with transaction.atomic():
+        try:
+            # Locked so the logged previous status is the one being replaced
+            application = (
+                Application.objects.select_for_update(of=('self',)).select_related('job')
+                .annotate(decided_before=funnel.decided_before()).get(pk=pk)
+            )
+        except Application.DoesNotExist:
+            return Response(
+                {'error': 'Application not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # Verify employer owns the job
+        if application.job.employer_id != request.user.pk:
+            return Response(
+                {'error': 'You do not have permission to modify this application'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        previous = application.status
+        serializer = ApplicationStatusSerializer(application, data=request.data, partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save()
+        funnel.record_status_changes(
+            request.user.pk,
+            [(
+                application.pk, application.job_id, application.seeker_id, previous,
+                application.applied_at, application.decided_before,
+            )],
+            application.status,
+        )
+
+    invalidate_dashboard(request.user.pk)
+    events.publish_status_changes(
+        [(application.pk, application.job_id, application.seeker_id)], application.status
+    )
+    return Response(serializer.data)
+
+
+
+@api_view(['PATCH'])
+@permission_classes([IsJobEmployer])
+def bulk_update_application_status(request):
+    """
+    Update many application statuses in one transaction and one UPDATE,
+    plus the status log and funnel rollups.
+    Body: {"status", "ids": [...]} or {"status", "job", "current_status"}
+    """
+    serializer = BulkApplicationStatusSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
+
+    with transaction.atomic():
+        if 'ids' in data:
+            requested_ids = list(dict.fromkeys(data['ids']))
+            # One query resolves existence and ownership for every id
+            found = {
+                row[0]: row
+                for row in Application.objects.select_for_update(of=('self',))
+                .filter(pk__in=requested_ids)
+                .annotate(decided_before=funnel.decided_before())
+                .values_list('id', 'job_id', 'seeker_id', 'status', 'applied_at', 'decided_before', 'job__employer_id')
+            }
+            results = {}
+            for application_id in requested_ids:
+                if application_id not in found:
+                    results[application_id] = 'not_found'
+                elif found[application_id][6] != request.user.pk:
+                    results[application_id] = 'forbidden'
+                else:
+                    results[application_id] = 'updated'
+            targets = [found[pk][:6] for pk, result in results.items() if result == 'updated']
+        else:
+            if not Job.objects.filter(pk=data['job'], employer_id=request.user.pk).exists():
+                return Response(
+                    {'error': 'Job not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            applications = Application.objects.filter(job_id=data['job'])
+            if 'current_status' in data:
+                applications = applications.filter(status=data['current_status'])
+            targets = list(
+                applications.select_for_update(of=('self',)).order_by()
+                .annotate(decided_before=funnel.decided_before())
+                .values_list('id', 'job_id', 'seeker_id', 'status', 'applied_at', 'decided_before')
+            )
+            results = {target[0]: 'updated' for target in targets}
+
+        updated = 0
+        if targets:
+            updated = Application.objects.filter(pk__in=[target[0] for target in targets]).update(status=data['status'])
+            # Only rows whose status actually changed are logged
+            funnel.record_status_changes(request.user.pk, targets, data['status'])
+            # Sent once the transaction commits
+            events.publish_status_changes([target[:3] for target in targets], data['status'])
+
+    if updated:
+        invalidate_dashboard(request.user.pk)
+
+    return Response({
+        'status': data['status'],
+        'updated': updated,
+        'results': [{'id': pk, 'result': result} for pk, result in results.items()],
+    })
+
+
+def _dashboard_days(request):
+    """?days= as an int within 1..MAX_WINDOW_DAYS, else None"""
     try:
-        application = Application.objects.select_related('job').get(pk=pk)
-    except Application.DoesNotExist:
+        days = int(request.query_params.get('days', DEFAULT_WINDOW_DAYS))
+    except ValueError:
+        return None
+    return days if 1 <= days <= MAX_WINDOW_DAYS else None
+
+
+@api_view(['GET'])
+@permission_classes([IsJobEmployer])
+def employer_dashboard(request):
+    """
+    Dashboard stats for employer: status totals, per-job breakdowns and
+    daily application counts over the last ?days= days (default 30)
+    """
+    days = _dashboard_days(request)
+    if days is None:
         return Response(
-            {'error': 'Application not found'},
-            status=status.HTTP_404_NOT_FOUND
+            {'error': f'days must be between 1 and {MAX_WINDOW_DAYS}'},
+            status=status.HTTP_400_BAD_REQUEST
         )
-    
-    # Verify employer owns the job
-    if application.job.employer != request.user:
+
+    return Response(get_dashboard(request.user.pk, days))
+
+
+@async_api_view([IsJobEmployer])
+async def employer_dashboard_async(request):
+    """employer_dashboard for ASGI deployments, using the async ORM and cache"""
+    days = _dashboard_days(request)
+    if days is None:
         return Response(
-            {'error': 'You do not have permission to modify this application'},
-            status=status.HTTP_403_FORBIDDEN
+            {'error': f'days must be between 1 and {MAX_WINDOW_DAYS}'},
+            status=status.HTTP_400_BAD_REQUEST
         )
-    
-    serializer = ApplicationStatusSerializer(application, data=request.data, partial=True)
-    if serializer.is_valid():
-        serializer.save()
-        return Response(serializer.data)
-    
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    return Response(await aget_dashboard(request.user.pk, days))
 
 
 @api_view(['GET'])
 @permission_classes([IsJobEmployer])
-def employer_dashboard(request):
-    """Dashboard stats for employer"""
-    
-    jobs = Job.objects.filter(employer=request.user)
-    applications = Application.objects.filter(job__employer=request.user)
-    
-    stats = {
-        'jobs': jobs.count(),
-        'applications': applications.count(),
-        'accepted': applications.filter(status='ACCEPTED').count(),
-        'rejected': applications.filter(status='REJECTED').count(),
-    }
-    
-    return Response(stats)
\ No newline at end of file
+def employer_funnel(request):
+    """
+    Hiring funnel for employer over the last ?days= days (default 30):
+    applications received, status moves and median time-to-decision,
+    in total, per day and per job. Reads only the daily rollups.
+    """
+    days = _dashboard_days(request)
+    if days is None:
+        return Response(
+            {'error': f'days must be between 1 and {MAX_WINDOW_DAYS}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response(funnel.get_funnel(request.user.pk, days))
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def application_events_token(request):
+    """
+    Stream token for opening application_events: valid for EVENTS_TOKEN_LIFETIME
+    seconds and for nothing else, so it can go in the URL.
+    """
+    return Response({'token': stream_token(request.user), 'expires_in': settings.EVENTS_TOKEN_LIFETIME})
+
+
+@async_api_view(
+    [IsAuthenticated],
+    authentication_classes=[QueryTokenAuthentication],
+    renderer_classes=[FastJSONRenderer, EventStreamRenderer],
+)
+async def application_events(request):
+    """
+    Server-Sent Events stream for the current user: status changes of a
+    seeker's applications, new applications to an employer's jobs.
+    EventSource clients pass a stream token from application_events_token as
+    ?token=, and fetch a new one before reconnecting. ASGI only.
+    """
+    response = StreamingHttpResponse(
+        events.stream(events.user_channels(request.user)), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
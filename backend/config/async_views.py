@@ -0,0 +1,83 @@
+"""
+async_api_view: the @api_view + @permission_classes pair for ``async def`` views.
+
+DRF 3.14 only dispatches synchronous views, so this runs the same request
+pipeline itself: DRF request wrapping, content negotiation, authentication,
+permission checks, exception handling and response finalization all come
+from a regular APIView configured with the given permission classes, so
+REST_FRAMEWORK settings apply unchanged. Authenticators that define
+``aauthenticate`` (see users.authentication) are awaited directly; others
+run in a worker thread. Only the view body, which should use the async ORM,
+runs natively on the event loop.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from rest_framework.views import APIView
+
+
+async def authenticate(request):
+    """Async counterpart of Request._authenticate: the first authenticator that succeeds wins"""
+    for authenticator in request.authenticators:
+        if hasattr(authenticator, 'aauthenticate'):
+            user_auth_tuple = await authenticator.aauthenticate(request)
+        else:
+            user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+        if user_auth_tuple is not None:
+            request._authenticator = authenticator
+            request.user, request.auth = user_auth_tuple
+            return
+
+    request._authenticator = None
+    request._not_authenticated()
+
+
+def async_api_view(permission_classes=None, authentication_classes=None, renderer_classes=None):
+    """
+    Decorate an ``async def view(request, ...)`` returning a DRF Response or a
+    streaming response (GET only). Omitted classes default to REST_FRAMEWORK's.
+    """
+
+    def decorator(view):
+        attrs = {
+            '__doc__': view.__doc__,
+            'http_method_names': ['get', 'head'],
+            # Reported in the Allow header; the class itself has no handlers
+            'allowed_methods': ['GET', 'HEAD'],
+        }
+        for name, value in [
+            ('permission_classes', permission_classes),
+            ('authentication_classes', authentication_classes),
+            ('renderer_classes', renderer_classes),
+        ]:
+            if value is not None:
+                attrs[name] = value
+        view_class = type(view.__name__, (APIView,), attrs)
+
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            api = view_class()
+            api.args, api.kwargs = args, kwargs
+            request = api.initialize_request(request, *args, **kwargs)
+            api.request = request
+            api.headers = api.default_response_headers
+
+            try:
+                if request.method.lower() not in api.http_method_names:
+                    api.http_method_not_allowed(request)
+                api.format_kwarg = api.get_format_suffix(**kwargs)
+                request.accepted_renderer, request.accepted_media_type = api.perform_content_negotiation(request)
+                await authenticate(request)
+                api.check_permissions(request)
+                response = await view(request, *args, **kwargs)
+            except Exception as exc:
+                response = api.handle_exception(exc)
+
+            return api.finalize_response(request, response, *args, **kwargs)
+
+        wrapper.view_class = view_class
+        # Token-authenticated API, like every @api_view
+        wrapper.csrf_exempt = True
+        return wrapper
+
+    return decorator
@@ -0,0 +1,174 @@
+"""
+Read-replica routing.
+
+ReplicaRouter sends reads to a healthy replica and everything else to the
+primary ('default'). Reads go to the primary instead when:
+
+* the current request has already written (read-your-writes within a request),
+* the user wrote within the last REPLICA_PIN_SECONDS (ReplicaPinMiddleware
+  remembers this in the cache, keyed by the JWT's user id),
+* the primary is inside a transaction, or
+* no replica passed its last health check (connectable and at most
+  REPLICA_MAX_LAG seconds behind).
+
+Replica aliases are every DATABASES entry other than 'default'.
+"""
+import itertools
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+import jwt
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import SynchronousOnlyOperation
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework_simplejwt.settings import api_settings
+
+logger = logging.getLogger('db_router')
+
+# Set for the rest of the request (or task) once it must read from the primary
+_use_primary = ContextVar('use_primary', default=False)
+# Set once the request has written, so the user gets pinned afterwards
+_wrote = ContextVar('wrote', default=False)
+
+# Seconds the replica is behind: 0 when it has replayed everything it received
+_PG_LAG_SQL = (
+    'SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() '
+    'THEN 0 ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+class ReplicaHealth:
+    """Per-process replica health, re-checked at most every REPLICA_HEALTH_INTERVAL seconds"""
+
+    def __init__(self):
+        self._status = {}
+        self._lock = threading.Lock()
+
+    def is_healthy(self, alias):
+        healthy, checked_at = self._status.get(alias, (True, None))
+        if checked_at is not None and time.monotonic() - checked_at < settings.REPLICA_HEALTH_INTERVAL:
+            return healthy
+        with self._lock:
+            healthy, checked_at = self._status.get(alias, (True, None))
+            if checked_at is None or time.monotonic() - checked_at >= settings.REPLICA_HEALTH_INTERVAL:
+                try:
+                    healthy = self.check(alias)
+                except SynchronousOnlyOperation:
+                    # Routed from the event loop; keep the last known status until a thread checks
+                    return healthy
+                self._status[alias] = (healthy, time.monotonic())
+        return healthy
+
+    def check(self, alias):
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                if connection.vendor != 'postgresql':
+                    return True
+                cursor.execute(_PG_LAG_SQL)
+                lag = cursor.fetchone()[0] or 0
+        except DatabaseError as exc:
+            logger.warning('Replica %s unavailable, reading from the primary: %s', alias, exc)
+            return False
+        if lag > settings.REPLICA_MAX_LAG:
+            logger.warning('Replica %s is %.1fs behind, reading from the primary', alias, lag)
+            return False
+        return True
+
+    def reset(self):
+        with self._lock:
+            self._status.clear()
+
+
+health = ReplicaHealth()
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self._turns = itertools.cycle(replica_aliases() or [DEFAULT_DB_ALIAS])
+
+    def db_for_read(self, model, **hints):
+        if _use_primary.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        for _ in range(len(replica_aliases())):
+            alias = next(self._turns)
+            if health.is_healthy(alias):
+                return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _use_primary.set(True)
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def _pin_key(request):
+    """Cache key for the JWT's user, or None for anonymous requests"""
+    header = request.headers.get('Authorization', '')
+    scheme, _, token = header.partition(' ')
+    if scheme not in api_settings.AUTH_HEADER_TYPES or not token:
+        return None
+    try:
+        # Only picks the database; authentication still verifies the token
+        claims = jwt.decode(token, options={'verify_signature': False})
+    except jwt.InvalidTokenError:
+        return None
+    user_id = claims.get(api_settings.USER_ID_CLAIM)
+    return f'db-pin:{user_id}' if user_id is not None else None
+
+
+class ReplicaPinMiddleware:
+    """
+    Reads from the primary for unsafe requests and for users who wrote in the
+    last REPLICA_PIN_SECONDS; pins the user after any request that writes.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        key = _pin_key(request)
+        primary = request.method not in ('GET', 'HEAD', 'OPTIONS') or (key is not None and cache.get(key))
+        tokens = _use_primary.set(bool(primary)), _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if key is not None and _wrote.get():
+                cache.set(key, True, timeout=settings.REPLICA_PIN_SECONDS)
+        finally:
+            _use_primary.reset(tokens[0])
+            _wrote.reset(tokens[1])
+        return response
+
+    async def __acall__(self, request):
+        key = _pin_key(request)
+        primary = request.method not in ('GET', 'HEAD', 'OPTIONS') or (key is not None and await cache.aget(key))
+        tokens = _use_primary.set(bool(primary)), _wrote.set(False)
+        try:
+            response = await self.get_response(request)
+            if key is not None and _wrote.get():
+                await cache.aset(key, True, timeout=settings.REPLICA_PIN_SECONDS)
+        finally:
+            _use_primary.reset(tokens[0])
+            _wrote.reset(tokens[1])
+        return response
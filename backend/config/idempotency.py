@@ -0,0 +1,82 @@
+"""
+Idempotency-Key support for POST views.
+
+The first response to a request carrying an ``Idempotency-Key`` header is
+stored in the cache for IDEMPOTENCY_KEY_TTL seconds, scoped to the user and
+path. A retry with the same key and body gets the stored response back,
+marked ``Idempotent-Replayed: true``, without running the view or touching
+the database. A key reused with a different body gets a 422. A retry that
+arrives while the first request is still running gets a 409. 5xx responses
+are not stored, so those can be retried.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# Longest a request may hold its key before a retry may run the view again
+LOCK_TIMEOUT = 30
+
+
+def _digest(value):
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def idempotent(view):
+    """Apply under @permission_classes so the key is scoped to request.user"""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        scope = _digest(f'{request.user.pk}:{request.path}:{key}')
+        result_key, lock_key = f'idempotency:{scope}', f'idempotency:{scope}:lock'
+        fingerprint = _digest(json.dumps(request.data, cls=JSONEncoder, sort_keys=True))
+
+        stored = cache.get(result_key)
+        if stored is None:
+            if not cache.add(lock_key, True, timeout=LOCK_TIMEOUT):
+                return Response(
+                    {'error': f'A request with this {HEADER} is still being processed'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            try:
+                # The first request may have finished between the get and the add
+                stored = cache.get(result_key)
+                if stored is None:
+                    response = view(request, *args, **kwargs)
+                    if response.status_code < 500:
+                        cache.set(
+                            result_key,
+                            (fingerprint, response.status_code, response.data),
+                            timeout=settings.IDEMPOTENCY_KEY_TTL,
+                        )
+                    return response
+            finally:
+                cache.delete(lock_key)
+
+        stored_fingerprint, status_code, data = stored
+        if stored_fingerprint != fingerprint:
+            return Response(
+                {'error': f'{HEADER} was already used for a different request'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        response = Response(data, status=status_code)
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
+    return wrapper
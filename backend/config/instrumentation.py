@@ -0,0 +1,267 @@
+"""
+Per-request SQL and latency instrumentation.
+
+InstrumentationMiddleware counts queries and database time through an
+execute wrapper (so it works with DEBUG=False), times the view and the
+response rendering, and reports them in a Server-Timing header. One
+wrapper, ``dispatch_query``, is installed permanently on every connection
+and hands each query to the collector of the request running it, held in a
+ContextVar: async requests share the executor thread's connections, so a
+wrapper per request would stack across concurrent requests.
+Durations are also aggregated per endpoint in-process and exposed in
+Prometheus text format by ``metrics_view``. Slow requests and repeated
+query shapes (likely N+1 loops) are logged with the offending SQL shapes.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger('instrumentation')
+
+QUANTILES = (0.5, 0.95, 0.99)
+# Literal values are stripped so queries differing only in parameters share a shape
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+
+
+def query_shape(sql):
+    shape = _LITERAL_RE.sub('?', sql)
+    return _IN_LIST_RE.sub('(...)', shape)
+
+
+class QueryCollector:
+    """execute_wrapper hook recording count, time and shape of each query"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[query_shape(sql)] += 1
+
+
+# Collector of the request running in this context; sync_to_async copies the
+# context into the executor thread, so its queries reach the same collector
+_collector = ContextVar('query_collector', default=None)
+
+
+def dispatch_query(execute, sql, params, many, context):
+    collector = _collector.get()
+    if collector is None:
+        return execute(sql, params, many, context)
+    return collector(execute, sql, params, many, context)
+
+
+def install_dispatch(sender=None, connection=None, **kwargs):
+    """
+    Put dispatch_query first in ``connection``'s wrappers, once. First, so
+    the pop() of any connection.execute_wrapper() block open meanwhile
+    still removes its own wrapper.
+    """
+    if dispatch_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, dispatch_query)
+
+
+# New connections, in whichever thread opens them
+connection_created.connect(install_dispatch)
+
+
+class Histogram:
+    """Running count/sum plus a bounded window of recent samples for quantiles"""
+
+    def __init__(self, window):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+    def quantiles(self):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+
+class MetricsRegistry:
+    """Thread-safe per-endpoint histograms for request duration, DB time and query count"""
+    metrics = {
+        'http_request_duration_seconds': 'Total request duration',
+        'http_request_db_seconds': 'Time spent in database queries per request',
+        'http_request_db_queries': 'Database queries per request',
+    }
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._histograms = defaultdict(lambda: Histogram(self.window))
+
+    def observe(self, endpoint, method, status, duration, db_time, queries):
+        labels = (endpoint, method, str(status))
+        with self._lock:
+            self._histograms[('http_request_duration_seconds', labels)].observe(duration)
+            self._histograms[('http_request_db_seconds', labels)].observe(db_time)
+            self._histograms[('http_request_db_queries', labels)].observe(queries)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self):
+        """Prometheus text exposition format (summaries)"""
+        with self._lock:
+            snapshot = [(key, hist.count, hist.total, hist.quantiles()) for key, hist in self._histograms.items()]
+
+        lines = []
+        for metric, help_text in self.metrics.items():
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} summary')
+            for (name, (endpoint, method, status)), count, total, quantiles in sorted(snapshot):
+                if name != metric:
+                    continue
+                labels = f'endpoint="{endpoint}",method="{method}",status="{status}"'
+                for q, value in quantiles.items():
+                    lines.append(f'{metric}{{{labels},quantile="{q}"}} {value:.6g}')
+                lines.append(f'{metric}_sum{{{labels}}} {total:.6g}')
+                lines.append(f'{metric}_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Connections this thread opened before the signal receiver was connected
+        for connection in connections.all():
+            install_dispatch(connection=connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.INSTRUMENTATION_ENABLED:
+            return self.get_response(request)
+
+        collector, start = self.start(request)
+        for connection in connections.all():
+            install_dispatch(connection=connection)
+        token = _collector.set(collector)
+        try:
+            response = self.get_response(request)
+        finally:
+            _collector.reset(token)
+        return self.finish(request, response, collector, start)
+
+    async def __acall__(self, request):
+        if not settings.INSTRUMENTATION_ENABLED:
+            return await self.get_response(request)
+
+        collector, start = self.start(request)
+        token = _collector.set(collector)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _collector.reset(token)
+        return self.finish(request, response, collector, start)
+
+    def start(self, request):
+        request._instrumentation = {}
+        return QueryCollector(), time.perf_counter()
+
+    def finish(self, request, response, collector, start):
+        total = time.perf_counter() - start
+        timings = request._instrumentation
+        view_time = timings.get('view', total)
+        render_time = timings.get('render', 0.0)
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={collector.duration * 1000:.1f};desc="{collector.count} queries"',
+            f'view;dur={view_time * 1000:.1f}',
+            f'render;dur={render_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+        match = request.resolver_match
+        endpoint = (match.view_name or match.route) if match else 'unmatched'
+        registry.observe(endpoint, request.method, response.status_code, total, collector.duration, collector.count)
+        self.check(request, endpoint, total, collector)
+        return response
+
+    def process_template_response(self, request, response):
+        # Called once the view has returned and before the (DRF) response is rendered
+        timings = getattr(request, '_instrumentation', None)
+        if timings is None:
+            return response
+        view_end = time.perf_counter()
+        timings['view'] = view_end - timings.get('view_start', view_end)
+
+        def record_render(rendered):
+            timings['render'] = time.perf_counter() - view_end
+
+        response.add_post_render_callback(record_render)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = getattr(request, '_instrumentation', None)
+        if timings is not None:
+            timings['view_start'] = time.perf_counter()
+
+    def check(self, request, endpoint, total, collector):
+        """Log slow requests and repeated query shapes"""
+        repeated = [
+            (shape, count) for shape, count in collector.shapes.most_common(5)
+            if count >= settings.N_PLUS_ONE_THRESHOLD
+        ]
+        if repeated:
+            logger.warning(
+                'Possible N+1 in %s %s (%s): %s',
+                request.method, request.path, endpoint,
+                '; '.join(f'{count}x {shape}' for shape, count in repeated),
+            )
+        if total * 1000 >= settings.SLOW_REQUEST_MS:
+            logger.warning(
+                'Slow request %s %s (%s): %.0f ms, %d queries, %.0f ms in DB. Top shapes: %s',
+                request.method, request.path, endpoint, total * 1000,
+                collector.count, collector.duration * 1000,
+                '; '.join(f'{count}x {shape}' for shape, count in collector.shapes.most_common(3)),
+            )
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint; requires 'Bearer <METRICS_TOKEN>'. Without a
+    token it is only served with DEBUG on.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        allowed = constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    else:
+        allowed = settings.DEBUG
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4')
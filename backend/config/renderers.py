@@ -0,0 +1,66 @@
+"""
+Response renderers registered in REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].
+
+orjson and msgpack are optional: without orjson the JSON renderer falls back
+to DRF's stdlib encoder, and the MessagePack renderer is only registered
+when msgpack is installed. Values JSON cannot represent natively (datetimes,
+decimals, lazy strings) go through DRF's JSONEncoder.default in every
+format, so e.g. created_at is encoded identically in JSON and MessagePack.
+"""
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+encode_default = JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer backed by orjson for compact responses"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        return orjson.dumps(
+            data,
+            default=encode_default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Compact binary responses for clients sending Accept: application/msgpack"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True, datetime=False)
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets Accept: text/event-stream negotiate on Server-Sent Events endpoints.
+    Their streams are written directly; this only renders error responses,
+    as an ``error`` event.
+    """
+    media_type = 'text/event-stream'
+    format = 'sse'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return b'event: error\ndata: ' + FastJSONRenderer().render(data) + b'\n\n'
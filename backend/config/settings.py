@@ -1,6 +1,8 @@
+from importlib.util import find_spec
 from pathlib import Path
 from datetime import timedelta
-from decouple import config
+from corsheaders.defaults import default_headers
+from decouple import Csv, config
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -24,6 +26,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'config.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -53,6 +56,11 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
+# Route the read-only list/dashboard endpoints to their async views and serve
+# the application event stream. Enable when serving config.asgi (e.g.
+# uvicorn); under WSGI every async view would pay for its own event loop.
+ASYNC_READ_VIEWS = config('ASYNC_READ_VIEWS', default=False, cast=bool)
 
 DATABASES = {
     'default': {
@@ -65,6 +73,28 @@ DATABASES = {
     }
 }
 
+# Read replicas: each host in DB_REPLICA_HOSTS becomes alias replica_<n> with the
+# primary's other settings. Setting it to the primary's own host gives a local
+# two-alias setup. ReplicaRouter sends safe reads there (see config.db_router).
+DB_REPLICA_HOSTS = config('DB_REPLICA_HOSTS', default='', cast=Csv())
+for number, host in enumerate(DB_REPLICA_HOSTS, start=1):
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        # Fail over quickly instead of hanging on a dead replica
+        'OPTIONS': {'connect_timeout': 2},
+        'TEST': {'MIRROR': 'default'},
+    }
+if DB_REPLICA_HOSTS:
+    DATABASE_ROUTERS = ['config.db_router.ReplicaRouter']
+    MIDDLEWARE.insert(1, 'config.db_router.ReplicaPinMiddleware')
+# Seconds a user's reads stay on the primary after they write (shared across
+# processes only with a shared cache, i.e. REDIS_URL)
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+# How often each process re-checks a replica, and the lag at which it is skipped
+REPLICA_HEALTH_INTERVAL = config('REPLICA_HEALTH_INTERVAL', default=10, cast=int)
+REPLICA_MAX_LAG = config('REPLICA_MAX_LAG', default=5, cast=float)
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -84,15 +114,123 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'users.User'
 
 # REST Framework
+# Stateless mode builds request.user from token claims (users.authentication)
+# instead of loading the User row on every request
+JWT_STATELESS_AUTH = config('JWT_STATELESS_AUTH', default=True, cast=bool)
+# How long a user's active flag is trusted before re-checking it (0 disables the check)
+JWT_ACTIVE_CHECK_TTL = config('JWT_ACTIVE_CHECK_TTL', default=60, cast=int)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJWTAuthentication'
+        if JWT_STATELESS_AUTH
+        else 'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson-backed JSON first; MessagePack via Accept: application/msgpack when installed
+    'DEFAULT_RENDERER_CLASSES': [
+        'config.renderers.FastJSONRenderer',
+        *(['config.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'config.parsers.FastJSONParser',
+        *(['config.parsers.MessagePackParser'] if find_spec('msgpack') else []),
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Request instrumentation (config.instrumentation): Server-Timing headers,
+# per-endpoint metrics at /metrics/ and slow-request / N+1 logging
+INSTRUMENTATION_ENABLED = config('INSTRUMENTATION_ENABLED', default=True, cast=bool)
+SLOW_REQUEST_MS = config('SLOW_REQUEST_MS', default=500, cast=int)
+N_PLUS_ONE_THRESHOLD = config('N_PLUS_ONE_THRESHOLD', default=10, cast=int)
+# Bearer token for /metrics/; while unset the endpoint is only served with DEBUG on
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'instrumentation': {'handlers': ['console'], 'level': 'WARNING'},
+        'db_router': {'handlers': ['console'], 'level': 'WARNING'},
+    },
 }
 
+# Caching: local memory per process by default, shared Redis when REDIS_URL is set
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# Public job listing/detail responses (see jobs.cache)
+PUBLIC_JOBS_CACHE_ALIAS = config('PUBLIC_JOBS_CACHE_ALIAS', default='default')
+PUBLIC_JOBS_CACHE_TIMEOUT = config('PUBLIC_JOBS_CACHE_TIMEOUT', default=60, cast=int)
+
+# Pagination for list endpoints (clients may ask for up to API_MAX_PAGE_SIZE)
+API_PAGE_SIZE = config('API_PAGE_SIZE', default=20, cast=int)
+API_MAX_PAGE_SIZE = config('API_MAX_PAGE_SIZE', default=100, cast=int)
+
+# Upper bound on application ids accepted by one bulk status update
+BULK_STATUS_MAX_IDS = config('BULK_STATUS_MAX_IDS', default=5000, cast=int)
+
+# How often each process picks up jobs created by other processes for recommendations
+RECOMMENDATIONS_REFRESH_SECONDS = config('RECOMMENDATIONS_REFRESH_SECONDS', default=60, cast=int)
+
+# Near-duplicate job postings (see jobs.dedupe): what job creation and the import do
+# with a job whose title + description resembles an open job at least
+# JOB_DEDUPE_THRESHOLD (estimated Jaccard similarity): flag, reject, merge or off
+JOB_DEDUPE_ACTION = config('JOB_DEDUPE_ACTION', default='flag')
+JOB_DEDUPE_THRESHOLD = config('JOB_DEDUPE_THRESHOLD', default=0.8, cast=float)
+
+# Deadline-expiry sweep (manage.py expire_jobs): what happens to applications
+# still NEW once their job's deadline is JOB_EXPIRY_GRACE_DAYS past: keep, reject or archive
+JOB_EXPIRY_APPLICATIONS = config('JOB_EXPIRY_APPLICATIONS', default='keep')
+JOB_EXPIRY_GRACE_DAYS = config('JOB_EXPIRY_GRACE_DAYS', default=0, cast=int)
+
+# Rows validated and inserted per batch by the bulk job import
+JOB_IMPORT_BATCH_SIZE = config('JOB_IMPORT_BATCH_SIZE', default=500, cast=int)
+# Rows fetched per round trip by the streaming exports
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# How long responses to requests with an Idempotency-Key are kept for replay
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=24 * 60 * 60, cast=int)
+
+# Seconds an employer dashboard stays cached; writes invalidate it sooner
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', default=300, cast=int)
+
+# Application events (see applications.events). The in-process broker only
+# reaches streams of the publishing process; use
+# applications.events.RedisBroker when running several workers.
+EVENTS_BROKER = config('EVENTS_BROKER', default='applications.events.InProcessBroker')
+EVENTS_REDIS_URL = config('EVENTS_REDIS_URL', default=REDIS_URL)
+# Events buffered per stream before a slow client is told to resync
+EVENTS_QUEUE_SIZE = config('EVENTS_QUEUE_SIZE', default=100, cast=int)
+# Seconds between keep-alive comments, and before a stream is closed for the client to reconnect
+EVENTS_HEARTBEAT = config('EVENTS_HEARTBEAT', default=15, cast=int)
+EVENTS_MAX_AGE = config('EVENTS_MAX_AGE', default=300, cast=int)
+# Reconnect delay suggested to EventSource clients
+EVENTS_RETRY_MS = config('EVENTS_RETRY_MS', default=5000, cast=int)
+# Seconds a stream token (the ?token= EventSource clients connect with) stays valid
+EVENTS_TOKEN_LIFETIME = config('EVENTS_TOKEN_LIFETIME', default=60, cast=int)
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=7),
@@ -100,6 +238,7 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_USER_CLASS': 'users.authentication.ClaimsUser',
 }
 
 # CORS
@@ -0,0 +1,131 @@
+"""
+Shared fixtures for the query-budget tests in each app's tests.py.
+"""
+import json
+from datetime import timedelta
+from urllib.parse import parse_qsl, urlsplit
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from applications.models import Application
+from jobs import dedupe, recommendations, search
+from jobs.models import Job
+from users.models import User
+from users.tokens import access_token
+
+
+# Budgets count the endpoint's own queries; the cached active-user check is
+# covered separately in users.tests
+@override_settings(JWT_ACTIVE_CHECK_TTL=0)
+class QueryBudgetTestCase(APITestCase):
+    _user_count = 0
+
+    def setUp(self):
+        cache.clear()
+        # In-process indexes must not outlive each test's rolled-back rows
+        search.get_backend().reset()
+        recommendations.reset()
+        dedupe.reset()
+        self.employer = self.create_user('EMPLOYER')
+        self.seekers = [self.create_user('SEEKER') for _ in range(3)]
+
+    def create_user(self, role):
+        QueryBudgetTestCase._user_count += 1
+        number = QueryBudgetTestCase._user_count
+        user = User(email=f'{role.lower()}{number}@example.com', full_name=f'{role.title()} {number}', role=role)
+        # Unusable password keeps fixture setup free of PBKDF2 hashing
+        user.set_unusable_password()
+        user.save()
+        return user
+
+    def create_jobs(self, employer, count, open=True):
+        deadline = timezone.now() + timedelta(days=30 if open else -1)
+        return Job.objects.bulk_create([
+            Job(
+                employer=employer,
+                title=f'Python developer {i}',
+                description='Build Django services',
+                location='Remote',
+                employment_type='FULL_TIME',
+                application_deadline=deadline,
+            )
+            for i in range(count)
+        ])
+
+    def create_applications(self, jobs, seekers, status='NEW'):
+        return Application.objects.bulk_create([
+            Application(job=job, seeker=seeker, resume_url='https://example.com/cv.pdf', status=status)
+            for job in jobs
+            for seeker in seekers
+        ])
+
+    def login(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token(user)}')
+
+    def count_queries(self, method, url, **kwargs):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, **kwargs)
+        return response, queries
+
+    def assertQueryBudget(self, budget, method, url, **kwargs):
+        """Request ``url`` and fail if it runs more than ``budget`` queries"""
+        response, queries = self.count_queries(method, url, **kwargs)
+        self.assertLessEqual(
+            len(queries), budget,
+            f'{method.upper()} {url} ran {len(queries)} queries (budget {budget}):\n'
+            + '\n'.join(query['sql'] for query in queries),
+        )
+        return response
+
+    def assertConstantQueries(self, method, url, grow, **kwargs):
+        """Query count for ``url`` must not change after ``grow()`` adds more rows"""
+        _, before = self.count_queries(method, url, **kwargs)
+        grow()
+        _, after = self.count_queries(method, url, **kwargs)
+        self.assertEqual(
+            len(before), len(after),
+            f'{method.upper()} {url} went from {len(before)} to {len(after)} queries as data grew',
+        )
+
+    def assertSameAsSync(self, sync_view, async_view, path, user=None, query=None, **kwargs):
+        """
+        Call a view and its async counterpart (routed only with ASYNC_READ_VIEWS)
+        directly with the same request; both must return the same status and
+        body. Returns the decoded body.
+        """
+        headers = {'Authorization': f'Bearer {access_token(user)}'} if user is not None else {}
+        responses = []
+        for factory, view in ((RequestFactory(), sync_view), (AsyncRequestFactory(), async_to_sync(async_view))):
+            cache.clear()
+            response = view(factory.get(path, query, headers=headers), **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            responses.append(response)
+        sync_response, async_response = responses
+        self.assertEqual(async_response.status_code, sync_response.status_code, async_response.content)
+        self.assertEqual(json.loads(async_response.content), json.loads(sync_response.content))
+        return json.loads(async_response.content)
+
+    def walk_pages(self, sync_view, async_view, path, user=None, query=None, **kwargs):
+        """
+        Follow the ``next`` cursors from the first page to the last, then the
+        ``previous`` cursors back, checking each page with assertSameAsSync().
+        Returns the ids of each page, forwards and backwards.
+        """
+        pages = {}
+        for link in ('next', 'previous'):
+            pages[link] = []
+            while True:
+                body = self.assertSameAsSync(sync_view, async_view, path, user, query, **kwargs)
+                pages[link].append([row['id'] for row in body['results']])
+                if not body[link]:
+                    break
+                query = dict(parse_qsl(urlsplit(body[link]).query))
+        return pages['next'], pages['previous']
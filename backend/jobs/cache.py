@@ -0,0 +1,117 @@
+"""
+Response cache for the public (user-independent) job endpoints.
+
+Entries are keyed by a global generation number which every job write bumps,
+so one invalidation drops all cached pages and filters at once. Responses
+carry ETag and Last-Modified headers, and conditional requests that still
+match are answered with 304 without touching the database.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+STATE_KEY = 'public_jobs:state'
+
+
+def get_cache():
+    return caches[settings.PUBLIC_JOBS_CACHE_ALIAS]
+
+
+def _state(cache):
+    """(generation, last_modified) for the public job data"""
+    state = cache.get(STATE_KEY)
+    if state is None:
+        state = (1, int(timezone.now().timestamp()))
+        cache.add(STATE_KEY, state, timeout=None)
+        state = cache.get(STATE_KEY, state)
+    return state
+
+
+def invalidate_public_jobs():
+    """Drop every cached public job response; call after any job write"""
+    cache = get_cache()
+    generation, last_modified = _state(cache)
+    # Always move Last-Modified forward, even for writes within the same second
+    last_modified = max(last_modified + 1, int(timezone.now().timestamp()))
+    cache.set(STATE_KEY, (generation + 1, last_modified), timeout=None)
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+
+def _lookup(request):
+    """(key, last_modified, cached entry or None) for this request"""
+    cache = get_cache()
+    generation, last_modified = _state(cache)
+    key = f'public_jobs:{generation}:{request.build_absolute_uri()}'
+    return key, last_modified, cache.get(key)
+
+
+def _store(key, data, last_modified):
+    body = json.dumps(data, cls=JSONEncoder, sort_keys=True)
+    entry = (data, hashlib.md5(body.encode()).hexdigest(), last_modified)
+    get_cache().set(key, entry, timeout=settings.PUBLIC_JOBS_CACHE_TIMEOUT)
+    return entry
+
+
+def _respond(request, entry):
+    data, digest, last_modified = entry
+    # Each negotiated format (JSON, MessagePack, ...) is its own representation
+    etag = quote_etag(f'{digest}-{request.accepted_renderer.format}')
+    if _not_modified(request, etag, last_modified):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(data)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'public, no-cache'
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def cache_public_response(view):
+    """
+    Cache a GET view's 200 responses until the next job write (or the
+    PUBLIC_JOBS_CACHE_TIMEOUT, which bounds staleness of deadline-derived status).
+    Only for views whose output does not depend on the requesting user.
+    Works on both sync and async views.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            key, last_modified, entry = await sync_to_async(_lookup)(request)
+            if entry is None:
+                response = await view(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                entry = await sync_to_async(_store)(key, response.data, last_modified)
+            return _respond(request, entry)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key, last_modified, entry = _lookup(request)
+        if entry is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = _store(key, response.data, last_modified)
+        return _respond(request, entry)
+
+    return wrapper
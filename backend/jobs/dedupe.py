@@ -0,0 +1,356 @@
+"""
+Near-duplicate job postings, detected with MinHash and locality-sensitive hashing.
+
+A job's fingerprint is the MinHash signature of the word 3-grams of its title
+and description (``Job.minhash``): NUM_PERM 32-bit minimums, whose share of
+equal positions estimates the Jaccard similarity of two postings. The LSH
+index splits signatures into BANDS bands and buckets jobs by each band, so a
+lookup reads BANDS dict entries and compares only the jobs sharing a bucket.
+
+A new job is a near-duplicate of an open job it resembles at least
+JOB_DEDUPE_THRESHOLD. Job creation and the import then act on
+JOB_DEDUPE_ACTION:
+
+* ``flag``: the job is saved with ``duplicate_of`` set, and the public feed,
+  search and recommendations skip it,
+* ``reject``: the job is refused,
+* ``merge``: the original is updated with the new posting instead. Only an
+  employer's own jobs can absorb its reposts; other matches are flagged,
+* ``off``: no fingerprinting at all.
+
+Only jobs without ``duplicate_of`` are indexed, so reposts point at the
+original. The index is held in process, built from the open jobs on first
+use and then caught up before every lookup on the jobs created or saved
+since the previous scan (Job.updated_at), so other processes' new jobs,
+edits and flags are seen too. Jobs without a stored signature (e.g. created
+while deduplication was off) are fingerprinted as they are read.
+``manage.py dedupe_jobs`` fingerprints and flags the existing catalogue.
+"""
+import heapq
+import random
+import struct
+import threading
+import zlib
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import CATCH_UP_OVERLAP, Job
+from .search import tokenize
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_MASK_64 = (1 << 64) - 1
+_SIGNATURE = struct.Struct(f'<{NUM_PERM}I')
+_BAND_BYTES = ROWS * 4
+# Fixed seed: signatures are stored, so every process must draw the same permutations
+_random = random.Random(20240601)
+PERMUTATIONS = [
+    (_random.randrange(1, _MERSENNE_PRIME), _random.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)
+]
+if np is not None:
+    _A = np.array([a for a, _ in PERMUTATIONS], dtype=np.uint64)
+    _B = np.array([b for _, b in PERMUTATIONS], dtype=np.uint64)
+
+Match = namedtuple('Match', 'job_id employer_id similarity')
+
+
+def shingles(title, description):
+    """Word 3-grams of the title and description, hashed with CRC-32 (stable across processes)"""
+    tokens = tokenize(title) + tokenize(description)
+    return {
+        zlib.crc32(' '.join(tokens[i:i + SHINGLE_SIZE]).encode())
+        for i in range(max(1, len(tokens) - SHINGLE_SIZE + 1))
+    } if tokens else set()
+
+
+def fingerprint(title, description):
+    """MinHash signature as bytes, or None for a posting without words"""
+    hashes = shingles(title, description)
+    if not hashes:
+        return None
+    if np is not None:
+        values = np.fromiter(hashes, np.uint64, len(hashes))[:, None]
+        # uint64 arithmetic wraps like the pure-Python & _MASK_64 below
+        signature = ((values * _A + _B) % np.uint64(_MERSENNE_PRIME) & np.uint64(_MAX_HASH)).min(axis=0)
+        return signature.astype('<u4').tobytes()
+    return _SIGNATURE.pack(*(
+        min(((a * value + b) & _MASK_64) % _MERSENNE_PRIME & _MAX_HASH for value in hashes)
+        for a, b in PERMUTATIONS
+    ))
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of two signatures"""
+    if np is not None:
+        return np.count_nonzero(np.frombuffer(first, '<u4') == np.frombuffer(second, '<u4')) / NUM_PERM
+    return sum(a == b for a, b in zip(_SIGNATURE.unpack(first), _SIGNATURE.unpack(second))) / NUM_PERM
+
+
+def bands(signature):
+    return [signature[start:start + _BAND_BYTES] for start in range(0, len(signature), _BAND_BYTES)]
+
+
+class LSHIndex:
+    """
+    Banded MinHash index. ``jobs`` maps a job id to (signature, employer id,
+    deadline timestamp); ``buckets[band]`` maps band bytes to job ids.
+    ``versions`` holds the updated_at each indexed job was added at.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.buckets = [defaultdict(set) for _ in range(BANDS)]
+        self.jobs = {}
+        self.versions = {}
+        # Where get_index()'s next catch-up scan starts; only get_index() moves it
+        self.cursor = None
+        # (deadline, job_id) heap for expire(); entries of re-added jobs go stale
+        self._deadlines = []
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def add(self, job_id, employer_id, application_deadline, signature, updated_at=None):
+        deadline = application_deadline.timestamp()
+        with self._lock:
+            self.remove(job_id)
+            self.jobs[job_id] = (signature, employer_id, deadline)
+            self.versions[job_id] = updated_at
+            for buckets, band in zip(self.buckets, bands(signature)):
+                buckets[band].add(job_id)
+            heapq.heappush(self._deadlines, (deadline, job_id))
+
+    def remove(self, job_id):
+        with self._lock:
+            self.versions.pop(job_id, None)
+            entry = self.jobs.pop(job_id, None)
+            if entry is None:
+                return
+            for buckets, band in zip(self.buckets, bands(entry[0])):
+                bucket = buckets[band]
+                bucket.discard(job_id)
+                if not bucket:
+                    del buckets[band]
+
+    def expire(self, now):
+        """Drop jobs whose deadline passed before ``now``; they can no longer be originals"""
+        now = now.timestamp()
+        with self._lock:
+            while self._deadlines and self._deadlines[0][0] < now:
+                deadline, job_id = heapq.heappop(self._deadlines)
+                entry = self.jobs.get(job_id)
+                if entry is not None and entry[2] == deadline:
+                    self.remove(job_id)
+
+    def match(self, signature, threshold):
+        """Most similar indexed job resembling ``signature`` at least ``threshold``, or None"""
+        with self._lock:
+            candidates = set()
+            for buckets, band in zip(self.buckets, bands(signature)):
+                candidates.update(buckets.get(band, ()))
+            best = None
+            for job_id in candidates:
+                other, employer_id, _ = self.jobs[job_id]
+                score = similarity(signature, other)
+                # Ties go to the oldest job
+                if score >= threshold and (best is None or (score, -job_id) > (best.similarity, -best.job_id)):
+                    best = Match(job_id, employer_id, score)
+            return best
+
+
+def _rows(queryset, *fields):
+    return queryset.order_by().values_list(
+        'id', 'employer_id', 'application_deadline', 'minhash', 'title', 'description', 'updated_at', *fields
+    )
+
+
+def _signature(minhash, title, description):
+    """Stored signature, or computed now for jobs saved while deduplication was off"""
+    return bytes(minhash) if minhash is not None else fingerprint(title, description)
+
+
+_index = None
+_build_lock = threading.Lock()
+
+
+def get_index():
+    """
+    This process's LSHIndex, or None when deduplication is off. Built from the
+    open jobs on first use; later calls catch up on the jobs created or saved
+    since the previous scan and drop closed ones.
+    """
+    global _index
+    if not enabled():
+        return None
+    now = timezone.now()
+    if _index is None:
+        with _build_lock:
+            if _index is None:
+                index = LSHIndex()
+                rows = _rows(Job.objects.open(now).filter(duplicate_of__isnull=True)).iterator(2000)
+                for job_id, employer_id, deadline, minhash, title, description, updated_at in rows:
+                    signature = _signature(minhash, title, description)
+                    if signature is not None:
+                        index.add(job_id, employer_id, deadline, signature, updated_at)
+                index.cursor = now - CATCH_UP_OVERLAP
+                _index = index
+                return index
+    index = _index
+    rows = _rows(Job.objects.changed_since(index.cursor), 'duplicate_of_id')
+    for job_id, employer_id, deadline, minhash, title, description, updated_at, duplicate_of in rows:
+        if deadline >= now and duplicate_of is None:
+            # Rows re-read by the overlap, or indexed by this process already, are skipped
+            if index.versions.get(job_id) != updated_at:
+                signature = _signature(minhash, title, description)
+                if signature is not None:
+                    index.add(job_id, employer_id, deadline, signature, updated_at)
+                else:
+                    index.remove(job_id)
+        else:
+            index.remove(job_id)
+    index.cursor = now - CATCH_UP_OVERLAP
+    index.expire(now)
+    return index
+
+
+def reset():
+    global _index
+    _index = None
+
+
+def enabled():
+    return settings.JOB_DEDUPE_ACTION != 'off'
+
+
+def screen(index, title, description):
+    """
+    (fingerprint, Match of the open job it duplicates or None) for a new
+    posting; (None, None) when ``index`` is None, i.e. deduplication is off.
+    """
+    if index is None:
+        return None, None
+    signature = fingerprint(title, description)
+    if signature is None:
+        return None, None
+    return signature, index.match(signature, settings.JOB_DEDUPE_THRESHOLD)
+
+
+def action_for(match, employer_id):
+    """What to do with ``employer_id``'s new job duplicating ``match``: flag, reject or merge"""
+    if settings.JOB_DEDUPE_ACTION == 'merge' and match.employer_id != employer_id:
+        return 'flag'
+    return settings.JOB_DEDUPE_ACTION
+
+
+def merge(original, posting):
+    """Update ``original`` in memory with the fields of the repost ``posting``, keeping the later deadline"""
+    for field in ('title', 'description', 'location', 'employment_type', 'minhash'):
+        setattr(original, field, getattr(posting, field))
+    original.application_deadline = max(original.application_deadline, posting.application_deadline)
+
+
+def index_job(job):
+    """Add or replace ``job``; duplicates and closed jobs are dropped. No-op until the index is built."""
+    if _index is None:
+        return
+    if job.duplicate_of_id is None and job.minhash is not None and job.is_open():
+        _index.add(job.pk, job.employer_id, job.application_deadline, bytes(job.minhash), job.updated_at)
+    else:
+        _index.remove(job.pk)
+
+
+def index_jobs(jobs):
+    for job in jobs:
+        index_job(job)
+
+
+def remove_job(job_id):
+    if _index is not None:
+        _index.remove(job_id)
+
+
+class BatchScreen:
+    """
+    Screens one employer's batch of new jobs (e.g. an import) against the
+    open jobs and the batch's own earlier rows, then saves the outcome.
+    """
+    merge_fields = ['title', 'description', 'location', 'employment_type', 'application_deadline', 'minhash']
+
+    def __init__(self, employer_id):
+        self.employer_id = employer_id
+        self.index = get_index()
+        # Jobs to create; those in ``rows`` (by position in ``jobs``) are originals
+        self.jobs = []
+        self.rows = LSHIndex()
+        self.labels = {}
+        # (job, position of its original in ``jobs``), created once the originals have ids
+        self.flagged = []
+        # Existing job id -> the repost it absorbs
+        self.merges = {}
+
+    def __len__(self):
+        return len(self.jobs) + len(self.flagged) + len(self.merges)
+
+    def add(self, job, label):
+        """Screen ``job`` (unsaved); returns an error message if it is rejected"""
+        signature, match = screen(self.index, job.title, job.description)
+        job.minhash = signature
+        if match is not None:
+            action = action_for(match, self.employer_id)
+            if action == 'reject':
+                return f'Near-duplicate of job {match.job_id}'
+            if action == 'merge':
+                self.merges[match.job_id] = job
+            else:
+                job.duplicate_of_id = match.job_id
+                self.jobs.append(job)
+            return None
+
+        match = self.rows.match(signature, settings.JOB_DEDUPE_THRESHOLD) if signature else None
+        if match is not None:
+            original = self.jobs[match.job_id]
+            action = action_for(match, self.employer_id)
+            if action == 'reject':
+                return f'Near-duplicate of {self.labels[match.job_id]}'
+            if action == 'merge':
+                merge(original, job)
+            else:
+                self.flagged.append((job, match.job_id))
+            return None
+
+        if signature is not None:
+            # LSHIndex ids are positions here; the deadline only matters for expire()
+            self.rows.add(len(self.jobs), self.employer_id, job.application_deadline, signature)
+            self.labels[len(self.jobs)] = label
+        self.jobs.append(job)
+        return None
+
+    def save(self):
+        """Insert and merge; call inside a transaction. Returns (created jobs, merged jobs)."""
+        created = Job.objects.bulk_create(self.jobs) if self.jobs else []
+        if self.flagged:
+            for job, position in self.flagged:
+                job.duplicate_of_id = created[position].pk
+            created += Job.objects.bulk_create([job for job, _ in self.flagged])
+        merged = []
+        if self.merges:
+            merged = list(Job.objects.filter(pk__in=self.merges).select_for_update())
+            now = timezone.now()
+            for original in merged:
+                merge(original, self.merges[original.pk])
+                # bulk_update() skips auto_now; other processes' indexes catch up on it
+                original.updated_at = now
+            Job.objects.bulk_update(merged, self.merge_fields + ['updated_at'])
+        return created, merged
@@ -0,0 +1,55 @@
+from .models import Job
+
+
+class InvalidFilter(ValueError):
+    """Raised when a query parameter holds a value we cannot filter on"""
+
+
+def filter_jobs(queryset, params):
+    """Apply the job list filters (employment_type, location, status) in SQL"""
+    employment_type = params.get('employment_type')
+    if employment_type:
+        valid_types = dict(Job.EMPLOYMENT_TYPE_CHOICES)
+        if employment_type not in valid_types:
+            raise InvalidFilter(f'Invalid employment_type: {employment_type}')
+        queryset = queryset.filter(employment_type=employment_type)
+
+    location = params.get('location')
+    if location:
+        queryset = queryset.filter(location__icontains=location)
+
+    job_status = params.get('status')
+    if job_status:
+        job_status = job_status.lower()
+        if job_status == 'open':
+            queryset = queryset.open()
+        elif job_status == 'closed':
+            queryset = queryset.closed()
+        else:
+            raise InvalidFilter(f'Invalid status: {job_status}')
+
+    return queryset
+
+
+
+def parse_fields(params, available):
+    """
+    Output fields selected by ?fields=a,b or ?exclude=a,b, in ``available``
+    order. Returns None when neither is given (meaning every field).
+    """
+    fields = params.get('fields')
+    exclude = params.get('exclude')
+    if not fields and not exclude:
+        return None
+
+    requested = set(filter(None, (fields or exclude).split(',')))
+    unknown = requested - set(available)
+    if unknown:
+        raise InvalidFilter(f'Unknown fields: {", ".join(sorted(unknown))}')
+    if fields:
+        selected = [name for name in available if name in requested]
+    else:
+        selected = [name for name in available if name not in requested]
+    if not selected:
+        raise InvalidFilter('No fields selected')
+    return selected
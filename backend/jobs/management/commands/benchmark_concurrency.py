@@ -0,0 +1,157 @@
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.models import Job
+from users.models import User
+from users.tokens import access_token
+
+# Read endpoints that have async views (ASYNC_READ_VIEWS)
+ENDPOINTS = ['public_jobs', 'my_applications', 'job_applications', 'employer_dashboard']
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure throughput and latency of the read endpoints under concurrent keep-alive '
+        'connections against one or more running servers, e.g. the WSGI deployment and the '
+        'ASGI one:\n'
+        '  ASYNC_READ_VIEWS=False gunicorn config.wsgi -w 4 --threads 8 -b 127.0.0.1:8000\n'
+        '  ASYNC_READ_VIEWS=True uvicorn config.asgi:application --workers 4 --port 8001\n'
+        '  manage.py benchmark_concurrency --target wsgi=http://127.0.0.1:8000 '
+        '--target asgi=http://127.0.0.1:8001\n'
+        'Tokens are minted from this process, so it must share the servers\' database and SECRET_KEY.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True, metavar='LABEL=URL',
+                            help='Server to benchmark; repeat to compare several')
+        parser.add_argument('--concurrency', default='1,10,50,200',
+                            help='Comma-separated connection counts (default 1,10,50,200)')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per run (default 10)')
+        parser.add_argument('--endpoint', action='append', choices=ENDPOINTS,
+                            help='Endpoint to load; repeat for several (default: all)')
+        parser.add_argument('--output', help='Also write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['target']:
+            label, sep, url = target.partition('=')
+            if not sep:
+                raise CommandError(f'--target must look like LABEL=URL, got {target!r}')
+            parts = urlsplit(url)
+            targets.append((label, parts.hostname, parts.port or 80))
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError('--concurrency must be comma-separated integers')
+
+        requests = self.build_requests(options['endpoint'] or ENDPOINTS)
+        results = []
+        for name, request in requests.items():
+            for level in levels:
+                for label, host, port in targets:
+                    result = asyncio.run(self.run(host, port, request, level, options['duration']))
+                    result.update(endpoint=name, target=label, concurrency=level)
+                    results.append(result)
+                    self.stdout.write(
+                        f"{name} | {label} | {level} conn: {result['rps']:,.0f} req/s | "
+                        f"p50 {result['p50_ms']:.1f} ms | p95 {result['p95_ms']:.1f} ms | "
+                        f"{result['errors']} errors"
+                    )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+                f.write('\n')
+
+    def build_requests(self, endpoints):
+        """Raw HTTP/1.1 request bytes per endpoint, authenticated as seeded users"""
+        job = Job.objects.filter(applications__isnull=False).order_by('id').first()
+        seeker = User.objects.filter(role='SEEKER', applications__isnull=False).order_by('id').first()
+        if job is None or seeker is None:
+            raise CommandError('No jobs with applications; run seed_data first')
+        employer = User.objects.get(pk=job.employer_id)
+
+        paths = {
+            'public_jobs': ('/api/jobs/public/', None),
+            'my_applications': ('/api/applications/my-applications/', seeker),
+            'job_applications': (f'/api/applications/job/{job.pk}/', employer),
+            'employer_dashboard': ('/api/applications/employer/dashboard/', employer),
+        }
+        requests = {}
+        for name in endpoints:
+            path, user = paths[name]
+            lines = [f'GET {path} HTTP/1.1', 'Host: localhost', 'Accept: application/json']
+            if user is not None:
+                lines.append(f'Authorization: Bearer {access_token(user)}')
+            requests[name] = ('\r\n'.join(lines) + '\r\n\r\n').encode()
+        return requests
+
+    async def run(self, host, port, request, concurrency, duration):
+        latencies, errors = [], [0]
+        deadline = time.perf_counter() + duration
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            self.connection(host, port, request, deadline, latencies, errors) for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        return {
+            'requests': len(latencies),
+            'rps': len(latencies) / elapsed,
+            'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+            'p95_ms': latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else 0.0,
+            'errors': errors[0],
+        }
+
+    async def connection(self, host, port, request, deadline, latencies, errors):
+        """One keep-alive client connection issuing requests back to back until the deadline"""
+        reader = writer = None
+        while time.perf_counter() < deadline:
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(host, port)
+                sent = time.perf_counter()
+                writer.write(request)
+                await writer.drain()
+                status, keep_alive = await self.read_response(reader)
+                if status != 200:
+                    errors[0] += 1
+                else:
+                    latencies.append(time.perf_counter() - sent)
+                if not keep_alive:
+                    writer.close()
+                    writer = None
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                errors[0] += 1
+                writer = None
+        if writer is not None:
+            writer.close()
+
+    async def read_response(self, reader):
+        """Read one response; returns (status, whether the connection can be reused)"""
+        status = int((await reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+
+        if 'content-length' in headers:
+            await reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if not size:
+                    break
+        else:
+            await reader.read()
+            return status, False
+        return status, headers.get('connection') != 'close'
@@ -0,0 +1,234 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from applications.models import Application
+from jobs.models import Job
+from users.models import User
+from users.tokens import access_token
+
+
+def drain(response):
+    """Read a streaming response to the end, like a client would"""
+    if not response.is_async:
+        for _ in response.streaming_content:
+            pass
+        return
+
+    async def read():
+        async for _ in response.streaming_content:
+            pass
+
+    async_to_sync(read)()
+
+
+class Command(BaseCommand):
+    help = (
+        'Time every jobs/applications/users endpoint against the current database, record '
+        'p50/p95 latency and query counts, and compare them with a stored baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help='Reset the database and generate data with seed_data first')
+        parser.add_argument('--employers', type=int, default=2000)
+        parser.add_argument('--seekers', type=int, default=20000)
+        parser.add_argument('--jobs-per-employer', type=int, default=50)
+        parser.add_argument('--applications-per-job', type=int, default=10)
+        parser.add_argument('--requests', type=int, default=20, help='Timed requests per endpoint (default 20)')
+        parser.add_argument(
+            '--baseline', default=str(settings.BASE_DIR / 'benchmarks' / 'baseline.json'),
+            help='Baseline JSON file (default benchmarks/baseline.json)',
+        )
+        parser.add_argument('--update-baseline', action='store_true', help='Write the results as the new baseline')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Allowed p95 slowdown over the baseline as a fraction (default 0.25)',
+        )
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            call_command(
+                'seed_data',
+                employers=options['employers'],
+                seekers=options['seekers'],
+                jobs_per_employer=options['jobs_per_employer'],
+                applications_per_job=options['applications_per_job'],
+                stdout=self.stdout,
+            )
+
+        employer = (
+            User.objects.filter(role='EMPLOYER', jobs__applications__isnull=False)
+            .order_by('id').first()
+        )
+        seeker = User.objects.filter(role='SEEKER', applications__isnull=False).order_by('id').first()
+        if employer is None or seeker is None:
+            raise CommandError('No jobs with applications to benchmark; run with --seed first')
+
+        job = Job.objects.filter(employer=employer, applications__isnull=False).order_by('id').first()
+        application_ids = list(
+            Application.objects.filter(job__employer=employer).order_by('id').values_list('id', flat=True)[:500]
+        )
+        open_job = (
+            Job.objects.open().exclude(employer=employer).exclude(applications__seeker=seeker)
+            .order_by('id').first()
+        )
+        if open_job is None:
+            raise CommandError('No open job left for the seeker to apply to')
+
+        results = {}
+        # The events stream ends after its first frame, so it is timed from connect to first byte
+        with override_settings(EVENTS_MAX_AGE=0):
+            for name, user, method, url, kwargs in self.endpoints(employer, seeker, job, open_job, application_ids):
+                results[name] = self.measure(user, method, url, kwargs, options['requests'])
+                self.stdout.write(
+                    f"{name}: p50 {results[name]['p50_ms']:.1f} ms | p95 {results[name]['p95_ms']:.1f} ms | "
+                    f"{results[name]['queries']} queries"
+                )
+
+        self.compare(results, self.environment(), options)
+
+    def environment(self):
+        """What the results were measured against; a baseline is only comparable on a similar one"""
+        return {
+            'database': connection.vendor,
+            'async_read_views': settings.ASYNC_READ_VIEWS,
+            'employers': User.objects.filter(role='EMPLOYER').count(),
+            'seekers': User.objects.filter(role='SEEKER').count(),
+            'jobs': Job.objects.count(),
+            'applications': Application.objects.count(),
+        }
+
+    def endpoints(self, employer, seeker, job, open_job, application_ids):
+        deadline = (timezone.now() + timedelta(days=30)).isoformat()
+        new_job = {
+            'title': 'Benchmark developer',
+            'description': 'Benchmark',
+            'location': 'Remote',
+            'employment_type': 'FULL_TIME',
+            'application_deadline': deadline,
+        }
+        rows = ''.join(
+            f'Imported role {i},Benchmark import {i},Remote,CONTRACT,{deadline}\n' for i in range(50)
+        )
+        upload = SimpleUploadedFile(
+            'jobs.csv', ('title,description,location,employment_type,application_deadline\n' + rows).encode()
+        )
+        endpoints = [
+            ('register', None, 'post', '/api/auth/register/', {'data': {
+                'email': 'register@bench.example.com', 'password': 'a-long-password',
+                'full_name': 'Register', 'role': 'SEEKER',
+            }}),
+            ('public_jobs', None, 'get', '/api/jobs/public/', {}),
+            ('public_jobs_filtered', None, 'get', '/api/jobs/public/?status=open&employment_type=FULL_TIME', {}),
+            ('public_job_detail', None, 'get', f'/api/jobs/public/{job.pk}/', {}),
+            ('search_jobs', None, 'get', '/api/jobs/search/?q=python+developer', {}),
+            ('recommended_jobs', seeker, 'get', '/api/jobs/recommended/', {}),
+            ('employer_jobs', employer, 'get', '/api/jobs/employer/', {}),
+            ('create_job', employer, 'post', '/api/jobs/employer/', {'data': new_job}),
+            ('import_jobs', employer, 'post', '/api/jobs/employer/import/', {'data': {'file': upload}}),
+            ('employer_job_detail', employer, 'get', f'/api/jobs/employer/{job.pk}/', {}),
+            ('update_job', employer, 'put', f'/api/jobs/employer/{job.pk}/', {'data': {'title': job.title}}),
+            ('export_jobs', employer, 'get', '/api/jobs/employer/export/', {}),
+            ('job_applications', employer, 'get', f'/api/applications/job/{job.pk}/', {}),
+            ('export_job_applications', employer, 'get', f'/api/applications/job/{job.pk}/export/', {}),
+            ('update_application_status', employer, 'patch', f'/api/applications/{application_ids[0]}/status/',
+             {'data': {'status': 'REVIEWING'}}),
+            ('bulk_update_application_status', employer, 'patch', '/api/applications/status/bulk/',
+             {'data': {'status': 'REVIEWING', 'ids': application_ids}}),
+            ('employer_dashboard', employer, 'get', '/api/applications/employer/dashboard/', {}),
+            ('employer_funnel', employer, 'get', '/api/applications/employer/funnel/', {}),
+            ('my_applications', seeker, 'get', '/api/applications/my-applications/', {}),
+            ('apply_for_job', seeker, 'post', '/api/applications/apply/',
+             {'data': {'job': open_job.pk, 'resume_url': 'https://example.com/cv.pdf'}}),
+        ]
+        if settings.ASYNC_READ_VIEWS:
+            # Only routed when the async views are on
+            endpoints.append(('application_events', employer, 'get', '/api/applications/events/', {}))
+        return endpoints
+
+    def measure(self, user, method, url, kwargs, requests):
+        client = Client()
+        if user is not None:
+            client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {access_token(user)}'
+        files = [value for value in kwargs.get('data', {}).values() if hasattr(value, 'seek')]
+        if method != 'get' and not files:
+            kwargs = {**kwargs, 'content_type': 'application/json'}
+
+        timings = []
+        queries = 0
+        # One untimed run first, so in-process indexes (search, recommendations,
+        # near-duplicates) are built before the timed ones
+        for run in range(requests + 1):
+            # Cold caches, so every run exercises the database path
+            cache.clear()
+            for file in files:
+                file.seek(0)
+            # Writes are rolled back so each run sees the same data
+            with transaction.atomic(), CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = getattr(client, method)(url, **kwargs)
+                if response.streaming:
+                    drain(response)
+                elapsed = time.perf_counter() - start
+                transaction.set_rollback(True)
+            if response.status_code >= 400:
+                raise CommandError(f'{method.upper()} {url} returned {response.status_code}')
+            if run:
+                timings.append(elapsed)
+                queries = max(queries, len(captured))
+
+        timings.sort()
+        return {
+            'p50_ms': round(statistics.median(timings) * 1000, 2),
+            'p95_ms': round(timings[min(len(timings) - 1, int(0.95 * len(timings)))] * 1000, 2),
+            'queries': queries,
+        }
+
+    def compare(self, results, environment, options):
+        path = options['baseline']
+        try:
+            with open(path) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            baseline = None
+
+        if options['update_baseline']:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump({'_environment': environment, **results}, f, indent=2, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {path}'))
+            return
+        if baseline is None:
+            self.stdout.write(self.style.WARNING(f'No baseline at {path}; run with --update-baseline to create one'))
+            return
+        if baseline.get('_environment') != environment:
+            self.stdout.write(self.style.WARNING(
+                f"Baseline measured on {baseline.get('_environment')}, this run on {environment}; timings may not compare"
+            ))
+
+        failures = []
+        for name, result in results.items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            if result['queries'] > previous['queries']:
+                failures.append(f"{name}: {previous['queries']} -> {result['queries']} queries")
+            if result['p95_ms'] > previous['p95_ms'] * (1 + options['tolerance']):
+                failures.append(f"{name}: p95 {previous['p95_ms']:.1f} -> {result['p95_ms']:.1f} ms")
+        if failures:
+            raise CommandError('Regressions against the baseline:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
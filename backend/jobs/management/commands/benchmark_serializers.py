@@ -0,0 +1,85 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from jobs.models import Job
+from jobs.serializers import JobListRowSerializer, JobListSerializer, JobRowSerializer, JobSerializer
+from applications.models import Application
+from applications.serializers import (
+    ApplicationRowSerializer,
+    ApplicationSerializer,
+    MyApplicationRowSerializer,
+    MyApplicationSerializer,
+)
+
+
+class Command(BaseCommand):
+    help = 'Compare ModelSerializer and row serializer throughput (and output) on the current data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=5000, help='Rows per list (default 5000)')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per serializer; best is reported')
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+        cases = [
+            (
+                'public_jobs',
+                lambda: JobListSerializer(Job.objects.select_related('employer')[:limit], many=True).data,
+                lambda: JobListRowSerializer(Job.objects.values(*JobListRowSerializer.lookups())[:limit]).data,
+            ),
+            (
+                'employer_jobs',
+                lambda: JobSerializer(
+                    Job.objects.select_related('employer').with_application_counts()[:limit], many=True
+                ).data,
+                lambda: JobRowSerializer(
+                    Job.objects.with_application_counts().values(*JobRowSerializer.lookups())[:limit]
+                ).data,
+            ),
+            (
+                'job_applications',
+                lambda: ApplicationSerializer(
+                    Application.objects.select_related('seeker', 'job')[:limit], many=True
+                ).data,
+                lambda: ApplicationRowSerializer(
+                    Application.objects.values(*ApplicationRowSerializer.lookups())[:limit]
+                ).data,
+            ),
+            (
+                'my_applications',
+                lambda: MyApplicationSerializer(Application.objects.select_related('job')[:limit], many=True).data,
+                lambda: MyApplicationRowSerializer(
+                    Application.objects.values(*MyApplicationRowSerializer.lookups())[:limit]
+                ).data,
+            ),
+        ]
+
+        renderer = JSONRenderer()
+        for name, model_path, row_path in cases:
+            model_data, model_seconds = self._time(model_path, options['repeat'])
+            row_data, row_seconds = self._time(row_path, options['repeat'])
+
+            if renderer.render(model_data) != renderer.render(row_data):
+                raise CommandError(f'{name}: row serializer output differs from the ModelSerializer')
+
+            rows = len(row_data)
+            if not rows:
+                self.stdout.write(f'{name}: no rows, skipped')
+                continue
+            self.stdout.write(
+                f'{name}: {rows} rows | ModelSerializer {rows / model_seconds:,.0f} rows/s | '
+                f'row serializer {rows / row_seconds:,.0f} rows/s | {model_seconds / row_seconds:.1f}x'
+            )
+
+        self.stdout.write(self.style.SUCCESS('Outputs identical'))
+
+    def _time(self, build, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            data = build()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return data, best
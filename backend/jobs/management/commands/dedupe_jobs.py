@@ -0,0 +1,77 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from jobs import dedupe
+from jobs.cache import invalidate_public_jobs
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        'Fingerprint the existing jobs and flag near-duplicates (Job.duplicate_of) in one '
+        'streaming pass in creation order. Like at creation time, a job duplicates the most '
+        'similar earlier original that was still open when it was posted, so only those '
+        'originals are held in memory. Existing postings are always flagged, never rejected '
+        'or merged, since that would discard their applications. Rewritten jobs get a new '
+        'updated_at, which is how other processes\' in-process indexes pick up the flags.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, default=settings.JOB_DEDUPE_THRESHOLD,
+                            help='Estimated Jaccard similarity that makes a duplicate (default JOB_DEDUPE_THRESHOLD)')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Rows read, and rows written, per round trip (default 2000)')
+        parser.add_argument('--dry-run', action='store_true', help='Report without writing')
+
+    def handle(self, *args, **options):
+        threshold, chunk_size = options['threshold'], options['chunk_size']
+        if not 0 < threshold <= 1:
+            raise CommandError('--threshold must be in (0, 1]')
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        start = time.perf_counter()
+        index = dedupe.LSHIndex()
+        pending = []
+        seen = fingerprinted = flagged = cleared = 0
+        rows = (
+            Job.objects.order_by('created_at', 'id')
+            .values_list('id', 'employer_id', 'created_at', 'application_deadline',
+                         'title', 'description', 'minhash', 'duplicate_of_id')
+            .iterator(chunk_size)
+        )
+        for job_id, employer_id, created_at, deadline, title, description, minhash, duplicate_of in rows:
+            seen += 1
+            # Originals closed before this job was posted cannot be duplicated by it
+            index.expire(created_at)
+
+            signature = bytes(minhash) if minhash is not None else dedupe.fingerprint(title, description)
+            match = index.match(signature, threshold) if signature is not None else None
+            original = match.job_id if match else None
+            if signature is not None and original is None:
+                index.add(job_id, employer_id, deadline, signature)
+
+            if minhash is None or original != duplicate_of:
+                fingerprinted += minhash is None and signature is not None
+                flagged += original is not None and duplicate_of is None
+                cleared += original is None and duplicate_of is not None
+                pending.append(Job(pk=job_id, minhash=signature, duplicate_of_id=original, updated_at=timezone.now()))
+                if len(pending) >= chunk_size:
+                    self.write(pending, options['dry_run'])
+
+        self.write(pending, options['dry_run'])
+        if not options['dry_run']:
+            invalidate_public_jobs()
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {seen} jobs in {time.perf_counter() - start:.1f}s{" (dry run)" if options["dry_run"] else ""}: '
+            f'{fingerprinted} fingerprinted, {flagged} newly flagged as duplicates, {cleared} no longer duplicates'
+        ))
+
+    def write(self, jobs, dry_run):
+        if jobs and not dry_run:
+            # bulk_update() skips auto_now, so updated_at is set on each job above
+            Job.objects.bulk_update(jobs, ['minhash', 'duplicate_of', 'updated_at'])
+        jobs.clear()
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["-created_at", "id"], name="jobs_created_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:10
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    # GIN indexes and to_tsvector only exist on PostgreSQL; other databases
+    # use the in-process index in jobs.search
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "UPDATE jobs SET search_vector = "
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(location, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+    )
+    schema_editor.execute(
+        "CREATE INDEX jobs_search_vector_idx ON jobs USING gin (search_vector)"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS jobs_search_vector_idx")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0003_job_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0004_job_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["application_deadline"], name="jobs_deadline_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["employer", "application_deadline"],
+                name="jobs_employer_deadline_idx",
+            ),
+        ),
+    ]
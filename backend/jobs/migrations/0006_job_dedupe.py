@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0005_job_deadline_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="duplicate_of",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="duplicates",
+                to="jobs.job",
+            ),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="minhash",
+            field=models.BinaryField(null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0006_job_dedupe"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(fields=["updated_at"], name="jobs_updated_idx"),
+        ),
+    ]
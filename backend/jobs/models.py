@@ -1,7 +1,60 @@
+from datetime import timedelta
+
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils import timezone
 from users.models import User
 
+# How far back catch-up scans over updated_at re-read (see JobQuerySet.changed_since):
+# rows stamped before a scan whose transaction committed after it, or on a host
+# with a skewed clock, are still seen by the next scan
+CATCH_UP_OVERLAP = timedelta(minutes=1)
+
+
+class JobQuerySet(models.QuerySet):
+    def open(self, now=None):
+        """Jobs still accepting applications (deadline index range scan)"""
+        return self.filter(application_deadline__gte=now or timezone.now())
+
+    def closed(self, now=None):
+        """Jobs whose deadline has passed"""
+        return self.filter(application_deadline__lt=now or timezone.now())
+
+    def changed_since(self, since):
+        """
+        Jobs created or saved at or after ``since`` (updated_at index range
+        scan). Callers remember the scan's start minus CATCH_UP_OVERLAP as the
+        next ``since``. Deletions are not seen.
+        """
+        return self.filter(updated_at__gte=since)
+
+    def with_status(self, now=None):
+        """Annotate is_open_now, computed by the database, for filtering and ordering"""
+        return self.annotate(
+            is_open_now=models.ExpressionWrapper(
+                models.Q(application_deadline__gte=now or timezone.now()),
+                output_field=models.BooleanField(),
+            )
+        )
+
+    def with_application_counts(self):
+        """
+        Annotate application_count plus one applications_<status> count per
+        Application status, all in a single aggregated query.
+        """
+        annotations = {'application_count': models.Count('applications')}
+        for code in application_status_codes():
+            annotations[f'applications_{code.lower()}'] = models.Count(
+                'applications', filter=models.Q(applications__status=code)
+            )
+        return self.annotate(**annotations)
+
+
+def application_status_codes():
+    """Application status codes, read off the reverse relation to avoid a circular import"""
+    application_model = Job._meta.get_field('applications').related_model
+    return [code for code, _ in application_model.STATUS_CHOICES]
+
 
 class Job(models.Model):
     EMPLOYMENT_TYPE_CHOICES = [
@@ -17,17 +70,41 @@ class Job(models.Model):
     location = models.CharField(max_length=255)
     employment_type = models.CharField(max_length=20, choices=EMPLOYMENT_TYPE_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Lets in-process indexes catch up on writes made by other processes
+    updated_at = models.DateTimeField(auto_now=True)
     application_deadline = models.DateTimeField()
+    # Weighted title/location/description vector, maintained by jobs.search
+    search_vector = SearchVectorField(null=True, editable=False)
+    # MinHash of title + description, maintained by jobs.dedupe
+    minhash = models.BinaryField(null=True, editable=False)
+    # Set on near-duplicate reposts, which the public feed, search and recommendations skip
+    duplicate_of = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.SET_NULL, related_name='duplicates'
+    )
+
+    objects = JobQuerySet.as_manager()
 
     class Meta:
         db_table = 'jobs'
         ordering = ['-created_at']
+        indexes = [
+            # Backs the keyset-paginated public feed
+            models.Index(fields=['-created_at', 'id'], name='jobs_created_id_idx'),
+            # Open/closed filtering for the public feed and per-employer lists
+            models.Index(fields=['application_deadline'], name='jobs_deadline_idx'),
+            models.Index(fields=['employer', 'application_deadline'], name='jobs_employer_deadline_idx'),
+            # Catch-up scans of the in-process indexes (jobs.recommendations, jobs.dedupe)
+            models.Index(fields=['updated_at'], name='jobs_updated_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
     def is_open(self):
-        """Derive job status based on deadline"""
+        """
+        Derive job status based on deadline.
+        To filter many jobs use Job.objects.open()/closed() so the database does it.
+        """
         return self.application_deadline >= timezone.now()
 
     @property
@@ -0,0 +1,59 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, PageNumberPagination, _reverse_ordering
+
+
+class _FetchedRows:
+    """Stands in for the queryset once the page's rows have been fetched"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def order_by(self, *fields):
+        return self
+
+    def filter(self, **lookups):
+        return self
+
+    def __getitem__(self, item):
+        return self.rows
+
+
+class AsyncCursorPaginationMixin:
+    """
+    Adds apaginate_queryset for async views: the page is fetched with the
+    async ORM using the same ordering and keyset filter as paginate_queryset,
+    which then does the cursor bookkeeping on the fetched rows.
+    """
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        ordering = self.get_ordering(request, queryset, view)
+        cursor = self.decode_cursor(request)
+        offset, reverse, position = cursor or (0, False, None)
+
+        queryset = queryset.order_by(*(_reverse_ordering(ordering) if reverse else ordering))
+        if position is not None:
+            order = ordering[0]
+            lookup = 'lt' if cursor.reverse != order.startswith('-') else 'gt'
+            queryset = queryset.filter(**{f"{order.lstrip('-')}__{lookup}": position})
+
+        rows = [row async for row in queryset[offset:offset + page_size + 1]]
+        return self.paginate_queryset(_FetchedRows(rows), request, view)
+
+
+class JobCursorPagination(AsyncCursorPaginationMixin, CursorPagination):
+    """
+    Keyset pagination for job feeds, newest first.
+    Cursors stay stable while new jobs are posted and cost the same on every page.
+    """
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    ordering = ('-created_at', 'id')
+
+
+class JobSearchPagination(PageNumberPagination):
+    """Page-numbered pagination for relevance-ranked search results"""
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
@@ -16,4 +16,4 @@ class IsJobOwner(permissions.BasePermission):
     """
     
     def has_object_permission(self, request, view, obj):
-        return obj.employer == request.user
\ No newline at end of file
+        return obj.employer_id == request.user.pk
\ No newline at end of file
@@ -0,0 +1,359 @@
+"""
+"Recommended for you": open jobs ranked by TF-IDF cosine similarity to a
+seeker's profile, the centroid of the jobs they most recently applied to.
+
+Job term vectors are held in process. They are built once per process from
+the open jobs and then kept current by ``index_job`` / ``remove_job``, which
+the job views call next to the search hooks. Serving therefore never scans
+the jobs table. The queries it does run are:
+
+* the seeker's applied job ids, plus the text of any that are no longer
+  held because they closed,
+* the result rows,
+* every RECOMMENDATIONS_REFRESH_SECONDS, a scan of the jobs created or
+  saved since the previous one (Job.updated_at), which picks up other
+  processes' new jobs, edits and duplicate flags. Jobs other processes
+  delete linger until their deadline and are skipped when results load.
+
+With numpy and scipy installed the vectors are packed into a CSR matrix and
+a batch of profiles is scored with one sparse matrix product. Otherwise an
+inverted index computes the same scores in pure Python. Rows changed since
+the last pack are scored individually until the next pack.
+"""
+import heapq
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from itertools import chain
+
+from django.conf import settings
+from django.utils import timezone
+
+from applications.models import Application
+from .models import CATCH_UP_OVERLAP, Job
+from .search import FIELD_WEIGHTS, tokenize
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+# Weight of the employment type, treated as one extra term
+EMPLOYMENT_TYPE_WEIGHT = 2.0
+# Most recent applications that make up a profile
+PROFILE_SIZE = 50
+# Rows changed since the last pack before the matrix is packed again
+MAX_PENDING = 500
+TEXT_FIELDS = ('title', 'description', 'location', 'employment_type')
+
+
+def job_terms(title, description, location, employment_type):
+    """Field-weighted term frequencies of one job"""
+    weighted = Counter()
+    for field, text in (('title', title), ('description', description), ('location', location)):
+        for token in tokenize(text):
+            weighted[token] += FIELD_WEIGHTS[field]
+    weighted[f'type:{employment_type}'] += EMPLOYMENT_TYPE_WEIGHT
+    return weighted
+
+
+def _normalized(vector):
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    return {col: value / norm for col, value in vector.items()} if norm else {}
+
+
+class _PythonSnapshot:
+    """Packed rows as an inverted index: column -> [(job_id, weight)]"""
+
+    def __init__(self, rows, idf):
+        self.postings = defaultdict(list)
+        for job_id, (cols, tf, _) in rows.items():
+            for col, weight in _normalized({col: t * idf[col] for col, t in zip(cols, tf)}).items():
+                self.postings[col].append((job_id, weight))
+
+    def scores(self, profiles):
+        """One {job_id: score} per profile"""
+        results = []
+        for profile in profiles:
+            scores = defaultdict(float)
+            for col, weight in profile.items():
+                for job_id, value in self.postings.get(col, ()):
+                    scores[job_id] += weight * value
+            results.append(scores)
+        return results
+
+
+class _SparseSnapshot:
+    """Packed rows as an L2-normalized CSR matrix, one row per job"""
+
+    def __init__(self, rows, idf):
+        job_ids = list(rows)
+        lengths = np.fromiter((len(rows[job_id][0]) for job_id in job_ids), np.int64, len(job_ids))
+        indptr = np.concatenate(([0], np.cumsum(lengths)))
+        cols = np.fromiter(chain.from_iterable(rows[job_id][0] for job_id in job_ids), np.int32, indptr[-1])
+        data = np.fromiter(chain.from_iterable(rows[job_id][1] for job_id in job_ids), np.float64, indptr[-1])
+        data *= np.asarray(idf)[cols]
+        norms = np.sqrt(np.add.reduceat(data * data, indptr[:-1])) if len(data) else np.zeros(0)
+        data /= np.repeat(norms, lengths)
+        self.width = len(idf)
+        self.ids = np.asarray(job_ids, dtype=np.int64)
+        self.matrix = sparse.csr_matrix((data, cols, indptr), shape=(len(job_ids), self.width))
+
+    def scores(self, profiles):
+        """One {job_id: score} per profile, from a single sparse product"""
+        cols, values, indptr = [], [], [0]
+        for profile in profiles:
+            in_range = [(col, weight) for col, weight in profile.items() if col < self.width]
+            cols += [col for col, _ in in_range]
+            values += [weight for _, weight in in_range]
+            indptr.append(len(cols))
+        batch = sparse.csr_matrix((values, cols, indptr), shape=(len(profiles), self.width))
+        product = (self.matrix @ batch.T).tocsc()
+        results = []
+        for b in range(len(profiles)):
+            start, end = product.indptr[b], product.indptr[b + 1]
+            job_ids = self.ids[product.indices[start:end]].tolist()
+            results.append(dict(zip(job_ids, product.data[start:end].tolist())))
+        return results
+
+
+class JobVectors:
+    """
+    Term vectors of open jobs. ``rows`` maps job id to (columns, sublinear
+    term frequencies, deadline timestamp); IDF is derived from ``df``.
+    ``versions`` holds the updated_at each held job was indexed at.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.vocabulary = {}
+        self.df = Counter()
+        self.rows = {}
+        self.versions = {}
+        # Where the next refresh() scan starts; only refresh() moves it
+        self.cursor = None
+        self.refreshed_at = time.monotonic()
+        self._snapshot = None
+        self._idf = []
+        # Job ids added, changed or removed since the snapshot was packed
+        self._changed = set()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, job_id, title, description, location, employment_type, application_deadline, updated_at=None):
+        weighted = job_terms(title, description, location, employment_type)
+        with self._lock:
+            self._discard(job_id)
+            cols = tuple(self.vocabulary.setdefault(term, len(self.vocabulary)) for term in weighted)
+            tf = tuple(1 + math.log(weight) for weight in weighted.values())
+            self.rows[job_id] = (cols, tf, application_deadline.timestamp())
+            self.df.update(cols)
+            self.versions[job_id] = updated_at
+            self._changed.add(job_id)
+
+    def remove(self, job_id):
+        with self._lock:
+            self._discard(job_id)
+            self._changed.add(job_id)
+
+    def _discard(self, job_id):
+        self.versions.pop(job_id, None)
+        row = self.rows.pop(job_id, None)
+        if row is not None:
+            self.df.subtract(row[0])
+
+    def idf(self, col):
+        return math.log((1 + len(self.rows)) / (1 + self.df[col])) + 1
+
+    def pack(self, now=None):
+        """Drop expired rows, refresh IDF and rebuild the snapshot; pure in-memory work"""
+        now = (now or timezone.now()).timestamp()
+        with self._lock:
+            for job_id in [job_id for job_id, row in self.rows.items() if row[2] < now]:
+                self._discard(job_id)
+            self._idf = [self.idf(col) for col in range(len(self.vocabulary))]
+            snapshot_class = _PythonSnapshot if np is None else _SparseSnapshot
+            self._snapshot = snapshot_class(self.rows, self._idf)
+            self._changed.clear()
+
+    def vector(self, cols, tf, idf):
+        return _normalized({col: t * idf(col) for col, t in zip(cols, tf)})
+
+    def profile(self, jobs):
+        """Normalized centroid of ``jobs``, given as (cols, tf) pairs"""
+        centroid = Counter()
+        idf = self._snapshot_idf
+        for cols, tf in jobs:
+            centroid.update(self.vector(cols, tf, idf))
+        return _normalized(centroid)
+
+    def _snapshot_idf(self, col):
+        return self._idf[col] if col < len(self._idf) else self.idf(col)
+
+    def columns(self, weighted):
+        """Known columns and tf of a job that is not held, e.g. a closed one"""
+        known = [(self.vocabulary[term], weight) for term, weight in weighted.items() if term in self.vocabulary]
+        return tuple(col for col, _ in known), tuple(1 + math.log(weight) for _, weight in known)
+
+    def ensure_packed(self):
+        """Pack on first use and once too many rows changed since the last pack"""
+        with self._lock:
+            if self._snapshot is None or len(self._changed) > MAX_PENDING:
+                self.pack()
+
+    def top(self, profiles, excluded, limit, now=None):
+        """
+        Best ``limit`` (job_id, score) pairs per profile among jobs still
+        open, skipping each profile's ``excluded`` job ids.
+        """
+        now = (now or timezone.now()).timestamp()
+        with self._lock:
+            snapshot, changed = self._snapshot, set(self._changed)
+            pending = {
+                job_id: self.vector(*self.rows[job_id][:2], self._snapshot_idf)
+                for job_id in changed if job_id in self.rows
+            }
+
+        results = []
+        for profile, scores, skip in zip(profiles, snapshot.scores(profiles), excluded):
+            packed = ((job_id, score) for job_id, score in scores.items() if job_id not in changed)
+            extra = (
+                (job_id, sum(weight * vector.get(col, 0.0) for col, weight in profile.items()))
+                for job_id, vector in pending.items()
+            )
+            candidates = (
+                (job_id, score) for job_id, score in chain(packed, extra)
+                if score > 0 and job_id not in skip and self.is_open(job_id, now)
+            )
+            results.append(heapq.nlargest(limit, candidates, key=lambda item: (item[1], item[0])))
+        return results
+
+    def is_open(self, job_id, now):
+        row = self.rows.get(job_id)
+        return row is not None and row[2] >= now
+
+
+_vectors = None
+_build_lock = threading.Lock()
+
+
+def get_vectors():
+    """This process's JobVectors, built from the open jobs on first use"""
+    global _vectors
+    if _vectors is None:
+        with _build_lock:
+            if _vectors is None:
+                vectors = JobVectors()
+                started = timezone.now()
+                rows = (
+                    Job.objects.filter(application_deadline__gte=started, duplicate_of__isnull=True)
+                    .order_by()
+                    .values_list('id', *TEXT_FIELDS, 'application_deadline', 'updated_at')
+                )
+                for row in rows.iterator(chunk_size=2000):
+                    vectors.add(*row)
+                vectors.cursor = started - CATCH_UP_OVERLAP
+                _vectors = vectors
+    return _vectors
+
+
+def refresh(vectors, now):
+    """
+    Catch up, at most every RECOMMENDATIONS_REFRESH_SECONDS, on jobs other
+    processes created or saved since the last scan
+    """
+    if time.monotonic() - vectors.refreshed_at < settings.RECOMMENDATIONS_REFRESH_SECONDS:
+        return
+    vectors.refreshed_at = time.monotonic()
+    started = timezone.now()
+    rows = (
+        Job.objects.changed_since(vectors.cursor)
+        .order_by()
+        .values_list('id', *TEXT_FIELDS, 'application_deadline', 'duplicate_of_id', 'updated_at')
+    )
+    for job_id, *text, deadline, duplicate_of, updated_at in rows:
+        if deadline >= now and duplicate_of is None:
+            # Rows re-read by the overlap, or indexed by this process already, are skipped
+            if vectors.versions.get(job_id) != updated_at:
+                vectors.add(job_id, *text, deadline, updated_at)
+        elif job_id in vectors.rows:
+            vectors.remove(job_id)
+    vectors.cursor = started - CATCH_UP_OVERLAP
+
+
+def reset():
+    global _vectors
+    _vectors = None
+
+
+def index_job(job):
+    """Add or replace ``job``; closed jobs and duplicates are dropped. No-op until the vectors are built."""
+    if _vectors is None:
+        return
+    if job.application_deadline >= timezone.now() and job.duplicate_of_id is None:
+        _vectors.add(
+            job.pk, *(getattr(job, field) for field in TEXT_FIELDS), job.application_deadline, job.updated_at
+        )
+    else:
+        _vectors.remove(job.pk)
+
+
+def index_jobs(jobs):
+    for job in jobs:
+        index_job(job)
+
+
+def remove_job(job_id):
+    if _vectors is not None:
+        _vectors.remove(job_id)
+
+
+def recommend(seeker_ids, limit):
+    """
+    {seeker_id: [(job_id, score)]} for a batch of seekers, best first. Seekers
+    without applications get an empty list.
+    """
+    vectors = get_vectors()
+    now = timezone.now()
+    refresh(vectors, now)
+
+    applied = defaultdict(list)
+    rows = (
+        Application.objects.filter(seeker_id__in=seeker_ids)
+        .order_by('seeker_id', '-applied_at')
+        .values_list('seeker_id', 'job_id')
+    )
+    for seeker_id, job_id in rows:
+        applied[seeker_id].append(job_id)
+
+    # Recent applications to jobs that have closed since are no longer held
+    recent = {seeker_id: job_ids[:PROFILE_SIZE] for seeker_id, job_ids in applied.items()}
+    missing = {job_id for job_ids in recent.values() for job_id in job_ids if job_id not in vectors.rows}
+    closed = {}
+    if missing:
+        for job_id, *text in Job.objects.filter(pk__in=missing).values_list('id', *TEXT_FIELDS):
+            closed[job_id] = vectors.columns(job_terms(*text))
+
+    seekers, profiles, excluded = [], [], []
+    vectors.ensure_packed()
+    for seeker_id, job_ids in recent.items():
+        jobs = []
+        for job_id in job_ids:
+            row = vectors.rows.get(job_id)
+            if row is not None:
+                jobs.append(row[:2])
+            elif job_id in closed:
+                jobs.append(closed[job_id])
+        profile = vectors.profile(jobs)
+        if profile:
+            seekers.append(seeker_id)
+            profiles.append(profile)
+            excluded.append(set(applied[seeker_id]))
+
+    results = {seeker_id: [] for seeker_id in seeker_ids}
+    if profiles:
+        results.update(zip(seekers, vectors.top(profiles, excluded, limit, now)))
+    return results
@@ -0,0 +1,331 @@
+"""
+Ranked full-text search over job title, description and location.
+
+On PostgreSQL the ranking runs in the database against the stored
+``Job.search_vector`` column (GIN indexed). Other databases, such as the
+SQLite used in tests, fall back to an in-process inverted index.
+Both backends are kept current by ``index_job`` / ``remove_job``, which the
+job views call after every create, update and delete; the in-process index
+also catches up on the jobs other processes created or saved before each
+search (see Job.objects.changed_since). Near-duplicate reposts
+(``Job.duplicate_of``, see jobs.dedupe) are left out.
+"""
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CATCH_UP_OVERLAP, Job
+
+# Field weights, mirroring the A/B/C weights used for the Postgres vector
+FIELD_WEIGHTS = {'title': 3.0, 'location': 2.0, 'description': 1.0}
+POSTGRES_WEIGHTS = {'title': 'A', 'location': 'B', 'description': 'C'}
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+SNIPPET_WORDS = 30
+
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from in is it of on or the to with'.split()
+)
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Lower-case word tokens with stop words removed"""
+    return [t for t in TOKEN_RE.findall((text or '').lower()) if t not in STOP_WORDS]
+
+
+def job_search_vector():
+    """Weighted vector expression stored in Job.search_vector"""
+    vector = None
+    for field, weight in POSTGRES_WEIGHTS.items():
+        part = SearchVector(field, weight=weight, config='english')
+        vector = part if vector is None else vector + part
+    return vector
+
+
+class InvertedIndex:
+    """
+    Pure-Python inverted index with BM25 scoring.
+    Postings map a term to {job_id: weighted term frequency}.
+    ``versions`` holds the updated_at each indexed job was added at.
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.postings = defaultdict(dict)
+        self.doc_terms = {}
+        self.doc_lengths = {}
+        self.versions = {}
+        self.total_length = 0.0
+        # Where the next catch-up scan starts; only PythonSearchBackend.catch_up() moves it
+        self.cursor = None
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, job_id, title, description, location, updated_at=None):
+        weighted = Counter()
+        for field, text in (('title', title), ('description', description), ('location', location)):
+            for token in tokenize(text):
+                weighted[token] += FIELD_WEIGHTS[field]
+
+        with self._lock:
+            self.remove(job_id)
+            for token, tf in weighted.items():
+                self.postings[token][job_id] = tf
+            length = sum(weighted.values())
+            self.doc_terms[job_id] = tuple(weighted)
+            self.doc_lengths[job_id] = length
+            self.versions[job_id] = updated_at
+            self.total_length += length
+
+    def remove(self, job_id):
+        with self._lock:
+            self.versions.pop(job_id, None)
+            for token in self.doc_terms.pop(job_id, ()):
+                docs = self.postings.get(token)
+                if docs is not None:
+                    docs.pop(job_id, None)
+                    if not docs:
+                        del self.postings[token]
+            self.total_length -= self.doc_lengths.pop(job_id, 0.0)
+
+    def search(self, query):
+        """Return [(job_id, score)] for docs containing every query term, best first"""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            postings = [self.postings.get(term, {}) for term in terms]
+            if not all(postings):
+                return []
+            # Intersect starting from the rarest term
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for docs in postings[1:]:
+                candidates.intersection_update(docs)
+                if not candidates:
+                    return []
+
+            n_docs = len(self.doc_lengths)
+            avg_length = self.total_length / n_docs if n_docs else 0.0
+            scores = []
+            for job_id in candidates:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[job_id] / (avg_length or 1.0))
+                score = 0.0
+                for docs in postings:
+                    idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                    tf = docs[job_id]
+                    score += idf * tf * (self.k1 + 1) / (tf + norm)
+                scores.append((job_id, score))
+
+        scores.sort(key=lambda item: (-item[1], -item[0]))
+        return scores
+
+
+def highlight(text, query, max_words=SNIPPET_WORDS):
+    """Snippet of ``text`` around the first match with query terms wrapped in <mark>"""
+    terms = set(tokenize(query))
+    words = (text or '').split()
+    if not words:
+        return ''
+
+    def matches(word):
+        return any(t in terms for t in TOKEN_RE.findall(word.lower()))
+
+    first = next((i for i, word in enumerate(words) if matches(word)), 0)
+    start = max(0, min(first - max_words // 3, len(words) - max_words))
+    snippet = [
+        f'{HIGHLIGHT_START}{word}{HIGHLIGHT_STOP}' if matches(word) else word
+        for word in words[start:start + max_words]
+    ]
+    return ' '.join(snippet)
+
+
+class PythonSearchBackend:
+    """
+    Fallback backend that ranks in-process. The index is built lazily per
+    process, then caught up before each search on the jobs created or saved
+    since the previous scan, by this process or any other.
+    """
+
+    def __init__(self):
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self):
+        """The caught-up index, built on first use"""
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self.build()
+                    return self._index
+                index = self._index
+        self.catch_up(index)
+        return index
+
+    def build(self):
+        index = InvertedIndex()
+        started = timezone.now()
+        rows = (
+            Job.objects.filter(duplicate_of__isnull=True)
+            .order_by()
+            .values_list('id', 'title', 'description', 'location', 'updated_at')
+        )
+        for row in rows.iterator(chunk_size=2000):
+            index.add(*row)
+        index.cursor = started - CATCH_UP_OVERLAP
+        return index
+
+    def catch_up(self, index):
+        """Apply the jobs changed since ``index.cursor``: one updated_at range scan"""
+        started = timezone.now()
+        rows = list(
+            Job.objects.changed_since(index.cursor)
+            .order_by()
+            .values_list('id', 'title', 'description', 'location', 'duplicate_of_id', 'updated_at')
+        )
+        with index._lock:
+            for job_id, title, description, location, duplicate_of, updated_at in rows:
+                if duplicate_of is not None:
+                    index.remove(job_id)
+                # Rows re-read by the overlap, or indexed by this process already, are skipped
+                elif index.versions.get(job_id) != updated_at:
+                    index.add(job_id, title, description, location, updated_at)
+            index.cursor = max(index.cursor, started - CATCH_UP_OVERLAP)
+
+    def reset(self):
+        self._index = None
+
+    def index_job(self, job):
+        index = self._index
+        if index is None:
+            return
+        if job.duplicate_of_id is None:
+            index.add(job.pk, job.title, job.description, job.location, job.updated_at)
+        else:
+            index.remove(job.pk)
+
+    def index_jobs(self, jobs):
+        for job in jobs:
+            self.index_job(job)
+
+    def remove_job(self, job_id):
+        index = self._index
+        if index is not None:
+            index.remove(job_id)
+
+    def search(self, query, queryset):
+        """[(job_id, score)] matching ``query`` and present in ``queryset``, best first"""
+        ranked = self.index.search(query)
+        if ranked and queryset.query.has_filters():
+            # Only pay for the id__in round trip when filters narrowed the queryset
+            allowed = set(queryset.filter(pk__in=[pk for pk, _ in ranked]).values_list('pk', flat=True))
+            ranked = [(pk, score) for pk, score in ranked if pk in allowed]
+        return ranked
+
+    def results(self, page, query):
+        """Load a page of (job_id, score) pairs as jobs carrying rank and highlights"""
+        jobs = Job.objects.select_related('employer').in_bulk([pk for pk, _ in page])
+        results = []
+        for pk, score in page:
+            job = jobs.get(pk)
+            if job is None:
+                continue
+            job.rank = score
+            job.title_highlight = highlight(job.title, query)
+            job.description_highlight = highlight(job.description, query)
+            results.append(job)
+        return results
+
+
+class PostgresSearchBackend:
+    """Ranks with ts_rank over the GIN-indexed search_vector column"""
+
+    def index_job(self, job):
+        Job.objects.filter(pk=job.pk).update(search_vector=job_search_vector())
+
+    def index_jobs(self, jobs):
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(search_vector=job_search_vector())
+
+    def remove_job(self, job_id):
+        # The row and its vector are gone with the job itself
+        pass
+
+    def reset(self):
+        # Nothing is held in process
+        pass
+
+    def search(self, query, queryset):
+        """``queryset`` narrowed to matches and ordered by rank"""
+        search_query = SearchQuery(query, search_type='websearch', config='english')
+        return (
+            queryset
+            .filter(search_vector=search_query, duplicate_of__isnull=True)
+            .annotate(rank=SearchRank(F('search_vector'), search_query))
+            .order_by('-rank', '-created_at', '-id')
+        )
+
+    def results(self, page, query):
+        """Attach title/description headlines to a page of ranked jobs"""
+        search_query = SearchQuery(query, search_type='websearch', config='english')
+        pks = [job.pk for job in page]
+        headlines = {
+            pk: (title, description) for pk, title, description in
+            Job.objects.filter(pk__in=pks).annotate(
+                title_highlight=SearchHeadline(
+                    'title', search_query, config='english',
+                    start_sel=HIGHLIGHT_START, stop_sel=HIGHLIGHT_STOP, highlight_all=True,
+                ),
+                description_highlight=SearchHeadline(
+                    'description', search_query, config='english',
+                    start_sel=HIGHLIGHT_START, stop_sel=HIGHLIGHT_STOP, max_words=SNIPPET_WORDS,
+                ),
+            ).values_list('pk', 'title_highlight', 'description_highlight')
+        }
+        for job in page:
+            job.title_highlight, job.description_highlight = headlines.get(job.pk, (job.title, ''))
+        return page
+
+
+_backend = None
+
+
+def get_backend():
+    """Search backend for the default database (override with JOB_SEARCH_BACKEND)"""
+    global _backend
+    if _backend is None:
+        name = getattr(settings, 'JOB_SEARCH_BACKEND', None) or connection.vendor
+        _backend = PostgresSearchBackend() if name == 'postgresql' else PythonSearchBackend()
+    return _backend
+
+
+def index_job(job):
+    get_backend().index_job(job)
+
+
+def index_jobs(jobs):
+    """Index a batch of jobs, e.g. after bulk_create"""
+    get_backend().index_jobs(jobs)
+
+
+def remove_job(job_id):
+    get_backend().remove_job(job_id)
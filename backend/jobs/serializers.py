@@ -1,11 +1,27 @@
+from django.db.models import Count
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Job
+from .models import Job, application_status_codes
 
 
-class JobSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Lets callers pass ``fields=[...]`` to keep only those output fields
+    (see jobs.filters.parse_fields for the ?fields=/?exclude= parameters).
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class JobSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     status = serializers.CharField(read_only=True)
     employer_name = serializers.CharField(source='employer.full_name', read_only=True)
     application_count = serializers.SerializerMethodField()
+    application_status_counts = serializers.SerializerMethodField()
 
     class Meta:
         model = Job
@@ -20,13 +36,27 @@ class JobSerializer(serializers.ModelSerializer):
             'created_at',
             'application_deadline',
             'status',
+            'duplicate_of',
             'application_count',
+            'application_status_counts',
         ]
-        read_only_fields = ['id', 'employer', 'created_at']
+        read_only_fields = ['id', 'employer', 'created_at', 'duplicate_of']
 
     def get_application_count(self, obj):
+        # Annotated by Job.objects.with_application_counts(); count directly otherwise
+        if hasattr(obj, 'application_count'):
+            return obj.application_count
         return obj.applications.count()
 
+    def get_application_status_counts(self, obj):
+        codes = application_status_codes()
+        if hasattr(obj, 'application_count'):
+            return {code: getattr(obj, f'applications_{code.lower()}') for code in codes}
+        counts = dict(
+            obj.applications.order_by().values_list('status').annotate(total=Count('id'))
+        )
+        return {code: counts.get(code, 0) for code in codes}
+
     def validate_application_deadline(self, value):
         from django.utils import timezone
         if value <= timezone.now():
@@ -34,7 +64,7 @@ class JobSerializer(serializers.ModelSerializer):
         return value
 
 
-class JobListSerializer(serializers.ModelSerializer):
+class JobListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Lightweight serializer for job listings"""
     status = serializers.CharField(read_only=True)
     employer_name = serializers.CharField(source='employer.full_name', read_only=True)
@@ -50,4 +80,143 @@ class JobListSerializer(serializers.ModelSerializer):
             'application_deadline',
             'status',
             'employer_name',
-        ]
\ No newline at end of file
+        ]
+
+
+class JobPublicDetailSerializer(JobListSerializer):
+    """Public job page: the listing fields plus the full description"""
+
+    class Meta(JobListSerializer.Meta):
+        fields = JobListSerializer.Meta.fields + ['description']
+
+
+class JobSearchResultSerializer(JobListSerializer):
+    """Job listing plus relevance rank and <mark>-highlighted snippets"""
+    rank = serializers.FloatField(read_only=True)
+    highlights = serializers.SerializerMethodField()
+
+    class Meta(JobListSerializer.Meta):
+        fields = JobListSerializer.Meta.fields + ['rank', 'highlights']
+
+    def get_highlights(self, obj):
+        return {
+            'title': obj.title_highlight,
+            'description': obj.description_highlight,
+        }
+
+
+
+class RowSerializer:
+    """
+    Read-only fast path for list endpoints. Works on ``.values(*lookups)``
+    dicts instead of model instances and must produce exactly the JSON of
+    the ModelSerializer it mirrors; check with ``manage.py benchmark_serializers``.
+
+    ``get_fields()`` maps each output field to the lookup it reads, or to a
+    tuple of lookups when it needs several (it then receives the whole row).
+    A ``convert_<field>`` method, if defined, turns the value into its output.
+    """
+    fields = {}
+    _datetime = serializers.DateTimeField()
+
+    def __init__(self, rows, fields=None):
+        self.rows = rows
+        self.now = timezone.now()
+        specs = self.get_fields()
+        self.plan = [
+            (name, specs[name], getattr(self, f'convert_{name}', None))
+            for name in (fields or specs)
+        ]
+
+    @classmethod
+    def get_fields(cls):
+        return cls.fields
+
+    @classmethod
+    def lookups(cls, fields=None, always=()):
+        """Columns to pass to .values() for ``fields`` (all by default), plus ``always``"""
+        specs = cls.get_fields()
+        lookups = dict.fromkeys(always)
+        for name in (fields or specs):
+            spec = specs[name]
+            lookups.update(dict.fromkeys(spec if isinstance(spec, tuple) else (spec,)))
+        return list(lookups)
+
+    @classmethod
+    def datetime(cls, value):
+        return cls._datetime.to_representation(value)
+
+    def job_status(self, deadline):
+        return 'Open' if deadline >= self.now else 'Closed'
+
+    @property
+    def data(self):
+        return [self.to_representation(row) for row in self.rows]
+
+    def to_representation(self, row):
+        output = {}
+        for name, spec, convert in self.plan:
+            value = row if isinstance(spec, tuple) else row[spec]
+            output[name] = convert(value) if convert else value
+        return output
+
+
+class JobListRowSerializer(RowSerializer):
+    """Row counterpart of JobListSerializer"""
+    fields = {
+        'id': 'id',
+        'title': 'title',
+        'location': 'location',
+        'employment_type': 'employment_type',
+        'created_at': 'created_at',
+        'application_deadline': 'application_deadline',
+        'status': 'application_deadline',
+        'employer_name': 'employer__full_name',
+    }
+
+    def convert_created_at(self, value):
+        return self.datetime(value)
+
+    def convert_application_deadline(self, value):
+        return self.datetime(value)
+
+    def convert_status(self, value):
+        return self.job_status(value)
+
+
+class JobRowSerializer(JobListRowSerializer):
+    """
+    Row counterpart of JobSerializer. The count fields read annotations from
+    Job.objects.with_application_counts(); see needs_counts().
+    """
+    fields = {
+        'id': 'id',
+        'employer': 'employer_id',
+        'employer_name': 'employer__full_name',
+        'title': 'title',
+        'description': 'description',
+        'location': 'location',
+        'employment_type': 'employment_type',
+        'created_at': 'created_at',
+        'application_deadline': 'application_deadline',
+        'status': 'application_deadline',
+        'duplicate_of': 'duplicate_of_id',
+        'application_count': 'application_count',
+    }
+    count_fields = ('application_count', 'application_status_counts')
+
+    def __init__(self, rows, fields=None):
+        super().__init__(rows, fields)
+        self.status_counts = [(code, f'applications_{code.lower()}') for code in application_status_codes()]
+
+    @classmethod
+    def get_fields(cls):
+        status_lookups = tuple(f'applications_{code.lower()}' for code in application_status_codes())
+        return {**cls.fields, 'application_status_counts': status_lookups}
+
+    @classmethod
+    def needs_counts(cls, fields):
+        return not fields or any(name in cls.count_fields for name in fields)
+
+    def convert_application_status_counts(self, row):
+        return {code: row[lookup] for code, lookup in self.status_counts}
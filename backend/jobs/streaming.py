@@ -0,0 +1,127 @@
+"""
+Streaming CSV / NDJSON helpers shared by the import and export endpoints.
+Rows are produced one at a time so memory stays flat however many there are.
+"""
+import codecs
+import csv
+import io
+import json
+
+from datetime import datetime
+
+from django.http import StreamingHttpResponse
+from rest_framework.fields import DateTimeField
+from rest_framework.utils.encoders import JSONEncoder
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+# File extensions accepted for each format on upload
+EXTENSIONS = {
+    'csv': 'csv',
+    'ndjson': 'ndjson',
+    'jsonl': 'ndjson',
+}
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the csv writer's caller"""
+
+    def write(self, value):
+        return value
+
+
+# Timestamps are rendered like the API renders them (UTC, ``Z`` suffix) in both formats
+_DATETIME = DateTimeField()
+
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return _DATETIME.to_representation(value)
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def iter_csv(fields, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([_export_value(value) for value in row])
+
+
+def iter_ndjson(fields, rows):
+    encoder = JSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(fields, [_export_value(value) for value in row]))) + '\n'
+
+
+def streaming_export(fields, rows, file_format, filename):
+    """Stream ``rows`` (tuples ordered like ``fields``) as a CSV or NDJSON download"""
+    content = iter_csv(fields, rows) if file_format == 'csv' else iter_ndjson(fields, rows)
+    response = StreamingHttpResponse(content, content_type=FORMATS[file_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{file_format}"'
+    return response
+
+
+def detect_format(upload, requested=None):
+    """Format named by the request, else by the uploaded file's extension"""
+    if requested:
+        return requested if requested in FORMATS else None
+    extension = (upload.name or '').rsplit('.', 1)[-1].lower()
+    return EXTENSIONS.get(extension)
+
+
+def is_utf8(upload):
+    """Whether the whole upload decodes as UTF-8, checked a chunk at a time"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        for chunk in upload.chunks():
+            decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return False
+    finally:
+        upload.seek(0)
+    return True
+
+
+def iter_upload_rows(upload, file_format):
+    """
+    Yield (row_number, row_dict_or_error) from an uploaded file, reading it
+    line by line. CSV uploads must be valid UTF-8 (see is_utf8). NDJSON lines
+    that are not UTF-8 or not JSON objects are yielded as a ValueError.
+    """
+    if file_format == 'csv':
+        text = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        for number, row in enumerate(csv.DictReader(text), start=1):
+            yield number, row
+        return
+
+    number = 0
+    for line in upload.file:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line.decode('utf-8-sig'))
+        except UnicodeDecodeError:
+            yield number, ValueError('Line is not UTF-8 encoded')
+            continue
+        except ValueError as exc:
+            yield number, ValueError(f'Invalid JSON: {exc}')
+            continue
+        if not isinstance(row, dict):
+            yield number, ValueError('Each line must be a JSON object')
+            continue
+        yield number, row
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
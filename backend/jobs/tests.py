@@ -1,3 +1,501 @@
-from django.test import TestCase
+import csv
+import json
+import warnings
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from django.test import modify_settings, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITransactionTestCase
+
+from applications.models import Application
+from config.db_router import ReplicaRouter, health
+from config.renderers import FastJSONRenderer, msgpack
+from config.testing import QueryBudgetTestCase, access_token
+from users.models import User
+from . import dedupe, recommendations, views
+from .models import Job
+from .serializers import JobListRowSerializer, JobListSerializer, JobRowSerializer, JobSerializer
+
+
+class JobQueryBudgetTests(QueryBudgetTestCase):
+    """Query budgets for jobs.urls; list endpoints must not grow with the data"""
+
+    def setUp(self):
+        super().setUp()
+        self.jobs = self.create_jobs(self.employer, 5)
+        self.create_applications(self.jobs[:2], self.seekers)
+
+    def grow(self):
+        jobs = self.create_jobs(self.employer, 20) + self.create_jobs(self.create_user('EMPLOYER'), 20)
+        self.create_applications(jobs, self.seekers)
+
+    def test_public_jobs(self):
+        self.assertQueryBudget(1, 'get', '/api/jobs/public/?status=open&employment_type=FULL_TIME')
+        self.assertConstantQueries('get', '/api/jobs/public/', self.grow)
+
+    def test_public_jobs_served_from_cache(self):
+        for url in ('/api/jobs/public/', '/api/jobs/public/?status=open', f'/api/jobs/public/{self.jobs[0].pk}/'):
+            self.client.get(url)
+            with self.assertNumQueries(0):
+                self.client.get(url)
+
+    def test_public_jobs_conditional_request(self):
+        etag = self.client.get('/api/jobs/public/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/jobs/public/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_job_writes_invalidate_public_jobs(self):
+        self.login(self.employer)
+        upload = SimpleUploadedFile(
+            'jobs.csv',
+            b'title,description,location,employment_type,application_deadline\n'
+            b'Imported job,Description,Remote,FULL_TIME,2099-01-01T00:00:00Z\n',
+        )
+        new_job = {
+            'title': 'Created job',
+            'description': 'Services',
+            'location': 'Remote',
+            'employment_type': 'CONTRACT',
+            'application_deadline': '2099-01-01T00:00:00Z',
+        }
+        url = f'/api/jobs/employer/{self.jobs[0].pk}/'
+        writes = [
+            ('create', lambda: self.client.post('/api/jobs/employer/', new_job), 'Created job'),
+            ('update', lambda: self.client.put(url, {'title': 'Updated job'}), 'Updated job'),
+            ('import', lambda: self.client.post('/api/jobs/employer/import/', {'file': upload}), 'Imported job'),
+            ('delete', lambda: self.client.delete(url), None),
+        ]
+        for name, write, title in writes:
+            with self.subTest(name):
+                before = self.client.get('/api/jobs/public/')
+                self.assertLess(write().status_code, 300)
+                after = self.client.get('/api/jobs/public/', HTTP_IF_NONE_MATCH=before['ETag'])
+                self.assertEqual(after.status_code, 200)
+                self.assertNotEqual(after['ETag'], before['ETag'])
+                titles = [row['title'] for row in after.data['results']]
+                if title is None:
+                    self.assertNotIn('Updated job', titles)
+                else:
+                    self.assertIn(title, titles)
+
+    def test_public_job_detail(self):
+        self.assertQueryBudget(1, 'get', f'/api/jobs/public/{self.jobs[0].pk}/')
+
+    def test_search_jobs(self):
+        self.assertQueryBudget(3, 'get', '/api/jobs/search/?q=python')
+        self.assertConstantQueries('get', '/api/jobs/search/?q=python', self.grow)
+
+    def test_search_catches_up_on_other_processes(self):
+        self.client.get('/api/jobs/search/?q=python')
+        # Another process (plain ORM writes, no index_job) creates, edits and flags jobs
+        other = self.create_jobs(self.create_user('EMPLOYER'), 1)[0]
+        self.jobs[0].title = 'Rust engineer'
+        self.jobs[0].save()
+        self.jobs[1].duplicate_of = self.jobs[2]
+        self.jobs[1].save()
+
+        def found(query):
+            return {row['id'] for row in self.client.get(f'/api/jobs/search/?q={query}').data['results']}
+
+        self.assertEqual(found('rust'), {self.jobs[0].pk})
+        self.assertEqual(found('python'), {other.pk, *(job.pk for job in self.jobs[2:])})
+
+    def test_recommended_jobs(self):
+        self.login(self.seekers[0])
+        # The first request builds this process's job vectors
+        self.client.get('/api/jobs/recommended/')
+        response = self.assertQueryBudget(2, 'get', '/api/jobs/recommended/?limit=5')
+        self.assertEqual({row['id'] for row in response.data}, {job.pk for job in self.jobs[2:]})
+        self.assertConstantQueries(
+            'get', '/api/jobs/recommended/', lambda: self.create_jobs(self.create_user('EMPLOYER'), 40)
+        )
+
+    @override_settings(RECOMMENDATIONS_REFRESH_SECONDS=0)
+    def test_recommendations_catch_up_on_other_processes(self):
+        vectors = recommendations.get_vectors()
+        # This process indexes a job of its own, then another process (plain
+        # ORM writes, no index_job) creates one with a lower id, edits,
+        # closes and flags others
+        other = self.create_jobs(self.create_user('EMPLOYER'), 1)[0]
+        own = self.create_jobs(self.employer, 1)[0]
+        recommendations.index_job(own)
+        self.jobs[0].title = 'Rust engineer'
+        self.jobs[0].save()
+        self.jobs[1].application_deadline = timezone.now() - timedelta(days=1)
+        self.jobs[1].save()
+        self.jobs[2].duplicate_of = self.jobs[3]
+        self.jobs[2].save()
+
+        recommendations.refresh(vectors, timezone.now())
+        self.assertEqual(set(vectors.rows), {own.pk, other.pk, self.jobs[0].pk, *(job.pk for job in self.jobs[3:])})
+        self.assertIn(vectors.vocabulary['rust'], vectors.rows[self.jobs[0].pk][0])
+
+    def test_employer_jobs(self):
+        self.login(self.employer)
+        self.assertQueryBudget(1, 'get', '/api/jobs/employer/')
+        self.assertConstantQueries('get', '/api/jobs/employer/', self.grow)
+
+    def test_employer_jobs_sparse_fields_skip_counts(self):
+        self.login(self.employer)
+        _, queries = self.count_queries('get', '/api/jobs/employer/?fields=id,title')
+        self.assertNotIn('COUNT', queries[0]['sql'])
+        self.assertNotIn('description', queries[0]['sql'])
+
+    def test_create_job(self):
+        self.login(self.employer)
+        # Includes the near-duplicate index catching up on other processes' jobs;
+        # the response reads the employer and the counts in one query
+        response = self.assertQueryBudget(3, 'post', '/api/jobs/employer/', data={
+            'title': 'Go developer',
+            'description': 'Services',
+            'location': 'Remote',
+            'employment_type': 'CONTRACT',
+            'application_deadline': '2099-01-01T00:00:00Z',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['employer_name'], self.employer.full_name)
+        self.assertEqual(response.data['application_count'], 0)
+        self.assertEqual(set(response.data['application_status_counts'].values()), {0})
+
+    def test_create_near_duplicate_job(self):
+        self.login(self.employer)
+        job = {
+            'title': 'Senior Go developer',
+            'description': 'Design and run payment services in Go on Kubernetes, with Postgres and Kafka.',
+            'location': 'Remote',
+            'employment_type': 'CONTRACT',
+            'application_deadline': '2099-01-01T00:00:00Z',
+        }
+        original = self.client.post('/api/jobs/employer/', job).data['id']
+        repost = {**job, 'description': job['description'] + ' Apply now!'}
+
+        response = self.assertQueryBudget(3, 'post', '/api/jobs/employer/', data=repost)
+        self.assertEqual(response.data['duplicate_of'], original)
+        public = self.client.get('/api/jobs/public/').data['results']
+        self.assertEqual([row['id'] for row in public if row['title'] == job['title']], [original])
+
+        with self.settings(JOB_DEDUPE_ACTION='reject'):
+            response = self.client.post('/api/jobs/employer/', repost)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['duplicate_of'], original)
+
+        self.create_applications([Job.objects.get(pk=original)], self.seekers)
+        with self.settings(JOB_DEDUPE_ACTION='merge'):
+            response = self.assertQueryBudget(
+                6, 'post', '/api/jobs/employer/', data={**repost, 'location': 'Berlin'}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['id'], response.data['location']), (original, 'Berlin'))
+        self.assertEqual(response.data['application_count'], len(self.seekers))
+
+    def test_dedupe_index_catches_up_on_other_processes(self):
+        index = dedupe.get_index()
+        # Fixture jobs have no stored signature and are fingerprinted on read
+        self.assertEqual(set(index.jobs), {job.pk for job in self.jobs})
+        other = self.create_jobs(self.create_user('EMPLOYER'), 1)[0]
+        own = self.create_jobs(self.employer, 1)[0]
+        own.minhash = dedupe.fingerprint(own.title, own.description)
+        dedupe.index_job(own)
+        self.jobs[0].duplicate_of = self.jobs[1]
+        self.jobs[0].save()
+
+        index = dedupe.get_index()
+        self.assertEqual(set(index.jobs), {own.pk, other.pk, *(job.pk for job in self.jobs[1:])})
+
+    def test_employer_job_detail(self):
+        self.login(self.employer)
+        url = f'/api/jobs/employer/{self.jobs[0].pk}/'
+        self.assertQueryBudget(1, 'get', url)
+        self.assertQueryBudget(2, 'put', url, data={'title': 'Senior Python developer'})
+        # Cascades to the applications, their status log and the job's daily stats,
+        # and releases the job's near-duplicates
+        self.assertQueryBudget(7, 'delete', url)
+
+    def test_import_jobs(self):
+        self.login(self.employer)
+        rows = ''.join(
+            f'Job {i},Description,Remote,FULL_TIME,2099-01-01T00:00:00Z\n' for i in range(50)
+        )
+        upload = SimpleUploadedFile(
+            'jobs.csv',
+            ('title,description,location,employment_type,application_deadline\n' + rows).encode(),
+        )
+        response = self.assertQueryBudget(4, 'post', '/api/jobs/employer/import/', data={'file': upload})
+        self.assertEqual(response.data['created'], 50)
+
+    def test_import_non_utf8_jobs(self):
+        self.login(self.employer)
+        header = b'title,description,location,employment_type,application_deadline\n'
+        rows = b''.join(b'Job %d,Description,Remote,FULL_TIME,2099-01-01T00:00:00Z\n' % i for i in range(5))
+        # Latin-1 past the first rows: nothing is saved, whatever the batch size
+        upload = SimpleUploadedFile('jobs.csv', header + rows + b'Caf\xe9,Description,Remote,FULL_TIME,2099-01-01\n')
+        with self.settings(JOB_IMPORT_BATCH_SIZE=2):
+            response = self.client.post('/api/jobs/employer/import/', {'file': upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'file must be UTF-8 encoded'})
+        self.assertEqual(Job.objects.filter(title__startswith='Job ').count(), 0)
+
+        # NDJSON reports the undecodable lines and imports the rest
+        good = json.dumps({
+            'title': 'Job', 'description': 'Description', 'location': 'Remote',
+            'employment_type': 'FULL_TIME', 'application_deadline': '2099-01-01T00:00:00Z',
+        }).encode()
+        upload = SimpleUploadedFile('jobs.ndjson', b'\xff\xfe{}\n' + good + b'\n{"title": "Caf\xe9"}\n')
+        response = self.client.post('/api/jobs/employer/import/', {'file': upload})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 2))
+        self.assertEqual([error['row'] for error in response.data['errors']], [1, 3])
+        self.assertEqual(
+            response.data['errors'][0]['errors'], {'non_field_errors': ['Line is not UTF-8 encoded']}
+        )
+
+    def test_import_near_duplicate_jobs(self):
+        self.login(self.employer)
+        stacks = ['Spark Airflow', 'Django Celery', 'React Redux', 'Rust Tokio', 'Unity C#']
+        # Each posting twice; the second time with a trailing call to action
+        rows = ''.join(
+            f'{stack} engineer,Build and operate {stack} systems for our customers across Europe '
+            f'together with product designers and a small senior platform team'
+            f'{" - apply today" if i >= 5 else ""},Remote,FULL_TIME,2099-01-01T00:00:00Z\n'
+            for i, stack in enumerate(stacks * 2)
+        )
+        upload = SimpleUploadedFile(
+            'jobs.csv',
+            ('title,description,location,employment_type,application_deadline\n' + rows).encode(),
+        )
+        response = self.assertQueryBudget(5, 'post', '/api/jobs/employer/import/', data={'file': upload})
+        self.assertEqual((response.data['created'], response.data['flagged']), (10, 5))
+
+    def test_export_jobs(self):
+        self.login(self.employer)
+        response = self.client.get('/api/jobs/employer/export/')
+        with self.assertNumQueries(1):
+            body = b''.join(response.streaming_content)
+        self.assertEqual(len(body.splitlines()), 6)
+
+    def test_export_formats_agree(self):
+        self.login(self.employer)
+        csv_rows = list(csv.DictReader(
+            b''.join(self.client.get('/api/jobs/employer/export/').streaming_content).decode().splitlines()
+        ))
+        ndjson_rows = [
+            json.loads(line) for line in
+            b''.join(self.client.get('/api/jobs/employer/export/?file_format=ndjson').streaming_content).splitlines()
+        ]
+        self.assertEqual(len(csv_rows), len(ndjson_rows))
+        for csv_row, ndjson_row in zip(csv_rows, ndjson_rows):
+            self.assertEqual(csv_row, {field: str(value) for field, value in ndjson_row.items()})
+            self.assertTrue(csv_row['created_at'].endswith('Z'))
+
+
+class RowSerializerTests(QueryBudgetTestCase):
+    """Row serializers must render exactly what the ModelSerializers they mirror do"""
+
+    def setUp(self):
+        super().setUp()
+        jobs = self.create_jobs(self.employer, 2) + self.create_jobs(self.create_user('EMPLOYER'), 2, open=False)
+        self.create_applications(jobs[:3], self.seekers)
+        Application.objects.filter(job=jobs[0], seeker=self.seekers[0]).update(status='ACCEPTED')
+        # A whole-second timestamp has no fractional part in either output
+        Job.objects.filter(pk=jobs[1].pk).update(
+            duplicate_of=jobs[0], application_deadline=datetime(2099, 1, 1, tzinfo=dt_timezone.utc)
+        )
+
+    def assertSameOutput(self, model_data, row_data):
+        self.assertEqual(row_data, model_data)
+        self.assertEqual(JSONRenderer().render(row_data), JSONRenderer().render(model_data))
+
+    def test_job_list_rows(self):
+        model_data = JobListSerializer(Job.objects.select_related('employer').order_by('id'), many=True).data
+        rows = Job.objects.order_by('id').values(*JobListRowSerializer.lookups())
+        self.assertSameOutput(model_data, JobListRowSerializer(rows).data)
+        self.assertEqual({row['status'] for row in model_data}, {'Open', 'Closed'})
+
+    def test_job_rows(self):
+        jobs = Job.objects.select_related('employer').with_application_counts().order_by('id')
+        model_data = JobSerializer(jobs, many=True).data
+        rows = Job.objects.with_application_counts().order_by('id').values(*JobRowSerializer.lookups())
+        self.assertSameOutput(model_data, JobRowSerializer(rows).data)
+        self.assertEqual(model_data[0]['application_status_counts']['ACCEPTED'], 1)
+
+        fields = ['id', 'employer_name', 'created_at', 'duplicate_of']
+        model_data = JobSerializer(jobs, many=True, fields=fields).data
+        rows = Job.objects.order_by('id').values(*JobRowSerializer.lookups(fields))
+        self.assertSameOutput(model_data, JobRowSerializer(rows, fields).data)
+
+
+class RecordingReplicaRouter(ReplicaRouter):
+    """ReplicaRouter that remembers where it sent each read and write"""
+    routed = []
+
+    def db_for_read(self, model, **hints):
+        alias = super().db_for_read(model, **hints)
+        self.routed.append(('read', alias))
+        return alias
+
+    def db_for_write(self, model, **hints):
+        alias = super().db_for_write(model, **hints)
+        self.routed.append(('write', alias))
+        return alias
+
+
+@override_settings(JWT_ACTIVE_CHECK_TTL=0)
+@modify_settings(MIDDLEWARE={'prepend': 'config.db_router.ReplicaPinMiddleware'})
+class ReplicaRoutingTests(APITransactionTestCase):
+    """
+    Routing with a second alias mirroring the primary, like DB_REPLICA_HOSTS
+    sets up. Not a TestCase: reads inside a transaction always stay on the primary.
+    """
+
+    def setUp(self):
+        replica = {**settings.DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+        # The router is built afterwards, so it sees the replica alias
+        databases = override_settings(
+            DATABASES={**settings.DATABASES, 'replica_1': replica},
+            DATABASE_ROUTERS=['jobs.tests.RecordingReplicaRouter'],
+        )
+        with warnings.catch_warnings():
+            # Only replica_aliases() reads DATABASES; the connection is aliased below
+            warnings.simplefilter('ignore')
+            databases.enable()
+        self.addCleanup(databases.disable)
+        # A mirror: the replica alias reads the primary's rows through its connection
+        connections['replica_1'] = connections['default']
+        self.addCleanup(connections.__delitem__, 'replica_1')
+        cache.clear()
+        health.reset()
+        self.addCleanup(health.reset)
+        self.routed = RecordingReplicaRouter.routed
+        self.routed.clear()
+
+        self.employer = User.objects.create_user(
+            email='replica.employer@example.com', full_name='Employer', role='EMPLOYER'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token(self.employer)}')
+
+    def routes(self, method, url, **kwargs):
+        self.routed.clear()
+        response = getattr(self.client, method)(url, **kwargs)
+        self.assertLess(response.status_code, 300)
+        return set(self.routed)
+
+    def test_reads_replica_writes_primary_and_pins_writer(self):
+        self.assertEqual(self.routes('get', '/api/jobs/employer/'), {('read', 'replica_1')})
+
+        routes = self.routes('post', '/api/jobs/employer/', data={
+            'title': 'Go developer',
+            'description': 'Services',
+            'location': 'Remote',
+            'employment_type': 'CONTRACT',
+            'application_deadline': '2099-01-01T00:00:00Z',
+        })
+        self.assertIn(('write', 'default'), routes)
+        self.assertNotIn(('read', 'replica_1'), routes)
+
+        # The writer reads its own writes from the primary; others still use the replica
+        self.assertEqual(self.routes('get', '/api/jobs/employer/'), {('read', 'default')})
+        self.client.credentials()
+        self.assertEqual(self.routes('get', '/api/jobs/public/'), {('read', 'replica_1')})
+
+    def test_unhealthy_replica_falls_back_to_primary(self):
+        with mock.patch.object(health, 'check', return_value=False) as check:
+            self.assertEqual(self.routes('get', '/api/jobs/employer/'), {('read', 'default')})
+        check.assert_called_once_with('replica_1')
+
+
+class ResponseFormatTests(QueryBudgetTestCase):
+    """config.renderers / config.parsers: negotiation, MessagePack and orjson parity with DRF"""
+
+    def setUp(self):
+        super().setUp()
+        self.jobs = self.create_jobs(self.employer, 2)
+
+    def test_orjson_matches_drf_json(self):
+        data = {
+            'created_at': datetime(2024, 5, 1, 9, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            'deadline': datetime(2024, 6, 1, tzinfo=dt_timezone(timedelta(hours=2))),
+            'day': date(2024, 5, 1),
+            'salary': Decimal('1234.50'),
+            'ratio': Decimal('0.1'),
+            'title': gettext_lazy('Zürich – Senior'),
+            'nested': [{'counts': {1: 2}, 'none': None, 'flag': True}],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        job = JobSerializer(Job.objects.select_related('employer').with_application_counts().first()).data
+        self.assertEqual(FastJSONRenderer().render(job), JSONRenderer().render(job))
+
+    @skipUnless(msgpack, 'msgpack is not installed')
+    def test_negotiation(self):
+        as_json = self.client.get('/api/jobs/public/', HTTP_ACCEPT='application/json')
+        as_msgpack = self.client.get('/api/jobs/public/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(as_json['Content-Type'], 'application/json')
+        self.assertEqual(as_msgpack['Content-Type'], 'application/msgpack')
+        # Datetimes and the rest are encoded as in JSON
+        self.assertEqual(msgpack.unpackb(as_msgpack.content), json.loads(as_json.content))
+        self.assertNotEqual(as_json['ETag'], as_msgpack['ETag'])
+        self.assertEqual(self.client.get('/api/jobs/public/', HTTP_ACCEPT='text/csv').status_code, 406)
+
+    @skipUnless(msgpack, 'msgpack is not installed')
+    def test_msgpack_round_trip(self):
+        self.login(self.employer)
+        job = {
+            'title': 'Kotlin developer',
+            'description': 'Android apps – Zürich office',
+            'location': 'Zürich',
+            'employment_type': 'FULL_TIME',
+            'application_deadline': '2099-01-01T00:00:00Z',
+        }
+        response = self.client.post(
+            '/api/jobs/employer/', msgpack.packb(job), content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+        self.assertEqual(response.status_code, 201)
+        created = msgpack.unpackb(response.content)
+        self.assertEqual({key: created[key] for key in job}, job)
+        detail = self.client.get(f"/api/jobs/employer/{created['id']}/", HTTP_ACCEPT='application/json')
+        self.assertEqual(created, json.loads(detail.content))
+
+        # Malformed bodies are a 400 in either format
+        for body, content_type in ((b'\xc1', 'application/msgpack'), (b'{"title": ', 'application/json')):
+            response = self.client.post('/api/jobs/employer/', body, content_type=content_type)
+            self.assertEqual(response.status_code, 400)
+
+
+class AsyncReadViewTests(QueryBudgetTestCase):
+    """public_jobs_async must answer like public_jobs, cursors included"""
+
+    def setUp(self):
+        super().setUp()
+        self.open_jobs = self.create_jobs(self.employer, 5)
+        self.closed_jobs = self.create_jobs(self.create_user('EMPLOYER'), 3, open=False)
+
+    def test_public_jobs_pages(self):
+        forwards, backwards = self.walk_pages(
+            views.public_jobs, views.public_jobs_async, '/api/jobs/public/', query={'page_size': 3}
+        )
+        self.assertEqual([len(page) for page in forwards], [3, 3, 2])
+        self.assertEqual(
+            sorted(pk for page in forwards for pk in page), sorted(job.pk for job in self.open_jobs + self.closed_jobs)
+        )
+        self.assertEqual(backwards, forwards[::-1])
+
+    def test_public_jobs_filters(self):
+        body = self.assertSameAsSync(
+            views.public_jobs, views.public_jobs_async, '/api/jobs/public/', query={'status': 'closed', 'fields': 'id'}
+        )
+        self.assertEqual({row['id'] for row in body['results']}, {job.pk for job in self.closed_jobs})
+        self.assertEqual(set(body['results'][0]), {'id'})
+        body = self.assertSameAsSync(
+            views.public_jobs, views.public_jobs_async, '/api/jobs/public/', query={'status': 'bogus'}
+        )
+        self.assertIn('error', body)
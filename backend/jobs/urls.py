@@ -1,8 +1,17 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Async read view (see ASYNC_READ_VIEWS) shares filters and serializers with the sync one
+public_jobs = views.public_jobs_async if settings.ASYNC_READ_VIEWS else views.public_jobs
+
 urlpatterns = [
-    path('public/', views.public_jobs, name='public-jobs'),
+    path('public/', public_jobs, name='public-jobs'),
+    path('public/<int:pk>/', views.public_job_detail, name='public-job-detail'),
+    path('search/', views.search_jobs, name='search-jobs'),
+    path('recommended/', views.recommended_jobs, name='recommended-jobs'),
     path('employer/', views.employer_jobs, name='employer-jobs'),
+    path('employer/import/', views.import_employer_jobs, name='import-employer-jobs'),
+    path('employer/export/', views.export_employer_jobs, name='export-employer-jobs'),
     path('employer/<int:pk>/', views.employer_job_detail, name='employer-job-detail'),
 ]
\ No newline at end of file
@@ -1,39 +1,310 @@
+from django.conf import settings
+from django.db import transaction
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from applications.dashboard import invalidate_dashboard
+from applications.permissions import IsSeeker
+from config.async_views import async_api_view
 from .models import Job
-from .serializers import JobSerializer, JobListSerializer
+from .serializers import (
+    JobSerializer,
+    JobListSerializer,
+    JobListRowSerializer,
+    JobRowSerializer,
+    JobPublicDetailSerializer,
+    JobSearchResultSerializer,
+)
 from .permissions import IsEmployer, IsJobOwner
+from .filters import filter_jobs, parse_fields, InvalidFilter
+from .pagination import JobCursorPagination, JobSearchPagination
+from .cache import cache_public_response, invalidate_public_jobs
+from . import dedupe, recommendations, search
+from .streaming import FORMATS, batched, detect_format, is_utf8, iter_upload_rows, streaming_export
+
+DEFAULT_RECOMMENDATIONS = 10
+MAX_RECOMMENDATIONS = 50
+
+EXPORT_FIELDS = [
+    'id',
+    'title',
+    'description',
+    'location',
+    'employment_type',
+    'created_at',
+    'application_deadline',
+]
+
+
+def _public_jobs_rows(request):
+    """Filtered public feed as values() rows plus the requested fields; raises InvalidFilter"""
+    jobs = filter_jobs(Job.objects.filter(duplicate_of__isnull=True), request.query_params)
+    fields = parse_fields(request.query_params, JobListSerializer.Meta.fields)
+    # The cursor needs id and created_at even when they are not displayed
+    return jobs.values(*JobListRowSerializer.lookups(fields, always=('id', 'created_at'))), fields
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@cache_public_response
 def public_jobs(request):
-    """Public job listings - accessible to everyone"""
-    jobs = Job.objects.select_related('employer').all()
-    serializer = JobListSerializer(jobs, many=True)
+    """
+    Public job listings - accessible to everyone.
+    Cursor-paginated; filter with ?employment_type=, ?location= and ?status=open|closed,
+    pick output columns with ?fields= or ?exclude=
+    """
+    try:
+        jobs, fields = _public_jobs_rows(request)
+    except InvalidFilter as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    paginator = JobCursorPagination()
+    page = paginator.paginate_queryset(jobs, request)
+    serializer = JobListRowSerializer(page, fields)
+    return paginator.get_paginated_response(serializer.data)
+
+
+@async_api_view([AllowAny])
+@cache_public_response
+async def public_jobs_async(request):
+    """public_jobs for ASGI deployments, using the async ORM"""
+    try:
+        jobs, fields = _public_jobs_rows(request)
+    except InvalidFilter as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    paginator = JobCursorPagination()
+    page = await paginator.apaginate_queryset(jobs, request)
+    serializer = JobListRowSerializer(page, fields)
+    return paginator.get_paginated_response(serializer.data)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@cache_public_response
+def public_job_detail(request, pk):
+    """Public job page - accessible to everyone; supports ?fields= / ?exclude="""
+    try:
+        fields = parse_fields(request.query_params, JobPublicDetailSerializer.Meta.fields)
+    except InvalidFilter as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        job = Job.objects.select_related('employer').get(pk=pk)
+    except Job.DoesNotExist:
+        return Response(
+            {'error': 'Job not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    serializer = JobPublicDetailSerializer(job, fields=fields)
     return Response(serializer.data)
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def search_jobs(request):
+    """
+    Ranked full-text search over title, description and location.
+    Takes ?q= plus the same filters as the public feed
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response(
+            {'error': 'q is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        jobs = filter_jobs(Job.objects.select_related('employer'), request.query_params)
+    except InvalidFilter as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    backend = search.get_backend()
+    paginator = JobSearchPagination()
+    page = paginator.paginate_queryset(backend.search(query, jobs), request)
+    serializer = JobSearchResultSerializer(backend.results(page, query), many=True)
+    return paginator.get_paginated_response(serializer.data)
+
+
+@api_view(['GET'])
+@permission_classes([IsSeeker])
+def recommended_jobs(request):
+    """
+    Open jobs most similar to the ones the seeker applied to, best first,
+    each with its similarity score. Takes ?limit= (default 10).
+    """
+    try:
+        limit = int(request.query_params.get('limit', DEFAULT_RECOMMENDATIONS))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MAX_RECOMMENDATIONS:
+        return Response(
+            {'error': f'limit must be between 1 and {MAX_RECOMMENDATIONS}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    ranked = recommendations.recommend([request.user.pk], limit)[request.user.pk]
+    if not ranked:
+        return Response([])
+    rows = Job.objects.filter(pk__in=[pk for pk, _ in ranked]).values(*JobListRowSerializer.lookups())
+    rows = {row['id']: row for row in rows}
+    # Jobs deleted by another process since they were indexed drop out here
+    ranked = [(pk, score) for pk, score in ranked if pk in rows]
+    data = JobListRowSerializer([rows[pk] for pk, _ in ranked]).data
+    for item, (_, score) in zip(data, ranked):
+        item['score'] = round(score, 4)
+    return Response(data)
+
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsEmployer])
 def employer_jobs(request):
     """Employer job management"""
     
     if request.method == 'GET':
-        # Get all jobs for this employer
-        jobs = Job.objects.filter(employer=request.user).select_related('employer')
-        serializer = JobSerializer(jobs, many=True)
+        # Get all jobs for this employer, optionally filtered like the public feed
+        # and narrowed with ?fields=/?exclude= (the count query is skipped if unused)
+        try:
+            jobs = filter_jobs(Job.objects.filter(employer_id=request.user.pk), request.query_params)
+            fields = parse_fields(request.query_params, JobSerializer.Meta.fields)
+        except InvalidFilter as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if JobRowSerializer.needs_counts(fields):
+            jobs = jobs.with_application_counts()
+        serializer = JobRowSerializer(jobs.values(*JobRowSerializer.lookups(fields)), fields)
         return Response(serializer.data)
     
     elif request.method == 'POST':
         # Create new job
         serializer = JobSerializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save(employer=request.user)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        minhash, match = dedupe.screen(dedupe.get_index(), data['title'], data['description'])
+        action = dedupe.action_for(match, request.user.pk) if match else None
+        if action == 'reject':
+            return Response(
+                {'error': f'Near-duplicate of job {match.job_id}', 'duplicate_of': match.job_id},
+                status=status.HTTP_409_CONFLICT
+            )
+        if action == 'merge':
+            # The repost refreshes the employer's original posting instead
+            with transaction.atomic():
+                job = Job.objects.select_for_update().filter(pk=match.job_id).first()
+                if job is not None:
+                    dedupe.merge(job, Job(minhash=minhash, **data))
+                    job.save()
+            if job is not None:
+                search.index_job(job)
+                recommendations.index_job(job)
+                dedupe.index_job(job)
+                invalidate_dashboard(request.user.pk)
+                invalidate_public_jobs()
+                return _saved_job_response(job.pk, status.HTTP_200_OK)
+            match = None
+
+        job = serializer.save(
+            employer_id=request.user.pk, minhash=minhash, duplicate_of_id=match.job_id if match else None
+        )
+        search.index_job(job)
+        recommendations.index_job(job)
+        dedupe.index_job(job)
+        invalidate_dashboard(request.user.pk)
+        invalidate_public_jobs()
+        return _saved_job_response(job.pk, status.HTTP_201_CREATED)
+
+
+def _saved_job_response(pk, status_code):
+    """Render a job just written, reading its employer and application counts in one query"""
+    job = Job.objects.select_related('employer').with_application_counts().get(pk=pk)
+    return Response(JobSerializer(job).data, status=status_code)
+
+
+@api_view(['POST'])
+@permission_classes([IsEmployer])
+def import_employer_jobs(request):
+    """
+    Bulk-create jobs from an uploaded CSV or NDJSON file (multipart field "file").
+    Rows are validated like single job creation and inserted in batches;
+    invalid rows are skipped and reported by row number.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response(
+            {'error': 'file is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    file_format = detect_format(upload, request.data.get('file_format'))
+    if file_format is None:
+        return Response(
+            {'error': f'file_format must be one of: {", ".join(FORMATS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    # Checked before any batch is saved: a CSV reader cannot skip past a bad byte
+    if file_format == 'csv' and not is_utf8(upload):
+        return Response(
+            {'error': 'file must be UTF-8 encoded'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    created = merged = flagged = 0
+    errors = []
+    rows = iter_upload_rows(upload, file_format)
+    for batch in batched(rows, settings.JOB_IMPORT_BATCH_SIZE):
+        # Near-duplicates of open jobs or of earlier rows are handled per JOB_DEDUPE_ACTION
+        screen = dedupe.BatchScreen(request.user.pk)
+        for row_number, row in batch:
+            if isinstance(row, ValueError):
+                errors.append({'row': row_number, 'errors': {'non_field_errors': [str(row)]}})
+                continue
+            serializer = JobSerializer(data=row)
+            if serializer.is_valid():
+                error = screen.add(Job(employer_id=request.user.pk, **serializer.validated_data), f'row {row_number}')
+                if error:
+                    errors.append({'row': row_number, 'errors': {'non_field_errors': [error]}})
+            else:
+                errors.append({'row': row_number, 'errors': serializer.errors})
+        if screen:
+            with transaction.atomic():
+                jobs, updated = screen.save()
+                search.index_jobs(jobs + updated)
+            recommendations.index_jobs(jobs + updated)
+            dedupe.index_jobs(jobs + updated)
+            created += len(jobs)
+            merged += len(updated)
+            flagged += sum(job.duplicate_of_id is not None for job in jobs)
+
+    if created or merged:
+        invalidate_dashboard(request.user.pk)
+        invalidate_public_jobs()
+
+    return Response(
+        {'created': created, 'merged': merged, 'flagged': flagged, 'failed': len(errors), 'errors': errors},
+        status=status.HTTP_201_CREATED if created or merged or not errors else status.HTTP_400_BAD_REQUEST
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsEmployer])
+def export_employer_jobs(request):
+    """Stream this employer's jobs as ?file_format=csv (default) or ndjson"""
+    file_format = request.query_params.get('file_format', 'csv')
+    if file_format not in FORMATS:
+        return Response(
+            {'error': f'file_format must be one of: {", ".join(FORMATS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    rows = (
+        Job.objects.filter(employer_id=request.user.pk)
+        .order_by('-created_at', 'id')
+        .values_list(*EXPORT_FIELDS)
+        .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    )
+    return streaming_export(EXPORT_FIELDS, rows, file_format, 'jobs')
 
 
 @api_view(['GET', 'PUT', 'DELETE'])
@@ -41,8 +312,18 @@ def employer_jobs(request):
 def employer_job_detail(request, pk):
     """Manage individual job"""
     
+    fields = None
+    if request.method == 'GET':
+        try:
+            fields = parse_fields(request.query_params, JobSerializer.Meta.fields)
+        except InvalidFilter as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    jobs = Job.objects.select_related('employer')
+    if JobRowSerializer.needs_counts(fields):
+        jobs = jobs.with_application_counts()
     try:
-        job = Job.objects.get(pk=pk)
+        job = jobs.get(pk=pk)
     except Job.DoesNotExist:
         return Response(
             {'error': 'Job not found'},
@@ -50,23 +331,38 @@ def employer_job_detail(request, pk):
         )
     
     # Check object-level permission
-    if job.employer != request.user:
+    if job.employer_id != request.user.pk:
         return Response(
             {'error': 'You do not have permission to modify this job'},
             status=status.HTTP_403_FORBIDDEN
         )
     
     if request.method == 'GET':
-        serializer = JobSerializer(job)
+        serializer = JobSerializer(job, fields=fields)
         return Response(serializer.data)
     
     elif request.method == 'PUT':
         serializer = JobSerializer(job, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            data = serializer.validated_data
+            extra = {}
+            if dedupe.enabled() and ('title' in data or 'description' in data):
+                extra['minhash'] = dedupe.fingerprint(data.get('title', job.title), data.get('description', job.description))
+            job = serializer.save(**extra)
+            search.index_job(job)
+            recommendations.index_job(job)
+            dedupe.index_job(job)
+            invalidate_dashboard(request.user.pk)
+            invalidate_public_jobs()
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     elif request.method == 'DELETE':
+        job_id = job.pk
         job.delete()
+        search.remove_job(job_id)
+        recommendations.remove_job(job_id)
+        dedupe.remove_job(job_id)
+        invalidate_dashboard(request.user.pk)
+        invalidate_public_jobs()
         return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
@@ -0,0 +1,126 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.models import TokenUser
+
+from .models import User
+from .tokens import StreamToken
+
+
+class ClaimsUser(TokenUser):
+    """
+    Request user built from the email/role claims that login and register
+    put in the token, so role checks need no database lookup.
+    """
+
+    @cached_property
+    def email(self):
+        return self.token.get('email', '')
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', '')
+
+    def is_employer(self):
+        return self.role == 'EMPLOYER'
+
+    def is_seeker(self):
+        return self.role == 'SEEKER'
+
+
+def _active_key(user_id):
+    return f'user-active:{user_id}'
+
+
+def active_role(user_id):
+    """
+    Role of the user if they still exist and are active, '' otherwise; cached
+    for JWT_ACTIVE_CHECK_TTL seconds, or until users.signals forgets it
+    """
+    role = cache.get(_active_key(user_id))
+    if role is None:
+        role = User.objects.filter(pk=user_id, is_active=True).values_list('role', flat=True).first() or ''
+        cache.set(_active_key(user_id), role, timeout=settings.JWT_ACTIVE_CHECK_TTL)
+    return role
+
+
+async def aactive_role(user_id):
+    """Async active_role, for async views"""
+    role = await cache.aget(_active_key(user_id))
+    if role is None:
+        role = await User.objects.filter(pk=user_id, is_active=True).values_list('role', flat=True).afirst() or ''
+        await cache.aset(_active_key(user_id), role, timeout=settings.JWT_ACTIVE_CHECK_TTL)
+    return role
+
+
+def forget_user_status(user_id):
+    """Drop the cached status so the next request re-reads it (e.g. after deactivation)"""
+    cache.delete(_active_key(user_id))
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWT authentication that trusts the signed claims instead of loading the
+    User row on every request. Tokens of deactivated or deleted users, or
+    whose role claim is out of date, are still rejected: the status is
+    re-checked at most once per JWT_ACTIVE_CHECK_TTL, and at once after the
+    user is saved (set it to 0 to skip the check entirely).
+    """
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if settings.JWT_ACTIVE_CHECK_TTL and active_role(user.pk) != user.role:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
+
+    async def aauthenticate(self, request):
+        """authenticate() for config.async_views: only the active-user check touches I/O"""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if settings.JWT_ACTIVE_CHECK_TTL and await aactive_role(user.pk) != user.role:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
+
+
+class QueryTokenAuthentication(StatelessJWTAuthentication):
+    """
+    Also accepts a stream token (users.tokens.StreamToken) as ?token=, for
+    EventSource clients, which cannot send headers. Access tokens are refused
+    there: query strings end up in access logs, so only a token that expires
+    within EVENTS_TOKEN_LIFETIME and opens nothing but streams may travel in one.
+    """
+
+    def authenticate(self, request):
+        validated_token = self.get_query_token(request)
+        if validated_token is None:
+            return super().authenticate(request)
+        return self.get_user(validated_token), validated_token
+
+    async def aauthenticate(self, request):
+        validated_token = self.get_query_token(request)
+        if validated_token is None:
+            return await super().aauthenticate(request)
+        return await self.aget_user(validated_token), validated_token
+
+    def get_query_token(self, request):
+        """The validated ?token= stream token, or None when the request has a header or no token"""
+        raw_token = request.query_params.get('token')
+        if not raw_token or self.get_header(request) is not None:
+            return None
+        try:
+            return StreamToken(raw_token)
+        except TokenError as exc:
+            raise InvalidToken({'detail': _('Given token not valid for streams'), 'messages': [str(exc)]})
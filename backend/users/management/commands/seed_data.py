@@ -1,148 +1,263 @@
-from django.core.management.base import BaseCommand
-from django.utils import timezone
+import random
+import time
 from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, router
+from django.utils import timezone
+
 from users.models import User
+from jobs import dedupe, recommendations, search
+from jobs.cache import invalidate_public_jobs
 from jobs.models import Job
-from applications.models import Application
+from jobs.streaming import batched
+from applications import funnel
+from applications.models import (
+    Application,
+    ApplicationStatusChange,
+    EmployerDailyStats,
+    JobDailyStats,
+    SweepWatermark,
+)
 
+PASSWORD = 'password123'
 
-class Command(BaseCommand):
-    help = 'Seed database with sample data'
+FIRST_NAMES = ['John', 'Jane', 'Mike', 'Amaka', 'Tunde', 'Grace', 'David', 'Fatima', 'Chidi', 'Sara']
+LAST_NAMES = ['Doe', 'Smith', 'Johnson', 'Okafor', 'Bello', 'Adams', 'Eze', 'Musa', 'Brown', 'Lee']
+COMPANY_WORDS = ['Tech', 'Data', 'Cloud', 'Green', 'Blue', 'Bright', 'Nova', 'Apex', 'Prime', 'Core']
+COMPANY_SUFFIXES = ['Corp HR', 'Inc', 'Labs', 'Solutions', 'Systems', 'Group']
+LEVELS = ['Junior', 'Mid-level', 'Senior', 'Lead', 'Principal']
+ROLES = [
+    ('Python Developer', 'Build and maintain Django services and REST APIs.'),
+    ('Frontend React Developer', 'Build user interfaces with React and TypeScript.'),
+    ('DevOps Engineer', 'Manage cloud infrastructure and CI/CD pipelines.'),
+    ('Data Analyst', 'Turn product data into dashboards and insights with SQL.'),
+    ('Data Engineer', 'Design batch and streaming data pipelines.'),
+    ('Mobile Developer', 'Ship iOS and Android apps with React Native.'),
+    ('QA Engineer', 'Automate end-to-end and API test suites.'),
+    ('Product Designer', 'Design flows, prototypes and design systems.'),
+    ('Machine Learning Engineer', 'Train, evaluate and deploy ML models.'),
+    ('Support Engineer', 'Resolve customer issues and improve tooling.'),
+]
+LOCATIONS = ['Remote', 'New York, NY', 'San Francisco, CA', 'Boston, MA', 'Lagos', 'Abuja', 'London', 'Berlin']
+# Relative frequency of each application status
+STATUS_WEIGHTS = {'NEW': 50, 'REVIEWING': 25, 'ACCEPTED': 10, 'REJECTED': 15}
 
-    def handle(self, *args, **kwargs):
-        self.stdout.write('Seeding database...')
 
-        # Clear existing data
-        Application.objects.all().delete()
-        Job.objects.all().delete()
-        User.objects.filter(is_superuser=False).delete()
-
-        # Create Employers
-        employer1 = User.objects.create_user(
-            email='employer1@example.com',
-            password='password123',
-            full_name='Tech Corp HR',
-            role='EMPLOYER'
-        )
+def create_backdated(model, objs, field):
+    """
+    bulk_create() ``objs``, then write back the generated values of ``field``
+    (an auto_now_add field, which the insert stamps with now()): one
+    UPDATE ... FROM (VALUES ...) per batch rather than bulk_update()'s CASE
+    with one branch per row.
+    """
+    stamps = [getattr(obj, field) for obj in objs]
+    created = model.objects.bulk_create(objs)
 
-        employer2 = User.objects.create_user(
-            email='employer2@example.com',
-            password='password123',
-            full_name='StartUp Inc',
-            role='EMPLOYER'
-        )
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    model_field = model._meta.get_field(field)
+    # SQLite caps parameters per statement; PostgreSQL's protocol caps them at 65535
+    batch_size = (connection.features.max_query_params or 65535) // 2
+    with connection.cursor() as cursor:
+        for start in range(0, len(created), batch_size):
+            params = []
+            for obj, stamp in zip(created[start:start + batch_size], stamps[start:start + batch_size]):
+                setattr(obj, field, stamp)
+                params += [obj.pk, model_field.get_db_prep_value(stamp, connection)]
+            # VALUES columns are named column1, column2... in both databases
+            cursor.execute(
+                f'UPDATE {table} SET {quote(model_field.column)} = stamps.column2 '
+                f'FROM (VALUES {", ".join(["(%s, %s)"] * (len(params) // 2))}) AS stamps '
+                f'WHERE {table}.{quote(model._meta.pk.column)} = stamps.column1',
+                params,
+            )
+    return created
 
-        # Create Seekers
-        seeker1 = User.objects.create_user(
-            email='seeker1@example.com',
-            password='password123',
-            full_name='John Doe',
-            role='SEEKER'
-        )
 
-        seeker2 = User.objects.create_user(
-            email='seeker2@example.com',
-            password='password123',
-            full_name='Jane Smith',
-            role='SEEKER'
-        )
+class Command(BaseCommand):
+    help = (
+        'Reset the database and generate sample data. The defaults give a small demo set; '
+        'raise the scale options to build multi-million-row datasets for load testing.'
+    )
 
-        seeker3 = User.objects.create_user(
-            email='seeker3@example.com',
-            password='password123',
-            full_name='Mike Johnson',
-            role='SEEKER'
-        )
+    def add_arguments(self, parser):
+        parser.add_argument('--employers', type=int, default=2)
+        parser.add_argument('--seekers', type=int, default=3)
+        parser.add_argument('--jobs-per-employer', type=int, default=2)
+        parser.add_argument('--applications-per-job', type=int, default=2,
+                            help='Capped at the number of seekers (one application per seeker per job)')
+        parser.add_argument('--open-ratio', type=float, default=0.75,
+                            help='Share of jobs whose deadline is still ahead (default 0.75)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT (default 5000)')
+        parser.add_argument('--no-reset', action='store_true', help='Keep existing data (emails must not clash)')
 
-        # Create Open Jobs
-        job1 = Job.objects.create(
-            employer=employer1,
-            title='Senior Python Developer',
-            description='Looking for an experienced Python developer with Django expertise.',
-            location='New York, NY',
-            employment_type='FULL_TIME',
-            application_deadline=timezone.now() + timedelta(days=30)
-        )
+    def handle(self, *args, **options):
+        if not 0 <= options['open_ratio'] <= 1:
+            raise CommandError('--open-ratio must be between 0 and 1')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
 
-        job2 = Job.objects.create(
-            employer=employer1,
-            title='Frontend React Developer',
-            description='Join our team to build amazing user interfaces.',
-            location='Remote',
-            employment_type='FULL_TIME',
-            application_deadline=timezone.now() + timedelta(days=45)
-        )
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        start = time.perf_counter()
 
-        job3 = Job.objects.create(
-            employer=employer2,
-            title='DevOps Engineer',
-            description='Manage cloud infrastructure and CI/CD pipelines.',
-            location='San Francisco, CA',
-            employment_type='CONTRACT',
-            application_deadline=timezone.now() + timedelta(days=20)
-        )
+        if not options['no_reset']:
+            self.stdout.write('Clearing existing data...')
+            self.reset()
 
-        # Create Closed Job
-        job4 = Job.objects.create(
-            employer=employer2,
-            title='Data Analyst Intern',
-            description='Summer internship position for data analysis.',
-            location='Boston, MA',
-            employment_type='INTERNSHIP',
-            application_deadline=timezone.now() - timedelta(days=5)
+        self.stdout.write('Seeding database...')
+        # One PBKDF2 hash shared by every account instead of one per user
+        password = make_password(PASSWORD)
+        employer_ids = self.create_users('EMPLOYER', options['employers'], password)
+        seeker_ids = self.create_users('SEEKER', options['seekers'], password)
+        jobs, applications = self.create_jobs(
+            employer_ids, seeker_ids,
+            options['jobs_per_employer'],
+            min(options['applications_per_job'], len(seeker_ids)),
+            options['open_ratio'],
         )
+        invalidate_public_jobs()
 
-        # Create Applications
-        Application.objects.create(
-            job=job1,
-            seeker=seeker1,
-            resume_url='https://example.com/resumes/john-doe.pdf',
-            status='NEW'
-        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Database seeded successfully! {len(employer_ids)} employers, {len(seeker_ids)} seekers, '
+            f'{jobs} jobs, {applications} applications in {time.perf_counter() - start:.1f}s'
+        ))
+        self.stdout.write('\nTest Accounts:')
+        for role in ('employer', 'seeker'):
+            self.stdout.write(f'{role.title()} 1: {role}1@example.com / {PASSWORD}')
 
-        Application.objects.create(
-            job=job1,
-            seeker=seeker2,
-            resume_url='https://example.com/resumes/jane-smith.pdf',
-            status='REVIEWING'
-        )
+    def reset(self):
+        """
+        Empty jobs, applications and their stats with TRUNCATE (DELETE where unsupported)
+        and drop non-superusers with one DELETE, bypassing the Python-side
+        cascade collector that loads every row first.
+        """
+        quote = connection.ops.quote_name
+        models = [ApplicationStatusChange, JobDailyStats, EmployerDailyStats, SweepWatermark, Application, Job]
+        tables = [quote(model._meta.db_table) for model in models]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'TRUNCATE {", ".join(tables)} RESTART IDENTITY CASCADE')
+            else:
+                for table in tables:
+                    cursor.execute(f'DELETE FROM {table}')
 
-        Application.objects.create(
-            job=job1,
-            seeker=seeker3,
-            resume_url='https://example.com/resumes/mike-johnson.pdf',
-            status='ACCEPTED'
-        )
+            # Apart from jobs/applications only these tables point at users
+            for model in (User.groups.through, User.user_permissions.through):
+                model.objects.filter(user__is_superuser=False).delete()
+            LogEntry = User._meta.get_field('logentry').related_model
+            LogEntry.objects.filter(user__is_superuser=False).delete()
+            cursor.execute(f'DELETE FROM {quote(User._meta.db_table)} WHERE NOT is_superuser')
 
-        Application.objects.create(
-            job=job2,
-            seeker=seeker1,
-            resume_url='https://example.com/resumes/john-doe.pdf',
-            status='REJECTED'
-        )
+        # Ids may be reused, so nothing cached about the old rows can be trusted
+        cache.clear()
+        search.get_backend().reset()
+        recommendations.reset()
+        dedupe.reset()
 
-        Application.objects.create(
-            job=job2,
-            seeker=seeker2,
-            resume_url='https://example.com/resumes/jane-smith.pdf',
-            status='NEW'
-        )
+    def create_users(self, role, count, password):
+        prefix = role.lower()
+        if role == 'EMPLOYER':
+            name = lambda: f'{self.rng.choice(COMPANY_WORDS)} {self.rng.choice(COMPANY_SUFFIXES)}'
+        else:
+            name = lambda: f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}'
 
-        Application.objects.create(
-            job=job3,
-            seeker=seeker3,
-            resume_url='https://example.com/resumes/mike-johnson.pdf',
-            status='ACCEPTED'
+        users = (
+            User(
+                email=f'{prefix}{n}@example.com',
+                full_name=name(),
+                role=role,
+                password=password,
+                created_at=self.now - timedelta(days=self.rng.randint(30, 365)),
+            )
+            for n in range(1, count + 1)
+        )
+        for batch in batched(users, self.batch_size):
+            User.objects.bulk_create(batch)
+        return list(
+            User.objects.filter(role=role, email__startswith=prefix, email__endswith='@example.com')
+            .order_by('id').values_list('id', flat=True)
         )
 
-        self.stdout.write(self.style.SUCCESS('Database seeded successfully!'))
-        self.stdout.write('\nTest Accounts:')
-        self.stdout.write('Employer 1: employer1@example.com / password123')
-        self.stdout.write('Employer 2: employer2@example.com / password123')
-        self.stdout.write('Seeker 1: seeker1@example.com / password123')
-        self.stdout.write('Seeker 2: seeker2@example.com / password123')
-        self.stdout.write('Seeker 3: seeker3@example.com / password123')
+    def generate_jobs(self, employer_ids, per_employer, open_ratio):
+        types = [code for code, _ in Job.EMPLOYMENT_TYPE_CHOICES]
+        # Near-duplicate fingerprints, as job creation would store them; titles repeat, so each is computed once
+        signatures = {}
+        for employer_id in employer_ids:
+            for _ in range(per_employer):
+                title, description = self.rng.choice(ROLES)
+                title = f'{self.rng.choice(LEVELS)} {title}'
+                if dedupe.enabled() and title not in signatures:
+                    signatures[title] = dedupe.fingerprint(title, description)
+                created_at = self.now - timedelta(days=self.rng.randint(1, 90), seconds=self.rng.randint(0, 86399))
+                if self.rng.random() < open_ratio:
+                    deadline = self.now + timedelta(days=self.rng.randint(1, 60))
+                else:
+                    deadline = self.now - timedelta(days=self.rng.randint(1, 30))
+                yield Job(
+                    employer_id=employer_id,
+                    title=title,
+                    description=description,
+                    minhash=signatures.get(title),
+                    location=self.rng.choice(LOCATIONS),
+                    employment_type=self.rng.choice(types),
+                    created_at=created_at,
+                    application_deadline=max(deadline, created_at + timedelta(days=1)),
+                )
+
+    def generate_applications(self, jobs, seeker_ids, per_job):
+        statuses, weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+        for job in jobs:
+            window = max(1, int((min(self.now, job.application_deadline) - job.created_at).total_seconds()))
+            for seeker_id in self.rng.sample(seeker_ids, per_job):
+                yield Application(
+                    job_id=job.pk,
+                    seeker_id=seeker_id,
+                    resume_url=f'https://example.com/resumes/{seeker_id}.pdf',
+                    status=self.rng.choices(statuses, weights)[0],
+                    applied_at=job.created_at + timedelta(seconds=self.rng.randrange(window)),
+                )
 
+    def status_change(self, application):
+        """A NEW -> status change for an application past NEW, some time after it was made"""
+        delay = timedelta(seconds=self.rng.randint(10 * 60, 14 * 24 * 60 * 60))
+        return ApplicationStatusChange(
+            application_id=application.pk,
+            from_status='NEW',
+            to_status=application.status,
+            changed_at=min(application.applied_at + delay, self.now),
+        )
 
+    def create_jobs(self, employer_ids, seeker_ids, per_employer, per_job, open_ratio):
+        """Insert jobs a batch at a time, each followed by its applications, so memory stays flat"""
+        job_total = application_total = 0
+        for batch in batched(self.generate_jobs(employer_ids, per_employer, open_ratio), self.batch_size):
+            jobs = create_backdated(Job, batch, 'created_at')
+            search.index_jobs(jobs)
+            job_total += len(jobs)
+            employers = {job.pk: job.employer_id for job in jobs}
+            for applications in batched(self.generate_applications(jobs, seeker_ids, per_job), self.batch_size):
+                create_backdated(Application, applications, 'applied_at')
+                application_total += len(applications)
 
-        ## python manage.py seed_data
\ No newline at end of file
+                # Status history and funnel rollups, as the views would have written them
+                changes, tally = [], funnel.Tally()
+                for application in applications:
+                    job_id, employer_id = application.job_id, employers[application.job_id]
+                    tally.received(job_id, employer_id, application.applied_at)
+                    if application.status != 'NEW':
+                        change = self.status_change(application)
+                        changes.append(change)
+                        tally.transition(
+                            job_id, employer_id, 'NEW', change.to_status, application.applied_at, change.changed_at
+                        )
+                ApplicationStatusChange.objects.bulk_create(changes)
+                tally.save()
+            self.stdout.write(f'  {job_total} jobs, {application_total} applications')
+        return job_total, application_total
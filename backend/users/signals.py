@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import forget_user_status
+from .models import User
+
+# Fields the cached token check (users.authentication.active_role) depends on
+STATUS_FIELDS = {'is_active', 'role'}
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if not created and (update_fields is None or STATUS_FIELDS & set(update_fields)):
+        forget_user_status(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    forget_user_status(instance.pk)
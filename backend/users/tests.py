@@ -1,3 +1,108 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from applications import funnel
+from applications.models import Application, ApplicationStatusChange, EmployerDailyStats, JobDailyStats
+from config.testing import QueryBudgetTestCase
+from jobs.models import Job
+from users.models import User
+
+
+class UserQueryBudgetTests(QueryBudgetTestCase):
+    """Query budgets for users.urls and for authenticating a request"""
+
+    def test_register(self):
+        self.assertQueryBudget(2, 'post', '/api/auth/register/', data={
+            'email': 'new.seeker@example.com',
+            'password': 'a-long-password',
+            'full_name': 'New Seeker',
+            'role': 'SEEKER',
+        })
+
+    def test_login(self):
+        User.objects.create_user(
+            email='login@example.com', password='a-long-password', full_name='Login', role='SEEKER'
+        )
+        response = self.assertQueryBudget(1, 'post', '/api/auth/login/', data={
+            'email': 'login@example.com',
+            'password': 'a-long-password',
+        })
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(JWT_ACTIVE_CHECK_TTL=60)
+    def test_authentication_is_cached(self):
+        self.login(self.seekers[0])
+        cache.clear()
+        with self.assertNumQueries(2):
+            # Active-user check plus the endpoint's own query
+            self.client.get('/api/applications/my-applications/')
+        with self.assertNumQueries(1):
+            self.client.get('/api/applications/my-applications/')
+
+    @override_settings(JWT_ACTIVE_CHECK_TTL=60)
+    def test_saving_user_invalidates_cached_status(self):
+        seeker = self.seekers[0]
+        self.login(seeker)
+        self.assertEqual(self.client.get('/api/applications/my-applications/').status_code, 200)
+
+        seeker.is_active = False
+        seeker.save(update_fields=['is_active'])
+        self.assertEqual(self.client.get('/api/applications/my-applications/').status_code, 401)
+
+        # A token whose role claim no longer matches is rejected as well
+        seeker.is_active, seeker.role = True, 'EMPLOYER'
+        seeker.save()
+        self.assertEqual(self.client.get('/api/applications/my-applications/').status_code, 401)
+
+
+class SeedDataTests(TestCase):
+    """seed_data must be deterministic and write the rollups the views would"""
+
+    def seed(self):
+        call_command(
+            'seed_data', employers=3, seekers=6, jobs_per_employer=4, applications_per_job=3,
+            batch_size=5, stdout=StringIO(),
+        )
+        # Ids and now() differ between runs; everything else follows from the seed
+        return (
+            list(User.objects.order_by('email').values_list('email', 'full_name', 'role')),
+            list(
+                Job.objects.order_by('employer__email', 'created_at')
+                .values_list('employer__email', 'title', 'location', 'employment_type')
+            ),
+            list(
+                Application.objects.order_by('job__employer__email', 'job__created_at', 'seeker__email')
+                .values_list('seeker__email', 'status')
+            ),
+        )
+
+    def rollups(self):
+        return [
+            sorted(model.objects.values_list(*key, *funnel.COUNT_COLUMNS))
+            for model, key in ((JobDailyStats, ['job_id', 'date']), (EmployerDailyStats, ['employer_id', 'date']))
+        ]
+
+    def test_seed_data(self):
+        first = self.seed()
+        users, jobs, applications = self.seed()
+        self.assertEqual((users, jobs, applications), first)
+        self.assertEqual((len(users), len(jobs), len(applications)), (9, 12, 36))
+        self.assertEqual(
+            ApplicationStatusChange.objects.count(), Application.objects.exclude(status='NEW').count()
+        )
+
+        # Timestamps are backdated, not stamped with the time of the insert
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        self.assertFalse(Job.objects.filter(created_at__gt=an_hour_ago).exists())
+        self.assertFalse(Application.objects.filter(applied_at__gt=an_hour_ago).exists())
+
+        seeded = self.rollups()
+        self.assertTrue(seeded[0])
+        for employer_id in User.objects.filter(role='EMPLOYER').values_list('id', flat=True):
+            funnel.rebuild(employer_id)
+        self.assertEqual(self.rollups(), seeded)
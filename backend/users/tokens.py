@@ -0,0 +1,40 @@
+"""
+JWTs for users, carrying the email/role claims users.authentication.ClaimsUser
+reads instead of loading the User row.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from rest_framework_simplejwt.tokens import RefreshToken, Token
+
+
+class StreamToken(Token):
+    """
+    Short-lived token that only opens event streams, for clients that must
+    pass it in the URL (see users.authentication.QueryTokenAuthentication)
+    """
+    token_type = 'stream'
+
+    @property
+    def lifetime(self):
+        return timedelta(seconds=settings.EVENTS_TOKEN_LIFETIME)
+
+
+def refresh_token(user):
+    """Refresh token with the custom claims; access tokens derived from it inherit them"""
+    refresh = RefreshToken.for_user(user)
+    refresh['email'] = user.email
+    refresh['role'] = user.role
+    return refresh
+
+
+def access_token(user):
+    return str(refresh_token(user).access_token)
+
+
+def stream_token(user):
+    """Stream token for ``user``, a User or the request's ClaimsUser"""
+    token = StreamToken.for_user(user)
+    token['email'] = user.email
+    token['role'] = user.role
+    return str(token)
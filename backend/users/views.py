@@ -2,9 +2,9 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from .serializers import UserRegistrationSerializer, UserSerializer
+from .tokens import refresh_token
 
 
 @api_view(['POST'])
@@ -13,11 +13,7 @@ def register(request):
     serializer = UserRegistrationSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.save()
-        refresh = RefreshToken.for_user(user)
-        
-        # Add custom claims to JWT payload
-        refresh['email'] = user.email
-        refresh['role'] = user.role
+        refresh = refresh_token(user)
         
         return Response({
             'user': UserSerializer(user).data,
@@ -56,11 +52,7 @@ def login(request):
             status=status.HTTP_403_FORBIDDEN
         )
     
-    refresh = RefreshToken.for_user(user)
-    
-    # Add custom claims to JWT payload
-    refresh['email'] = user.email
-    refresh['role'] = user.role
+    refresh = refresh_token(user)
     
     return Response({
         'user': UserSerializer(user).data,
@@ -12,7 +12,7 @@ export default function CandidatesModal({ job, onClose, onUpdate }) {
   const loadApplications = async () => {
     try {
       const response = await applicationAPI.getJobApplications(job.id);
-      setApplications(response.data);
+      setApplications(response.data.results);
     } catch (error) {
       console.error('Failed to load applications:', error);
     } finally {
@@ -47,7 +47,7 @@ export default function JobsList() {
     try {
       setLoading(true);
       const jobsRes = await jobAPI.getPublicJobs();
-      setJobs(jobsRes.data);
+      setJobs(jobsRes.data.results);
       
       // Note: We'll need to create an endpoint to get user's applications
       // For now, we'll filter from the jobs data
@@ -62,7 +62,7 @@ export default function JobsList() {
   const loadMyApplications = async () => {
     try {
       const response = await applicationAPI.getMyApplications();
-      setMyApplications(response.data);
+      setMyApplications(response.data.results);
     } catch (error) {
       console.error('Failed to load applications:', error);
     }